@@ -4,3 +4,15 @@ from django.apps import AppConfig
 class ApiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'api'
+
+    def ready(self):
+        # Register the real-time chat and cache invalidation signal receivers
+        from . import realtime  # noqa: F401
+        from . import checks  # noqa: F401
+        from . import caching  # noqa: F401
+        from . import authentication  # noqa: F401
+        from . import slots  # noqa: F401
+        from . import recommendations  # noqa: F401
+        from . import mentor_cards  # noqa: F401
+        from . import signals  # noqa: F401
+        from . import autocomplete  # noqa: F401
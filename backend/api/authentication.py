@@ -0,0 +1,98 @@
+"""
+JWT authentication without a database round trip per request.
+
+The authenticated User (with its Profile attached) is cached until the token
+that loaded it expires, so repeat requests resolve request.user and
+request.user.profile with zero queries. Saving or deleting a user or profile,
+or rating a mentor, drops the cached principal (see api.signals); changes that
+bypass signals (queryset updates) are not seen until the token expires unless
+AUTH_PRINCIPAL_CACHE['RECHECK_ACTIVE'] re-reads is_active on every hit. Code
+that writes the user or profile reloads them instead of diffing against the
+cached copy.
+
+Token grants record last_login at most once per LAST_LOGIN_RESOLUTION_SECONDS
+per user, with a single UPDATE that sends no signals.
+"""
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+KEY_PREFIX = 'auth-principal'
+
+
+def _principal_key(user_id):
+    return f'{KEY_PREFIX}:{user_id}'
+
+
+def _config():
+    return getattr(settings, 'AUTH_PRINCIPAL_CACHE', {})
+
+
+def invalidate_principals(*user_ids):
+    """Drop cached principals now and again after commit"""
+    keys = [_principal_key(user_id) for user_id in user_ids]
+    cache.delete_many(keys)
+    transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def record_login(user):
+    """Coalesced replacement for update_last_login"""
+    now = timezone.now()
+    resolution = timedelta(seconds=_config().get('LAST_LOGIN_RESOLUTION_SECONDS', 0))
+    if user.last_login is not None and now - user.last_login < resolution:
+        return
+    # A queryset update skips post_save, so logins do not invalidate caches
+    User.objects.filter(pk=user.pk).update(last_login=now)
+    user.last_login = now
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """JWTAuthentication that serves the user and profile from the cache"""
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_('Token contained no recognizable user identification'))
+
+        key = _principal_key(user_id)
+        user = cache.get(key) if _config().get('ENABLED', True) else None
+        if user is not None and _config().get('RECHECK_ACTIVE', False):
+            is_active = self.user_model.objects.filter(
+                **{api_settings.USER_ID_FIELD: user_id}
+            ).values_list('is_active', flat=True).first()
+            if is_active is None:
+                cache.delete(key)
+                raise AuthenticationFailed(_('User not found'), code='user_not_found')
+            user.is_active = is_active
+        if user is None:
+            try:
+                user = self.user_model.objects.select_related('profile').get(
+                    **{api_settings.USER_ID_FIELD: user_id}
+                )
+            except self.user_model.DoesNotExist:
+                raise AuthenticationFailed(_('User not found'), code='user_not_found')
+            timeout = int(validated_token.get('exp', 0) - time.time())
+            if timeout > 0 and _config().get('ENABLED', True):
+                cache.set(key, user, timeout=timeout)
+
+        if not user.is_active:
+            raise AuthenticationFailed(_('User is inactive'), code='user_inactive')
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password):
+                raise AuthenticationFailed(
+                    _("The user's password has been changed."), code='password_changed'
+                )
+
+        return user
@@ -0,0 +1,402 @@
+"""
+Prefix-trie autocomplete for skill names and mentor display names.
+
+Each worker holds the trie in memory. Workers share it through two files:
+a JSON snapshot (AUTOCOMPLETE['SNAPSHOT_PATH']) and an append-only change
+log next to it ('<path>.log'), one JSON line per changed skill or mentor.
+
+- After a write commits (skills below; mentors through api.signals), the
+  changed ids are queued for a writer thread, which reloads only those rows
+  and appends them to the log under an exclusive file lock.
+- Searches apply the log lines other workers appended, at most every
+  CHECK_INTERVAL seconds; that reads only the new bytes.
+- Full loads (no trie yet, or another worker replaced the snapshot) and
+  compaction (folding the log into a new snapshot once it exceeds
+  COMPACT_BYTES) run in a background thread, never on the request path.
+  Until a worker's first load finishes, its searches return no results.
+
+The server entry points (skill_sync.wsgi, skill_sync.asgi) call
+index.start() to load the snapshot as each worker boots.
+
+    python manage.py build_autocomplete   # write a fresh snapshot at deploy time
+"""
+import fcntl
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import connections, transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .models import Skill
+
+KINDS = ('skill', 'mentor')
+SNAPSHOT_VERSION = 1
+
+logger = logging.getLogger(__name__)
+
+
+def _config():
+    return getattr(settings, 'AUTOCOMPLETE', {})
+
+
+def normalize(value):
+    return ' '.join(value.casefold().split())
+
+
+class _Node:
+    __slots__ = ('children', 'items')
+
+    def __init__(self):
+        self.children = {}
+        self.items = set()
+
+
+class PrefixTrie:
+    """Maps normalized keys to sets of (kind, id, label) items"""
+
+    def __init__(self):
+        self.root = _Node()
+
+    def insert(self, key, item):
+        node = self.root
+        for char in key:
+            node = node.children.setdefault(char, _Node())
+        node.items.add(item)
+
+    def remove(self, key, item):
+        path = [self.root]
+        for char in key:
+            node = path[-1].children.get(char)
+            if node is None:
+                return
+            path.append(node)
+        path[-1].items.discard(item)
+        # Prune branches left empty
+        for depth in range(len(key), 0, -1):
+            node = path[depth]
+            if node.items or node.children:
+                break
+            del path[depth - 1].children[key[depth - 1]]
+
+    def search(self, prefix, limit, kinds=KINDS):
+        """Up to `limit` distinct items under `prefix`, in key order"""
+        node = self.root
+        for char in prefix:
+            node = node.children.get(char)
+            if node is None:
+                return []
+        found = {}
+        stack = [node]
+        while stack and len(found) < limit:
+            node = stack.pop()
+            for item in sorted(node.items, key=lambda item: item[2]):
+                if item[0] in kinds and item not in found:
+                    found[item] = None
+                    if len(found) == limit:
+                        break
+            stack.extend(node.children[char] for char in sorted(node.children, reverse=True))
+        return list(found)
+
+
+def _keys(label, extra=()):
+    """Full label, each word of it, and any extra keys such as a username"""
+    full = normalize(label)
+    return sorted({full, *full.split(), *(normalize(value) for value in extra)} - {''})
+
+
+def load_entries(skill_ids=None, mentor_ids=None):
+    """{(kind, id): (label, keys)} read from the database; None ids means all rows"""
+    entries = {}
+    skills = Skill.objects.all() if skill_ids is None else Skill.objects.filter(pk__in=skill_ids)
+    for skill_id, name in skills.values_list('id', 'name'):
+        entries[('skill', skill_id)] = (name, _keys(name))
+
+    mentors = User.objects.filter(profile__is_mentor=True)
+    if mentor_ids is not None:
+        mentors = mentors.filter(pk__in=mentor_ids)
+    for user_id, username, first_name, last_name in mentors.values_list(
+        'id', 'username', 'first_name', 'last_name'
+    ):
+        label = f'{first_name} {last_name}'.strip() or username
+        entries[('mentor', user_id)] = (label, _keys(label, [username]))
+    return entries
+
+
+def build_trie(entries):
+    trie = PrefixTrie()
+    for (kind, pk), (label, keys) in entries.items():
+        for key in keys:
+            trie.insert(key, (kind, pk, label))
+    return trie
+
+
+def apply_changes(trie, entries, changes):
+    """Apply (entry_key, entry or None for removed) pairs to a trie and its entries"""
+    for entry_key, new in changes:
+        old = entries.pop(entry_key, None)
+        if old is not None:
+            for key in old[1]:
+                trie.remove(key, (*entry_key, old[0]))
+        if new is not None:
+            entries[entry_key] = new
+            for key in new[1]:
+                trie.insert(key, (*entry_key, new[0]))
+
+
+class AutocompleteIndex:
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.trie = None
+        self.entries = {}
+        # (inode, mtime) of the loaded snapshot, and how far its log was applied
+        self.snapshot_id = None
+        self.log_offset = 0
+        self.checked_at = 0.0
+        self.worker = None
+        # Skill and mentor ids waiting for the writer thread
+        self.pending = (set(), set())
+        self.writer = None
+
+    @property
+    def path(self):
+        return str(_config().get('SNAPSHOT_PATH', settings.BASE_DIR / 'autocomplete.json'))
+
+    @property
+    def log_path(self):
+        return self.path + '.log'
+
+    @contextmanager
+    def file_lock(self, shared=False):
+        with open(self.path + '.lock', 'a') as handle:
+            fcntl.flock(handle, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(handle, fcntl.LOCK_UN)
+
+    def snapshot_identity(self):
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns
+
+    def read_snapshot(self):
+        """Entries of the snapshot file, or None if it is missing or unusable; hold the file lock"""
+        try:
+            with open(self.path, encoding='utf-8') as handle:
+                data = json.load(handle)
+            if data.get('version') != SNAPSHOT_VERSION:
+                return None
+            return {(kind, pk): (label, keys) for kind, pk, label, keys in data['entries']}
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+    def read_log(self, offset):
+        """Changes appended to the log after byte `offset`, and the offset after them"""
+        try:
+            with open(self.log_path, 'rb') as handle:
+                handle.seek(offset)
+                data = handle.read()
+        except FileNotFoundError:
+            return [], offset
+        # Only whole lines; a writer holds the lock while appending, so this is defensive
+        data = data[:data.rfind(b'\n') + 1]
+        changes = []
+        for line in data.splitlines():
+            kind, pk, label, keys = json.loads(line)
+            changes.append(((kind, pk), (label, keys) if label is not None else None))
+        return changes, offset + len(data)
+
+    def append_log(self, changes):
+        """Append changes to the log (exclusive lock held); returns the log size"""
+        lines = ''.join(
+            json.dumps([kind, pk, *(entry if entry is not None else (None, None))], separators=(',', ':')) + '\n'
+            for (kind, pk), entry in changes
+        )
+        with open(self.log_path, 'a', encoding='utf-8') as handle:
+            handle.write(lines)
+            return handle.tell()
+
+    def write_snapshot(self):
+        """Publish self.entries as the snapshot and empty the log (exclusive lock held)"""
+        data = {
+            'version': SNAPSHOT_VERSION,
+            'entries': [[kind, pk, label, keys] for (kind, pk), (label, keys) in self.entries.items()],
+        }
+        tmp_path = f'{self.path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as handle:
+            json.dump(data, handle, separators=(',', ':'))
+        os.replace(tmp_path, self.path)
+        open(self.log_path, 'w').close()
+        self.snapshot_id, self.log_offset = self.snapshot_identity(), 0
+
+    def load_snapshot(self):
+        """Load the snapshot and its log; False if there is no usable snapshot"""
+        with self.file_lock(shared=True):
+            identity = self.snapshot_identity()
+            entries = self.read_snapshot()
+            if entries is None:
+                return False
+            changes, offset = self.read_log(0)
+        # Build the new trie outside self.lock, so searches keep using the old one
+        trie = build_trie(entries)
+        apply_changes(trie, entries, changes)
+        with self.lock:
+            self.trie, self.entries = trie, entries
+            self.snapshot_id, self.log_offset = identity, offset
+        return True
+
+    def load(self):
+        """Load the shared snapshot, building it from the database if there is none"""
+        if not self.load_snapshot():
+            self.rebuild()
+
+    def start(self):
+        """Load the index in the background; called once per worker at server startup"""
+        self.in_background(self.load)
+
+    def rebuild(self):
+        """Rebuild from the database and publish a new snapshot"""
+        with self.file_lock():
+            entries = load_entries()
+            trie = build_trie(entries)
+            with self.lock:
+                self.trie, self.entries = trie, entries
+                self.write_snapshot()
+        return len(entries)
+
+    def compact(self):
+        """Fold the change log into a new snapshot"""
+        with self.file_lock():
+            if self.trie is None or self.snapshot_identity() != self.snapshot_id:
+                return
+            with self.lock:
+                self.catch_up()
+                self.write_snapshot()
+
+    def catch_up(self):
+        """Apply log lines appended since the last call (file lock held)"""
+        changes, offset = self.read_log(self.log_offset)
+        if changes:
+            with self.lock:
+                apply_changes(self.trie, self.entries, changes)
+        self.log_offset = offset
+
+    def in_background(self, method):
+        """Run `method` in the background thread, unless it is already busy"""
+        with self.lock:
+            if self.worker is not None and self.worker.is_alive():
+                return
+            self.worker = threading.Thread(
+                target=self._run, args=(method,), name='autocomplete', daemon=True
+            )
+            self.worker.start()
+
+    def _run(self, method):
+        try:
+            method()
+        except Exception:
+            logger.exception('Autocomplete %s failed', method.__name__)
+        finally:
+            connections.close_all()
+
+    def ensure_current(self):
+        """Pick up other workers' changes; full loads happen in the background"""
+        now = time.monotonic()
+        if self.trie is not None and now - self.checked_at < _config().get('CHECK_INTERVAL', 1.0):
+            return
+        self.checked_at = now
+        if self.trie is None:
+            self.in_background(self.load)
+            return
+        with self.file_lock(shared=True):
+            if self.snapshot_identity() == self.snapshot_id:
+                self.catch_up()
+                return
+        # Another worker compacted or rebuilt: keep serving until the reload lands
+        self.in_background(self.load)
+
+    def refresh(self, skill_ids=(), mentor_ids=()):
+        """Append the changed rows to the shared log and apply them here"""
+        keys = [('skill', pk) for pk in skill_ids] + [('mentor', pk) for pk in mentor_ids]
+        if not keys:
+            return
+        # Read the rows under the lock, so appends land in commit order
+        with self.file_lock():
+            entries = load_entries(skill_ids=skill_ids, mentor_ids=mentor_ids)
+            size = self.append_log([(key, entries.get(key)) for key in keys])
+            if self.trie is not None and self.snapshot_identity() == self.snapshot_id:
+                self.catch_up()
+        if size > _config().get('COMPACT_BYTES', 256 * 1024):
+            self.in_background(self.compact)
+
+    def schedule(self, skill_ids=(), mentor_ids=()):
+        """Queue a refresh for the writer thread, starting it if it is idle"""
+        with self.lock:
+            self.pending[0].update(skill_ids)
+            self.pending[1].update(mentor_ids)
+            if self.writer is None:
+                self.writer = threading.Thread(
+                    target=self._write_pending, name='autocomplete-writer', daemon=True
+                )
+                self.writer.start()
+
+    def _write_pending(self):
+        """Refresh queued ids, batching whatever arrives meanwhile, until the queue is empty"""
+        try:
+            while True:
+                with self.lock:
+                    skill_ids, mentor_ids = self.pending
+                    if not skill_ids and not mentor_ids:
+                        self.writer = None
+                        return
+                    self.pending = (set(), set())
+                try:
+                    self.refresh(skill_ids=sorted(skill_ids), mentor_ids=sorted(mentor_ids))
+                except Exception:
+                    logger.exception('Autocomplete refresh failed')
+        finally:
+            connections.close_all()
+
+    def flush(self):
+        """Wait until the writer thread has written every queued refresh"""
+        while True:
+            writer = self.writer
+            if writer is None:
+                return
+            writer.join()
+
+    def search(self, query, limit=10, kinds=KINDS):
+        prefix = normalize(query)
+        if not prefix:
+            return []
+        self.ensure_current()
+        with self.lock:
+            if self.trie is None:
+                return []
+            return self.trie.search(prefix, limit, kinds)
+
+
+index = AutocompleteIndex()
+
+
+def schedule_refresh(skill_ids=(), mentor_ids=()):
+    """Refresh the rows once the transaction commits, off the request thread by default"""
+    if _config().get('BACKGROUND_REFRESH', True):
+        transaction.on_commit(lambda: index.schedule(skill_ids=skill_ids, mentor_ids=mentor_ids))
+    else:
+        transaction.on_commit(lambda: index.refresh(skill_ids=skill_ids, mentor_ids=mentor_ids))
+
+
+@receiver(post_save, sender=Skill)
+@receiver(post_delete, sender=Skill)
+def refresh_skill(sender, instance, **kwargs):
+    schedule_refresh(skill_ids=[instance.pk])
@@ -0,0 +1,77 @@
+"""
+Helpers for normalizing the free-form weekly availability stored on Profile.
+
+Profile.availability keeps the client's JSON list
+([{"day": 1, "start": "09:00", "end": "17:00"}, ...]) while the
+AvailabilityWindow table holds the same data as merged, per-day minute
+ranges so mentor searches can be answered with an index range scan.
+"""
+
+MINUTES_PER_DAY = 24 * 60
+DAYS_PER_WEEK = 7
+
+
+def parse_time(value):
+    """Convert an 'HH:MM' string to minutes since midnight ('24:00' allowed as end of day)"""
+    if not isinstance(value, str):
+        raise ValueError('Time must be a string in HH:MM format.')
+    try:
+        hours, minutes = value.split(':')
+        hours, minutes = int(hours), int(minutes)
+    except ValueError:
+        raise ValueError(f'Invalid time "{value}", expected HH:MM.')
+    if not (0 <= minutes < 60) or not (0 <= hours <= 24) or (hours == 24 and minutes):
+        raise ValueError(f'Invalid time "{value}", expected HH:MM.')
+    return hours * 60 + minutes
+
+
+def parse_day(value):
+    """Validate a day index (0=Monday, 6=Sunday)"""
+    try:
+        day = int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f'Invalid day "{value}", expected 0-6.')
+    if not 0 <= day < DAYS_PER_WEEK:
+        raise ValueError(f'Invalid day "{value}", expected 0-6.')
+    return day
+
+
+def normalize_availability(entries, strict=True):
+    """
+    Turn availability JSON into a sorted list of merged (day, start_minute, end_minute)
+    windows. Overlapping or touching windows on the same day are merged.
+
+    With strict=False malformed entries are skipped instead of raising ValueError,
+    which is what we want for legacy rows that were stored before validation.
+    """
+    if entries in (None, ''):
+        return []
+    if not isinstance(entries, list):
+        if strict:
+            raise ValueError('Availability must be a list.')
+        return []
+
+    windows = []
+    for entry in entries:
+        try:
+            if not isinstance(entry, dict):
+                raise ValueError('Each availability entry must be an object.')
+            day = parse_day(entry.get('day'))
+            start = parse_time(entry.get('start'))
+            end = parse_time(entry.get('end'))
+            if start >= end:
+                raise ValueError('Availability start must be before end.')
+        except ValueError:
+            if strict:
+                raise
+            continue
+        windows.append((day, start, end))
+
+    merged = []
+    for day, start, end in sorted(windows):
+        if merged and merged[-1][0] == day and start <= merged[-1][2]:
+            prev_day, prev_start, prev_end = merged[-1]
+            merged[-1] = (prev_day, prev_start, max(prev_end, end))
+        else:
+            merged.append((day, start, end))
+    return merged
@@ -0,0 +1,163 @@
+"""
+Response cache for the public mentor directory and skill list.
+
+Cache keys embed generation counters ("scopes") that are bumped from model
+signals, so a write invalidates exactly the responses that render it:
+
+- 'skills'        the skill list; also part of every mentor key, since
+                  mentor profiles embed skill names
+- 'mentor-list'   every mentor list response
+- 'mentor:<id>'   one mentor's detail response
+
+Generations and hit/miss counters live in the default cache, so they are
+shared by all workers whenever that cache is (file based, Redis, ...).
+"""
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete, m2m_changed
+from django.dispatch import receiver
+from rest_framework.response import Response
+
+from . import replicas
+from .models import Profile, Skill
+
+KEY_PREFIX = 'api-response'
+STATS_KEYS = {'hits': f'{KEY_PREFIX}:stats:hits', 'misses': f'{KEY_PREFIX}:stats:misses'}
+
+
+def _generation_key(scope):
+    return f'{KEY_PREFIX}:gen:{scope}'
+
+
+def get_generations(scopes):
+    keys = {_generation_key(scope): scope for scope in scopes}
+    found = cache.get_many(keys)
+    missing = {key: 1 for key in keys if key not in found}
+    if missing:
+        cache.set_many(missing, timeout=None)
+        found.update(missing)
+    return [found[_generation_key(scope)] for scope in scopes]
+
+
+def bump(*scopes):
+    """Invalidate every cached response that depends on one of `scopes`"""
+    for scope in scopes:
+        key = _generation_key(scope)
+        try:
+            cache.incr(key)
+        except ValueError:
+            # Never read yet, so nothing cached under it can exist
+            cache.set(key, 1, timeout=None)
+    replicas.note_writes(scopes)
+
+
+def bump_on_commit(*scopes):
+    # Bump now and again after commit, so a concurrent read cannot re-cache
+    # the pre-commit state under the new generation
+    bump(*scopes)
+    transaction.on_commit(lambda: bump(*scopes))
+
+
+def _count(name):
+    key = STATS_KEYS[name]
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, timeout=None)
+
+
+def get_stats():
+    values = cache.get_many(list(STATS_KEYS.values()))
+    stats = {name: values.get(key, 0) for name, key in STATS_KEYS.items()}
+    total = stats['hits'] + stats['misses']
+    stats['hit_ratio'] = round(stats['hits'] / total, 4) if total else 0.0
+    return stats
+
+
+def normalize_query(query_params):
+    """Order-insensitive, blank-insensitive representation of the query string"""
+    items = sorted(
+        (key, value)
+        for key in query_params
+        for value in query_params.getlist(key)
+        if value != ''
+    )
+    return '&'.join(f'{key}={value}' for key, value in items)
+
+
+class CachedResponseMixin:
+    """
+    Serves list/retrieve responses from the cache. Views describe their
+    dependencies with get_cache_scopes(); the rendered data is stored, so a
+    hit skips the queries and the serializers entirely.
+    """
+    cache_timeout = None
+
+    def get_cache_scopes(self):
+        raise NotImplementedError
+
+    def get_cache_key(self, request):
+        scopes = self.get_cache_scopes()
+        generations = get_generations(scopes)
+        raw = '|'.join([
+            self.basename, self.action, str(self.kwargs.get(self.lookup_url_kwarg or self.lookup_field, '')),
+            request.get_host(), normalize_query(request.query_params),
+            *(f'{scope}={generation}' for scope, generation in zip(scopes, generations)),
+        ])
+        return f'{KEY_PREFIX}:{hashlib.sha1(raw.encode("utf-8")).hexdigest()}'
+
+    def cached_response(self, request, render):
+        key = self.get_cache_key(request)
+        data = cache.get(key)
+        if data is not None:
+            _count('hits')
+            response = Response(data)
+            response['X-Cache'] = 'HIT'
+            return response
+
+        _count('misses')
+        # A lagging replica must not fill the cache with rows from before a write
+        with replicas.primary_if_written(self.get_cache_scopes()):
+            response = render()
+        if response.status_code == 200:
+            timeout = self.cache_timeout or settings.API_RESPONSE_CACHE_TIMEOUT
+            cache.set(key, response.data, timeout=timeout)
+        response['X-Cache'] = 'MISS'
+        return response
+
+    def list(self, request, *args, **kwargs):
+        render = super().list
+        return self.cached_response(request, lambda: render(request, *args, **kwargs))
+
+    def retrieve(self, request, *args, **kwargs):
+        render = super().retrieve
+        return self.cached_response(request, lambda: render(request, *args, **kwargs))
+
+
+def _mentor_scopes(user_id):
+    return ('mentor-list', f'mentor:{user_id}')
+
+
+def invalidate_mentor(user_id):
+    """Invalidate the directory responses showing this mentor (see api.signals)"""
+    bump_on_commit(*_mentor_scopes(user_id))
+
+
+@receiver(post_save, sender=Skill)
+@receiver(post_delete, sender=Skill)
+def invalidate_skills(sender, instance, **kwargs):
+    bump_on_commit('skills')
+
+
+@receiver(m2m_changed, sender=Profile.skills.through)
+def invalidate_profile_skills(sender, instance, action, reverse, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if reverse:
+        # skill.profiles.add(...) may touch any number of mentors
+        bump_on_commit('skills')
+    elif instance.is_mentor:
+        bump_on_commit(*_mentor_scopes(instance.user_id))
@@ -0,0 +1,31 @@
+"""
+System checks for deployment settings the app relies on.
+"""
+from django.conf import settings
+from django.core.checks import Tags, Warning, register
+
+# Backends whose entries only the current process can see
+PER_PROCESS_CACHES = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+@register(Tags.caches, deploy=True)
+def check_shared_cache(app_configs, **kwargs):
+    """Cache invalidation and the recommendation change log need a cache every worker sees"""
+    backend = settings.CACHES.get('default', {}).get('BACKEND')
+    if backend not in PER_PROCESS_CACHES:
+        return []
+    return [
+        Warning(
+            f"CACHES['default'] uses {backend}, which each worker process keeps to itself.",
+            hint=(
+                'Cached responses, free slots, authenticated principals and the recommendation '
+                'change log are invalidated through the default cache, so other workers keep '
+                'serving stale data. Use FileBasedCache (one host) or RedisCache, or run a '
+                'single worker.'
+            ),
+            id='api.W001',
+        )
+    ]
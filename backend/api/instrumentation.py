@@ -0,0 +1,128 @@
+"""
+Per-request timing: database queries, view, serializer and render time.
+
+RequestMetricsMiddleware (api.middleware) starts a RequestMetrics for a
+sampled request and stores it in a context variable. Context variables
+follow the request into the thread a sync view runs in under ASGI, so the
+same code measures WSGI and ASGI requests. Queries are counted by an
+execute wrapper installed on every database connection. Serializer time is
+collected by InstrumentedSerializerMixin.
+
+Configured by settings.REQUEST_METRICS (see settings.py).
+"""
+import contextvars
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+_current = contextvars.ContextVar('request_metrics', default=None)
+
+
+def get_config():
+    return getattr(settings, 'REQUEST_METRICS', {})
+
+
+class RequestMetrics:
+    __slots__ = (
+        'started', 'query_count', 'query_time', 'slow_queries', 'slow_query_seconds',
+        'spans', 'span_depth', 'view_started', 'view_finished', 'render_finished',
+    )
+
+    def __init__(self, slow_query_seconds):
+        self.started = time.perf_counter()
+        self.query_count = 0
+        self.query_time = 0.0
+        self.slow_queries = []
+        self.slow_query_seconds = slow_query_seconds
+        self.spans = {}
+        self.span_depth = {}
+        self.view_started = self.view_finished = self.render_finished = None
+
+    def record_query(self, sql, duration, alias):
+        self.query_count += 1
+        self.query_time += duration
+        if duration >= self.slow_query_seconds:
+            self.slow_queries.append((alias, duration, sql))
+
+    def timings(self, finished):
+        """{name: seconds} for the Server-Timing header and the log line"""
+        timings = {'db': self.query_time}
+        if self.view_started is not None:
+            view_finished = self.view_finished or finished
+            timings['view'] = view_finished - self.view_started
+            if self.render_finished is not None:
+                timings['render'] = self.render_finished - view_finished
+        timings.update(self.spans)
+        timings['total'] = finished - self.started
+        return timings
+
+
+def start():
+    """Begin measuring the current request; returns (metrics, reset token)"""
+    metrics = RequestMetrics(get_config().get('SLOW_QUERY_MS', 100) / 1000)
+    return metrics, _current.set(metrics)
+
+
+def stop(token):
+    _current.reset(token)
+
+
+def current():
+    return _current.get()
+
+
+@contextmanager
+def span(name):
+    """Add the wrapped block's time to `name`; nested blocks of the same name count once"""
+    metrics = _current.get()
+    if metrics is None or metrics.span_depth.get(name):
+        yield
+        return
+    metrics.span_depth[name] = 1
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.spans[name] = metrics.spans.get(name, 0.0) + time.perf_counter() - started
+        metrics.span_depth[name] = 0
+
+
+class InstrumentedSerializerMixin:
+    """Counts to_representation time as `serialize` in the request metrics"""
+
+    def to_representation(self, instance):
+        if _current.get() is None:
+            return super().to_representation(instance)
+        with span('serialize'):
+            return super().to_representation(instance)
+
+
+def _record_query(execute, sql, params, many, context):
+    metrics = _current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.record_query(sql, time.perf_counter() - started, context['connection'].alias)
+
+
+def install_query_recorder(connection):
+    if _record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_record_query)
+
+
+@receiver(connection_created)
+def instrument_connection(sender, connection, **kwargs):
+    install_query_recorder(connection)
+
+
+def instrument_open_connections():
+    """Cover connections opened before this module was imported"""
+    for connection in connections.all(initialized_only=True):
+        install_query_recorder(connection)
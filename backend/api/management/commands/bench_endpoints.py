@@ -0,0 +1,317 @@
+import json
+import statistics
+import tempfile
+from datetime import datetime, timedelta, timezone
+from io import StringIO
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count
+from django.test.utils import override_settings
+from rest_framework.test import APIClient
+
+from api.models import Message, Session, Skill
+from api.testing import measure_request
+
+BASELINE_VERSION = 1
+
+# seed_demo options per dataset size
+DATASETS = {
+    'small': {'mentors': 100, 'learners': 300, 'sessions': 3000, 'messages_per_session': 2},
+    'medium': {'mentors': 1000, 'learners': 3000, 'sessions': 30000, 'messages_per_session': 3},
+    'large': {'mentors': 10000, 'learners': 30000, 'sessions': 300000, 'messages_per_session': 3},
+}
+
+# (name, method, url, body, client) — url and body are formatted with the dataset context
+# plus the per-request values of request_values(); client is 'learner', 'mentor' or 'anonymous'
+SCENARIOS = [
+    ('skills', 'GET', '/api/skills/', None, 'anonymous'),
+    ('mentors', 'GET', '/api/mentors/', None, 'learner'),
+    ('mentors search', 'GET', '/api/mentors/?search={search}', None, 'learner'),
+    ('mentors by skill', 'GET', '/api/mentors/?skill={skill}&ordering=-profile__rating_avg', None, 'learner'),
+    ('mentor detail', 'GET', '/api/mentors/{mentor_id}/', None, 'learner'),
+    ('mentor slots', 'GET', '/api/mentors/{mentor_id}/slots/', None, 'learner'),
+    ('mentors recommended', 'GET', '/api/mentors/recommended/?skill_ids={skill_id}', None, 'learner'),
+    ('autocomplete', 'GET', '/api/autocomplete/?q={prefix}', None, 'anonymous'),
+    ('sessions (learner)', 'GET', '/api/sessions/', None, 'learner'),
+    ('sessions (mentor)', 'GET', '/api/sessions/?type=upcoming', None, 'mentor'),
+    ('session detail', 'GET', '/api/sessions/{session_id}/', None, 'mentor'),
+    ('ratings', 'GET', '/api/ratings/?mentor_id={mentor_id}', None, 'learner'),
+    ('messages', 'GET', '/api/messages/?session={session_id}', None, 'mentor'),
+    ('auth/me', 'GET', '/api/auth/me/', None, 'learner'),
+    ('auth/me patch', 'PATCH', '/api/auth/me/', {'bio': 'Benchmark run {n}'}, 'learner'),
+    ('register', 'POST', '/api/auth/register/', {
+        'username': 'bench_register_{n}', 'email': 'bench_register_{n}@example.com',
+        'password': 'Bench-password-{n}', 'password2': 'Bench-password-{n}',
+    }, 'anonymous'),
+    ('token', 'POST', '/api/auth/token/', {'username': '{learner}', 'password': 'password123'}, 'anonymous'),
+    ('session create', 'POST', '/api/sessions/', {
+        'mentor_id': '{mentor_id}', 'skill_id': '{skill_id}', 'scheduled_time': '{free_slot}',
+        'duration_minutes': 30, 'description': 'Benchmark run {n}',
+    }, 'learner'),
+    ('session accept', 'POST', '/api/sessions/{requested_id}/accept/', None, 'mentor'),
+    ('rating create', 'POST', '/api/ratings/', {
+        'session_id': '{completed_id}', 'score': 4, 'comment': 'Benchmark run {n}',
+    }, 'learner'),
+    ('message create', 'POST', '/api/messages/', {'session_id': '{session_id}', 'text': 'Benchmark run {n}'}, 'mentor'),
+]
+
+# Write scenarios book slots from here on, far from any seeded session
+FIXTURE_EPOCH = datetime(2100, 1, 1, tzinfo=timezone.utc)
+SLOT_SPACING = timedelta(hours=2)
+
+
+def fill(value, context):
+    if isinstance(value, dict):
+        return {key: fill(item, context) for key, item in value.items()}
+    return value.format(**context) if isinstance(value, str) else value
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark every API endpoint against freshly seeded datasets (p50/p95 latency, '
+        'queries, payload bytes) and compare with a JSON baseline'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='small,medium',
+                            help=f'Comma-separated dataset sizes from {", ".join(DATASETS)} (default: small,medium)')
+        parser.add_argument('--repeat', type=int, default=20,
+                            help='Timed warm requests per endpoint (default: 20)')
+        parser.add_argument('--only', default='',
+                            help='Comma-separated scenario names to run (default: all)')
+        parser.add_argument('--baseline', default=str(Path(settings.BASE_DIR) / 'benchmarks' / 'endpoints.json'),
+                            help='Baseline JSON file (default: backend/benchmarks/endpoints.json)')
+        parser.add_argument('--write-baseline', action='store_true',
+                            help='Store these results as the new baseline instead of comparing')
+        parser.add_argument('--latency-budget', type=float, default=1.5,
+                            help='Allowed p95 growth factor over the baseline (default: 1.5)')
+        parser.add_argument('--latency-slack-ms', type=float, default=5.0,
+                            help='Absolute p95 growth always allowed, absorbing timer noise (default: 5)')
+        parser.add_argument('--latency-retries', type=int, default=2,
+                            help='Re-measure a scenario over its latency budget up to this many times, '
+                                 'keeping the best run (default: 2)')
+        parser.add_argument('--query-budget', type=int, default=0,
+                            help='Extra queries allowed per request over the baseline (default: 0)')
+        parser.add_argument('--bytes-budget', type=float, default=1.1,
+                            help='Allowed payload growth factor over the baseline (default: 1.1)')
+
+    def handle(self, *args, **options):
+        sizes = [size for size in options['sizes'].split(',') if size]
+        unknown = set(sizes) - set(DATASETS)
+        if unknown:
+            raise CommandError(f'Unknown dataset size(s): {", ".join(sorted(unknown))}')
+        only = {name for name in options['only'].split(',') if name}
+        scenarios = [scenario for scenario in SCENARIOS if not only or scenario[0] in only]
+        repeat = max(1, options['repeat'])
+
+        path = Path(options['baseline'])
+        baseline = None
+        if not options['write_baseline']:
+            baseline = self.load_baseline(path)
+            if baseline is None:
+                raise CommandError(f'No baseline at {path}; run with --write-baseline to record one')
+
+        results = {}
+        for size in sizes:
+            self.stdout.write(self.style.MIGRATE_HEADING(f'\nDataset "{size}": {DATASETS[size]}'))
+            recorded = baseline['datasets'].get(size, {}) if baseline is not None else None
+            results[size] = self.run_dataset(size, scenarios, repeat, recorded, options)
+
+        if options['write_baseline']:
+            baseline = self.load_baseline(path) or {'version': BASELINE_VERSION, 'datasets': {}}
+            baseline['datasets'].update(results)
+            baseline['updated_at'] = datetime.now(timezone.utc).isoformat(timespec='seconds')
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(json.dumps(baseline, indent=2, sort_keys=True) + '\n')
+            self.stdout.write(self.style.SUCCESS(f'✓ Baseline written to {path}'))
+            return
+
+        failures = self.compare(baseline, results, options)
+        if failures:
+            raise CommandError('Endpoint budgets exceeded:\n' + '\n'.join(f'  {failure}' for failure in failures))
+        self.stdout.write(self.style.SUCCESS('✓ All endpoints within budget of the baseline'))
+
+    def run_dataset(self, size, scenarios, repeat, recorded, options):
+        """Seed a throwaway test database, run the scenarios and drop it again"""
+        attempts = 1 + (max(0, options['latency_retries']) if recorded is not None else 0)
+        with tempfile.TemporaryDirectory() as directory:
+            test_settings = connection.settings_dict.setdefault('TEST', {})
+            old_test_name = test_settings.get('NAME')
+            if connection.vendor == 'sqlite':
+                # A fresh file per dataset, like production: Django keeps in-memory
+                # test databases alive through destroy_test_db
+                test_settings['NAME'] = f'{directory}/bench.sqlite3'
+            old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+            try:
+                with override_settings(
+                    ALLOWED_HOSTS=['*'],
+                    # A private cache and autocomplete snapshot, so neither the
+                    # development data nor other datasets leak into the numbers
+                    CACHES={'default': {
+                        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+                        'LOCATION': f'bench-endpoints-{size}',
+                    }},
+                    AUTOCOMPLETE={
+                        **getattr(settings, 'AUTOCOMPLETE', {}), 'SNAPSHOT_PATH': f'{directory}/autocomplete.json',
+                    },
+                    REQUEST_METRICS={**getattr(settings, 'REQUEST_METRICS', {}), 'ENABLED': False},
+                ):
+                    call_command('seed_demo', stdout=StringIO(), **DATASETS[size])
+                    # Every attempt makes repeat + 1 requests with distinct fixtures
+                    context = self.build_context(attempts * (repeat + 1))
+                    clients = self.build_clients(context)
+                    results = {}
+                    for name, method, url, body, client_name in scenarios:
+                        for attempt in range(attempts):
+                            result = self.run_scenario(
+                                name, method, url, body, clients[client_name], context, repeat,
+                                start=attempt * (repeat + 1), attempt=attempt,
+                            )
+                            if name not in results or result['p95_ms'] < results[name]['p95_ms']:
+                                results[name] = result
+                            if not self.too_slow(results[name], (recorded or {}).get(name), options):
+                                break
+                    return results
+            finally:
+                connection.creation.destroy_test_db(old_name, verbosity=0)
+                test_settings['NAME'] = old_test_name
+
+    def build_context(self, requests):
+        """Ids that make the busiest rows the subject of each request"""
+        mentor = Session.objects.values('mentor').annotate(count=Count('id')).order_by('-count').first()
+        learner = Session.objects.values('requester').annotate(count=Count('id')).order_by('-count').first()
+        mentor = User.objects.get(pk=mentor['mentor'])
+        session = Message.objects.filter(session__mentor=mentor).values('session').annotate(
+            count=Count('id')
+        ).order_by('-count').first()
+        skill = mentor.profile.skills.first() or Skill.objects.first()
+        learner = User.objects.get(pk=learner['requester'])
+        return {
+            'mentor': mentor.username,
+            'mentor_id': mentor.pk,
+            'learner': learner.username,
+            'session_id': session['session'] if session else Session.objects.filter(mentor=mentor).first().pk,
+            'skill': skill.slug,
+            'skill_id': skill.pk,
+            'search': skill.name.split()[0],
+            'prefix': skill.name[:2],
+            # One fresh session per request for the write scenarios that consume one
+            'requested_ids': self.create_sessions(learner, mentor, skill, 'requested', requests, offset=0),
+            'completed_ids': self.create_sessions(learner, mentor, skill, 'completed', requests, offset=requests),
+            'free_slot_offset': 2 * requests,
+        }
+
+    def create_sessions(self, learner, mentor, skill, status, count, offset):
+        """Sessions in distinct far-future slots, so none overlaps another"""
+        return [
+            Session.objects.create(
+                requester=learner, mentor=mentor, skill=skill, status=status, duration_minutes=30,
+                scheduled_time=FIXTURE_EPOCH + (offset + n) * SLOT_SPACING,
+            ).pk
+            for n in range(count)
+        ]
+
+    def request_values(self, context, n):
+        """Placeholders that differ per request: each write gets its own session or slot"""
+        return {
+            'n': n,
+            'requested_id': context['requested_ids'][n],
+            'completed_id': context['completed_ids'][n],
+            'free_slot': (FIXTURE_EPOCH + (context['free_slot_offset'] + n) * SLOT_SPACING).isoformat(),
+        }
+
+    def build_clients(self, context):
+        """Clients authenticated with real JWTs, so authentication is measured too"""
+        clients = {'anonymous': APIClient()}
+        for role in ('learner', 'mentor'):
+            client = APIClient()
+            response = client.post(
+                '/api/auth/token/', {'username': context[role], 'password': 'password123'}, format='json'
+            )
+            if response.status_code != 200:
+                raise CommandError(f'Could not log in as {context[role]}: {response.status_code}')
+            client.credentials(HTTP_AUTHORIZATION=f'Bearer {response.data["access"]}')
+            clients[role] = client
+        return clients
+
+    def run_scenario(self, name, method, url, body, client, context, repeat, start=0, attempt=0):
+        """One cold request (empty cache) followed by `repeat` warm ones, numbered from `start`"""
+        def call(n):
+            values = {**context, **self.request_values(context, n)}
+            response, queries, elapsed = measure_request(client, method, fill(url, values), fill(body, values))
+            if response.status_code >= 400:
+                raise CommandError(f'{name}: {method} {fill(url, values)} returned {response.status_code}')
+            return response, queries, elapsed
+
+        cache.clear()
+        response, cold_queries, cold_ms = call(start)
+        timings, query_counts = [], []
+        for n in range(start + 1, start + repeat + 1):
+            response, queries, elapsed = call(n)
+            timings.append(elapsed)
+            query_counts.append(queries)
+
+        result = {
+            'cold_ms': round(cold_ms, 2),
+            'p50_ms': round(statistics.median(timings), 2),
+            'p95_ms': round(percentile(timings, 0.95), 2),
+            'queries_cold': cold_queries,
+            'queries': max(query_counts),
+            'bytes': len(response.content),
+        }
+        self.stdout.write(
+            f'  {name:<22} p50 {result["p50_ms"]:8.2f} ms  p95 {result["p95_ms"]:8.2f} ms  '
+            f'cold {result["cold_ms"]:8.2f} ms  queries {result["queries"]:>3} '
+            f'(cold {result["queries_cold"]:>3})  {result["bytes"]:>8} B'
+            + (f'  (retry {attempt})' if attempt else '')
+        )
+        return result
+
+    def latency_limit(self, previous, options):
+        return previous['p95_ms'] * options['latency_budget'] + options['latency_slack_ms']
+
+    def too_slow(self, current, previous, options):
+        return previous is not None and current['p95_ms'] > self.latency_limit(previous, options)
+
+    def load_baseline(self, path):
+        if not path.exists():
+            return None
+        baseline = json.loads(path.read_text())
+        if baseline.get('version') != BASELINE_VERSION:
+            raise CommandError(f'{path} has an unsupported baseline version; re-record it with --write-baseline')
+        return baseline
+
+    def compare(self, baseline, results, options):
+        failures = []
+        for size, scenarios in results.items():
+            recorded = baseline['datasets'].get(size, {})
+            for name, current in scenarios.items():
+                label = f'[{size}] {name}:'
+                previous = recorded.get(name)
+                if previous is None:
+                    # A scenario without a baseline would otherwise never be checked
+                    failures.append(f'{label} not in the baseline; record it with --write-baseline')
+                    continue
+                latency_limit = self.latency_limit(previous, options)
+                if current['p95_ms'] > latency_limit:
+                    failures.append(f'{label} p95 {current["p95_ms"]} ms > {latency_limit:.2f} ms '
+                                    f'(baseline {previous["p95_ms"]} ms)')
+                for key in ('queries', 'queries_cold'):
+                    if current[key] > previous[key] + options['query_budget']:
+                        failures.append(f'{label} {key} {current[key]} > baseline {previous[key]}')
+                bytes_limit = previous['bytes'] * options['bytes_budget']
+                if current['bytes'] > bytes_limit:
+                    failures.append(f'{label} {current["bytes"]} bytes > {bytes_limit:.0f} '
+                                    f'(baseline {previous["bytes"]})')
+        return failures
@@ -0,0 +1,137 @@
+import random
+import statistics
+import time
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.models import Q
+from django.test.utils import override_settings
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from api.models import Session
+from api.pagination import KeysetPagination
+from api.views import SessionViewSet
+
+
+class Command(BaseCommand):
+    help = 'Benchmark /api/sessions/ for one user with many sessions (plans and latency)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sessions', type=int, default=50000,
+                            help='Sessions to create for the benchmark user (default: 50000)')
+        parser.add_argument('--repeat', type=int, default=30,
+                            help='Timed runs per scenario (default: 30)')
+        parser.add_argument('--keep', action='store_true',
+                            help='Keep the generated users and sessions afterwards')
+
+    def handle(self, *args, **options):
+        user = self.create_dataset(options['sessions'])
+        try:
+            self.report_plans(user)
+            self.report_latency(user, options['repeat'])
+        finally:
+            if not options['keep']:
+                User.objects.filter(username__startswith='bench_sessions_').delete()
+                self.stdout.write('Removed benchmark data')
+
+    def create_dataset(self, count):
+        User.objects.filter(username__startswith='bench_sessions_').delete()
+        User.objects.bulk_create([
+            User(username=f'bench_sessions_{i}') for i in range(21)
+        ])
+        user, *others = User.objects.filter(username__startswith='bench_sessions_').order_by('id')
+
+        self.stdout.write(f'Creating {count} sessions for {user.username}...')
+        rng = random.Random(42)
+        statuses = [value for value, _ in Session.STATUS_CHOICES]
+        now = timezone.now()
+        batch = []
+        for i in range(count):
+            other = rng.choice(others)
+            as_mentor = rng.random() < 0.5
+            batch.append(Session(
+                requester=other if as_mentor else user,
+                mentor=user if as_mentor else other,
+                status=rng.choices(statuses, weights=[1, 1, 6, 2])[0],
+                duration_minutes=30,
+            ))
+            if len(batch) == 5000:
+                Session.objects.bulk_create(batch)
+                batch = []
+        Session.objects.bulk_create(batch)
+
+        # Spread created_at over two years (auto_now_add ignores explicit values)
+        ids = list(Session.objects.filter(requester__username__startswith='bench_sessions_')
+                   .values_list('id', flat=True))
+        for chunk_start in range(0, len(ids), 5000):
+            chunk = Session.objects.in_bulk(ids[chunk_start:chunk_start + 5000])
+            for obj in chunk.values():
+                obj.created_at = now - timedelta(minutes=rng.randrange(2 * 365 * 24 * 60))
+            Session.objects.bulk_update(chunk.values(), ['created_at'])
+        return user
+
+    def report_plans(self, user):
+        upcoming = ['requested', 'accepted']
+        legacy = Session.objects.filter(
+            Q(requester=user) | Q(mentor=user), status__in=upcoming
+        ).order_by('-created_at', '-id')[:11]
+        self.stdout.write(self.style.MIGRATE_HEADING('\nPlan: OR across requester/mentor'))
+        self.stdout.write(legacy.explain())
+
+        arms = []
+        for status_value in upcoming:
+            arms.append(Session.objects.filter(requester=user, status=status_value))
+            arms.append(Session.objects.filter(mentor=user, status=status_value).exclude(requester=user))
+        keys = [arm.order_by('-created_at', '-id').values_list('pk', 'created_at', 'id')[:11] for arm in arms]
+        if connection.features.supports_slicing_ordering_in_compound:
+            union = keys[0].union(*keys[1:], all=True).order_by('-created_at', '-id')[:11]
+            self.stdout.write(self.style.MIGRATE_HEADING('\nPlan: UNION ALL of index-ordered arms'))
+            self.stdout.write(union.explain())
+        else:
+            # The statement KeysetPagination runs where UNION branches cannot be limited
+            sql, params = KeysetPagination().union_subqueries_sql(keys, connection.alias, True, 11)
+            self.stdout.write(self.style.MIGRATE_HEADING('\nPlan: UNION ALL of index-ordered arms (as subqueries)'))
+            with connection.cursor() as cursor:
+                cursor.execute(f'{connection.ops.explain_query_prefix()} {sql}', params)
+                self.stdout.write('\n'.join(' '.join(str(column) for column in row) for row in cursor.fetchall()))
+
+    def report_latency(self, user, repeat):
+        factory = APIRequestFactory()
+        view = SessionViewSet.as_view({'get': 'list'})
+
+        def call(query):
+            request = factory.get('/api/sessions/' + query)
+            force_authenticate(request, user=user)
+            response = view(request)
+            response.render()
+            return response
+
+        with override_settings(ALLOWED_HOSTS=['*']):
+            first = call('?type=upcoming')
+            deep_cursor = None
+            response = first
+            for _ in range(50):
+                if not response.data['next']:
+                    break
+                deep_cursor = response.data['next'].split('?', 1)[1]
+                response = call('?' + deep_cursor)
+
+            scenarios = [
+                ('keyset, first page', '?type=upcoming'),
+                ('keyset, page 50', '?' + deep_cursor if deep_cursor else '?type=upcoming'),
+                ('page-number, first page', '?type=upcoming&page=1'),
+                ('page-number, page 50', '?type=upcoming&page=50'),
+            ]
+            self.stdout.write(self.style.MIGRATE_HEADING(f'\nLatency over {repeat} runs'))
+            for label, query in scenarios:
+                timings = []
+                for _ in range(repeat):
+                    start = time.perf_counter()
+                    call(query)
+                    timings.append((time.perf_counter() - start) * 1000)
+                timings.sort()
+                p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+                self.stdout.write(f'  {label:<26} p50 {statistics.median(timings):7.2f} ms   p95 {p95:7.2f} ms')
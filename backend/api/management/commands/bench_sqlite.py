@@ -0,0 +1,205 @@
+import multiprocessing
+import random
+import shutil
+import statistics
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connections, transaction
+from django.db.models import F
+from django.test.utils import override_settings
+from django.utils import timezone
+
+from api.models import Message, Profile, Session
+
+ALIAS = 'bench_sqlite'
+
+# ENGINE and settings.SQLITE overrides per mode
+MODES = {
+    'default': ('django.db.backends.sqlite3', {}),
+    'wal': ('api.sqlite', {'IMMEDIATE_TRANSACTIONS': False, 'SERIALIZE_WRITES': False}),
+    'immediate': ('api.sqlite', {'SERIALIZE_WRITES': False}),
+    'tuned': ('api.sqlite', {}),
+}
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def chat_transaction(session_ids, user_ids, rng):
+    """The write path of POST /api/messages/: read the session, then write"""
+    with transaction.atomic(using=ALIAS):
+        session = Session.objects.using(ALIAS).get(pk=rng.choice(session_ids))
+        Message.objects.using(ALIAS).create(session=session, sender_id=session.requester_id, text='Benchmark')
+        Session.objects.using(ALIAS).filter(pk=session.pk).update(updated_at=timezone.now())
+
+
+def profile_transaction(session_ids, user_ids, rng):
+    """A read-modify-write of one profile, like PATCH /api/auth/me/"""
+    with transaction.atomic(using=ALIAS):
+        profile = Profile.objects.using(ALIAS).get(user_id=rng.choice(user_ids))
+        Profile.objects.using(ALIAS).filter(pk=profile.pk).update(rating_count=F('rating_count') + 1)
+
+
+def read_request(session_ids, user_ids, rng):
+    """A reader running beside the writers, like GET /api/sessions/"""
+    list(Session.objects.using(ALIAS).filter(requester_id=rng.choice(user_ids)).order_by('-created_at')[:10])
+
+
+WRITES = (chat_transaction, profile_transaction)
+
+
+def run_worker(threads, duration, read_share, seed, session_ids, user_ids):
+    """One process of `threads` threads issuing requests for `duration` seconds"""
+    results = []
+    deadline = time.perf_counter() + duration
+
+    def loop(thread_seed):
+        rng = random.Random(thread_seed)
+        timings = {'read': [], 'write': []}
+        errors = {'read': 0, 'write': 0}
+        try:
+            while time.perf_counter() < deadline:
+                kind = 'read' if rng.random() < read_share else 'write'
+                action = read_request if kind == 'read' else rng.choice(WRITES)
+                started = time.perf_counter()
+                try:
+                    action(session_ids, user_ids, rng)
+                except OperationalError:
+                    errors[kind] += 1
+                else:
+                    timings[kind].append((time.perf_counter() - started) * 1000)
+        finally:
+            connections[ALIAS].close()
+        results.append((timings, errors))
+
+    workers = [threading.Thread(target=loop, args=(f'{seed}:{n}',)) for n in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return results
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure write contention on SQLite: gthread-style processes x threads writing to one '
+        'database file, in the default and the tuned (api.sqlite) modes'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--modes', default='default,tuned',
+                            help=f'Comma-separated modes from {", ".join(MODES)} (default: default,tuned)')
+        parser.add_argument('--processes', type=int, default=2,
+                            help='Worker processes, like gunicorn -w (default: 2)')
+        parser.add_argument('--threads', type=int, default=8,
+                            help='Threads per process, like gunicorn --threads (default: 8)')
+        parser.add_argument('--duration', type=float, default=10,
+                            help='Seconds per mode (default: 10)')
+        parser.add_argument('--read-share', type=float, default=0.5,
+                            help='Fraction of requests that only read (default: 0.5)')
+        parser.add_argument('--users', type=int, default=200,
+                            help='Users (and sessions per user) in the benchmark database (default: 200)')
+        parser.add_argument('--seed', type=int, default=1)
+
+    def handle(self, *args, **options):
+        modes = [mode for mode in options['modes'].split(',') if mode]
+        unknown = set(modes) - set(MODES)
+        if unknown:
+            raise CommandError(f'Unknown mode(s): {", ".join(sorted(unknown))}')
+
+        with tempfile.TemporaryDirectory() as directory:
+            template = Path(directory) / 'template.sqlite3'
+            self.stdout.write(f'Building a {options["users"]}-user database...')
+            with self.database(template, 'default'):
+                session_ids, user_ids = self.build_database(options['users'])
+
+            for mode in modes:
+                path = Path(directory) / f'{mode}.sqlite3'
+                shutil.copyfile(template, path)
+                with self.database(path, mode):
+                    self.report(mode, self.run_mode(options, session_ids, user_ids))
+
+    @contextmanager
+    def database(self, path, mode):
+        """Point the ALIAS connection at `path`, opened in `mode`"""
+        engine, overrides = MODES[mode]
+        connections.close_all()
+        connections.settings[ALIAS] = {
+            **connections.settings['default'], 'ENGINE': engine, 'NAME': str(path), 'OPTIONS': {},
+        }
+        try:
+            with override_settings(SQLITE={**getattr(settings, 'SQLITE', {}), **overrides}):
+                yield
+        finally:
+            connections[ALIAS].close()
+            del connections[ALIAS]
+            del connections.settings[ALIAS]
+
+    def build_database(self, users):
+        call_command('migrate', database=ALIAS, verbosity=0)
+        User.objects.using(ALIAS).bulk_create([User(username=f'bench_sqlite_{n}') for n in range(users)])
+        user_ids = list(User.objects.using(ALIAS).values_list('id', flat=True))
+        Profile.objects.using(ALIAS).bulk_create([Profile(user_id=user_id) for user_id in user_ids])
+        rng = random.Random(0)
+        Session.objects.using(ALIAS).bulk_create([
+            Session(requester_id=user_id, mentor_id=rng.choice(user_ids), duration_minutes=30)
+            for user_id in user_ids for _ in range(10)
+        ])
+        session_ids = list(Session.objects.using(ALIAS).values_list('id', flat=True))
+        return session_ids, user_ids
+
+    def run_mode(self, options, session_ids, user_ids):
+        started = time.perf_counter()
+        connections.close_all()
+        with ProcessPoolExecutor(
+            max_workers=options['processes'],
+            mp_context=multiprocessing.get_context('fork'),
+        ) as pool:
+            futures = [
+                pool.submit(
+                    run_worker, options['threads'], options['duration'], options['read_share'],
+                    f'{options["seed"]}:{n}', session_ids, user_ids,
+                )
+                for n in range(options['processes'])
+            ]
+            results = [result for future in futures for result in future.result()]
+        elapsed = time.perf_counter() - started
+
+        report = {'elapsed': elapsed}
+        for kind in ('read', 'write'):
+            timings = [ms for thread_timings, _ in results for ms in thread_timings[kind]]
+            errors = sum(thread_errors[kind] for _, thread_errors in results)
+            report[kind] = {
+                'ok': len(timings),
+                'errors': errors,
+                'per_second': len(timings) / elapsed,
+                'p50': statistics.median(timings) if timings else 0.0,
+                'p99': percentile(timings, 0.99) if timings else 0.0,
+                'max': max(timings, default=0.0),
+            }
+        return report
+
+    def report(self, mode, report):
+        engine, overrides = MODES[mode]
+        label = f'{engine}, {overrides}' if overrides else engine
+        self.stdout.write(self.style.MIGRATE_HEADING(f'\n{mode} ({label})'))
+        for kind in ('write', 'read'):
+            row = report[kind]
+            attempts = row['ok'] + row['errors']
+            error_rate = row['errors'] / attempts * 100 if attempts else 0.0
+            line = (
+                f'  {kind:<5} {row["per_second"]:8.1f}/s  p50 {row["p50"]:8.2f} ms  p99 {row["p99"]:8.2f} ms  '
+                f'max {row["max"]:8.2f} ms  locked {row["errors"]:>5} ({error_rate:.2f}%)'
+            )
+            self.stdout.write(self.style.ERROR(line) if row['errors'] else line)
@@ -0,0 +1,16 @@
+import time
+
+from django.core.management.base import BaseCommand
+from api.autocomplete import index
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the autocomplete trie from the database and write the shared snapshot'
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        count = index.rebuild()
+        elapsed = (time.perf_counter() - started) * 1000
+        self.stdout.write(self.style.SUCCESS(
+            f'✓ Indexed {count} skills and mentors in {elapsed:.0f} ms → {index.path}'
+        ))
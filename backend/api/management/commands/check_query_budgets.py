@@ -0,0 +1,51 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Q
+from django.test.utils import override_settings
+from rest_framework.test import APIClient
+
+from api.models import Session
+from api.testing import QueryBudgetExceeded, assert_list_query_budget
+from api.urls import router
+
+
+class Command(BaseCommand):
+    help = 'Check that every router list endpoint stays within its list_query_budget'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', default='alice',
+                            help='Username to authenticate as (default: alice)')
+        parser.add_argument('--page-sizes', default='1,10,50',
+                            help='Comma-separated page sizes to try (default: 1,10,50)')
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options['user'])
+        except User.DoesNotExist:
+            raise CommandError(f'User "{options["user"]}" does not exist; run seed_demo first')
+        page_sizes = [int(size) for size in options['page_sizes'].split(',')]
+
+        client = APIClient()
+        client.force_authenticate(user)
+        session = Session.objects.filter(Q(requester=user) | Q(mentor=user)).first()
+
+        failures = []
+        with override_settings(ALLOWED_HOSTS=['*']):
+            for prefix, viewset, basename in router.registry:
+                if viewset.list_query_budget is None:
+                    continue
+                url = f'/api/{prefix}/'
+                if basename == 'message' and session is not None:
+                    url += f'?session={session.id}'
+                try:
+                    counts = assert_list_query_budget(client, url, page_sizes=page_sizes)
+                except QueryBudgetExceeded as exc:
+                    failures.append(str(exc))
+                    self.stdout.write(self.style.ERROR(f'✗ {url}'))
+                    continue
+                summary = ', '.join(f'{size}: {count}' for size, count in counts.items())
+                self.stdout.write(f'✓ {url:<28} budget {viewset.list_query_budget}  ({summary})')
+
+        if failures:
+            raise CommandError('\n\n'.join(failures))
+        self.stdout.write(self.style.SUCCESS('✓ All list endpoints are within budget'))
@@ -0,0 +1,382 @@
+import asyncio
+import json
+import random
+import socket
+import subprocess
+import tempfile
+import time
+from collections import Counter, defaultdict
+from pathlib import Path
+from urllib.parse import urlencode, urlsplit
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from api.models import Profile, Skill
+
+# Latency histogram bucket upper bounds (ms); the last bucket is open-ended
+BUCKETS_MS = [5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000]
+
+# Relative weights of what a virtual user does next
+LEARNER_MIX = {'browse': 50, 'request_session': 15, 'chat': 20, 'rate': 10, 'login': 5}
+MENTOR_MIX = {'review_requests': 40, 'complete': 15, 'chat': 35, 'login': 10}
+
+CHAT_LINES = ['Hi! Looking forward to it.', 'Sharing my screen link soon.', 'Thanks!', 'See you then.']
+
+
+class HTTPConnection:
+    """Minimal keep-alive HTTP/1.1 client on asyncio streams (one per virtual user)"""
+
+    def __init__(self, host, port):
+        self.host, self.port = host, port
+        self.reader = self.writer = None
+
+    async def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            try:
+                await self.writer.wait_closed()
+            except OSError:
+                pass
+        self.reader = self.writer = None
+
+    async def request(self, method, path, body=None, headers=None):
+        """Returns (status, decoded JSON or None); reconnects once if the server closed the connection"""
+        for attempt in (1, 2):
+            if self.writer is None:
+                self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+            try:
+                return await self._exchange(method, path, body, headers or {})
+            except (ConnectionError, asyncio.IncompleteReadError):
+                await self.close()
+                if attempt == 2:
+                    raise
+
+    async def _exchange(self, method, path, body, headers):
+        payload = json.dumps(body).encode() if body is not None else b''
+        lines = [f'{method} {path} HTTP/1.1', f'Host: {self.host}:{self.port}', 'Accept: application/json']
+        if body is not None:
+            lines += ['Content-Type: application/json', f'Content-Length: {len(payload)}']
+        lines += [f'{name}: {value}' for name, value in headers.items()]
+        self.writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode() + payload)
+        await self.writer.drain()
+
+        status_line = await self.reader.readuntil(b'\r\n')
+        status = int(status_line.split()[1])
+        response_headers = {}
+        while True:
+            line = await self.reader.readuntil(b'\r\n')
+            if line == b'\r\n':
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            response_headers[name.strip().lower()] = value.strip()
+
+        if response_headers.get('transfer-encoding', '').lower() == 'chunked':
+            content = b''
+            while True:
+                size = int((await self.reader.readuntil(b'\r\n')).split(b';')[0], 16)
+                if size == 0:
+                    await self.reader.readuntil(b'\r\n')
+                    break
+                content += await self.reader.readexactly(size)
+                await self.reader.readexactly(2)
+        else:
+            content = await self.reader.readexactly(int(response_headers.get('content-length', 0)))
+        if response_headers.get('connection', '').lower() == 'close':
+            await self.close()
+
+        try:
+            data = json.loads(content) if content else None
+        except ValueError:
+            data = None
+        return status, data
+
+
+class Stats:
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.statuses = defaultdict(Counter)
+        self.errors = Counter()
+
+    def record(self, label, status, elapsed_ms, error):
+        self.latencies[label].append(elapsed_ms)
+        self.statuses[label][status] += 1
+        if error:
+            self.errors[label] += 1
+
+
+class VirtualUser:
+    def __init__(self, command, username, role, rng):
+        self.command = command
+        self.username = username
+        self.role = role
+        self.rng = rng
+        self.connection = HTTPConnection(command.host, command.port)
+        self.token = None
+
+    async def call(self, label, method, path, body=None, expect=(200, 201)):
+        """Issue one request and record it under `label`; returns the decoded body or None"""
+        headers = {'Authorization': f'Bearer {self.token}'} if self.token else {}
+        started = time.perf_counter()
+        try:
+            status, data = await self.connection.request(method, path, body, headers)
+        except (OSError, asyncio.IncompleteReadError, ValueError):
+            status, data = 0, None
+        elapsed = (time.perf_counter() - started) * 1000
+        self.command.stats.record(label, status, elapsed, error=status not in expect)
+        return data if status in expect else None
+
+    async def run(self, deadline):
+        await self.login()
+        mix = LEARNER_MIX if self.role == 'learner' else MENTOR_MIX
+        actions, weights = list(mix), list(mix.values())
+        while time.monotonic() < deadline:
+            action = self.rng.choices(actions, weights=weights)[0]
+            await getattr(self, action)()
+            if self.command.think_time:
+                await asyncio.sleep(self.rng.expovariate(1 / self.command.think_time))
+        await self.connection.close()
+
+    async def login(self):
+        data = await self.call('POST /api/auth/token/', 'POST', '/api/auth/token/', {
+            'username': self.username, 'password': self.command.password,
+        })
+        if data:
+            self.token = data['access']
+
+    async def my_sessions(self, **params):
+        data = await self.call('GET /api/sessions/', 'GET', '/api/sessions/?' + urlencode(params))
+        return results(data)
+
+    async def browse(self):
+        params = self.rng.choice([
+            {},
+            {'search': self.rng.choice(self.command.skill_names)[:4]},
+            {'skill': self.rng.choice(self.command.skill_slugs), 'ordering': '-profile__rating_avg'},
+            {'available': 'true'},
+        ])
+        mentors = results(await self.call('GET /api/mentors/', 'GET', '/api/mentors/?' + urlencode(params)))
+        if mentors:
+            mentor = self.rng.choice(mentors)
+            await self.call('GET /api/mentors/{id}/', 'GET', f'/api/mentors/{mentor["id"]}/')
+        return mentors
+
+    async def request_session(self):
+        mentors = await self.browse()
+        if not mentors:
+            return
+        mentor = self.rng.choice(mentors)
+        data = await self.call('GET /api/mentors/{id}/slots/', 'GET', f'/api/mentors/{mentor["id"]}/slots/?limit=10')
+        if not data or not data['slots']:
+            return
+        skills = mentor.get('profile', {}).get('skills') or [{}]
+        # 400: another virtual user booked the slot first
+        await self.call('POST /api/sessions/', 'POST', '/api/sessions/', {
+            'mentor_id': mentor['id'],
+            'skill_id': self.rng.choice(skills).get('id'),
+            'duration_minutes': 30,
+            'description': 'Load test session',
+            'scheduled_time': self.rng.choice(data['slots'])['start'],
+        }, expect=(201, 400))
+
+    async def chat(self):
+        sessions = await self.my_sessions(status='accepted')
+        if not sessions:
+            return
+        session = self.rng.choice(sessions)
+        await self.call('GET /api/messages/', 'GET', f'/api/messages/?session={session["id"]}')
+        await self.call('POST /api/messages/', 'POST', '/api/messages/', {
+            'session_id': session['id'], 'text': self.rng.choice(CHAT_LINES),
+        })
+
+    async def rate(self):
+        sessions = [
+            session for session in await self.my_sessions(status='completed')
+            if session.get('rating') is None
+        ]
+        if not sessions:
+            return
+        # 400: another virtual user logged in as the same learner rated it first
+        await self.call('POST /api/ratings/', 'POST', '/api/ratings/', {
+            'session_id': self.rng.choice(sessions)['id'],
+            'score': self.rng.choices([3, 4, 5], weights=[2, 4, 5])[0],
+            'comment': 'Load test rating',
+        }, expect=(201, 400))
+
+    async def review_requests(self):
+        sessions = await self.my_sessions(status='requested')
+        if not sessions:
+            return
+        session = self.rng.choice(sessions)
+        action = 'accept' if self.rng.random() < 0.8 else 'cancel'
+        await self.call(
+            f'POST /api/sessions/{{id}}/{action}/', 'POST', f'/api/sessions/{session["id"]}/{action}/',
+            # 409: overlaps an accepted session; 400: another request got there first
+            expect=(200, 400, 409),
+        )
+
+    async def complete(self):
+        sessions = await self.my_sessions(status='accepted')
+        if sessions:
+            await self.call(
+                'POST /api/sessions/{id}/complete/', 'POST',
+                f'/api/sessions/{self.rng.choice(sessions)["id"]}/complete/',
+                expect=(200, 400),
+            )
+
+
+def results(data):
+    if isinstance(data, dict):
+        return data.get('results') or []
+    return data or []
+
+
+class Command(BaseCommand):
+    help = 'Drive a mixed learner/mentor scenario against a running server with concurrent virtual users'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='http://127.0.0.1:8000',
+                            help='Server to load (default: http://127.0.0.1:8000)')
+        parser.add_argument('--start-server', action='store_true',
+                            help='Start gunicorn -k gthread (as in render.yaml) on --url for the run')
+        parser.add_argument('--server-workers', type=int, default=2,
+                            help='gunicorn workers with --start-server (default: 2)')
+        parser.add_argument('--server-threads', type=int, default=4,
+                            help='gunicorn threads per worker with --start-server (default: 4)')
+        parser.add_argument('--users', type=int, default=50,
+                            help='Concurrent virtual users (default: 50)')
+        parser.add_argument('--mentor-share', type=float, default=0.3,
+                            help='Fraction of virtual users acting as mentors (default: 0.3)')
+        parser.add_argument('--duration', type=float, default=60,
+                            help='Seconds to run once every user has started (default: 60)')
+        parser.add_argument('--ramp-up', type=float, default=5,
+                            help='Seconds over which users start (default: 5)')
+        parser.add_argument('--think-time', type=float, default=0.5,
+                            help='Mean pause between actions per user, in seconds (default: 0.5)')
+        parser.add_argument('--password', default='password123',
+                            help='Password of the seeded accounts (default: password123)')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--json', dest='json_path',
+                            help='Also write the report as JSON to this file')
+
+    def handle(self, *args, **options):
+        parts = urlsplit(options['url'])
+        self.host, self.port = parts.hostname or '127.0.0.1', parts.port or 80
+        self.password = options['password']
+        self.think_time = max(0.0, options['think_time'])
+        self.stats = Stats()
+
+        # The server must use the same database: virtual users are its seeded accounts
+        mentors = list(Profile.objects.filter(is_mentor=True).values_list('user__username', flat=True))
+        learners = list(
+            Profile.objects.filter(is_mentor=False, user__is_staff=False).values_list('user__username', flat=True)
+        )
+        if not mentors or not learners:
+            raise CommandError('No mentors or learners found; run seed_demo first')
+        skills = list(Skill.objects.values_list('name', 'slug'))
+        self.skill_names = [name for name, _ in skills]
+        self.skill_slugs = [slug for _, slug in skills]
+
+        rng = random.Random(options['seed'])
+        users = []
+        for index in range(max(1, options['users'])):
+            role = 'mentor' if rng.random() < options['mentor_share'] else 'learner'
+            username = rng.choice(mentors if role == 'mentor' else learners)
+            users.append(VirtualUser(self, username, role, random.Random(rng.random())))
+
+        server = self.start_server(options) if options['start_server'] else None
+        try:
+            self.wait_for_server(timeout=30 if server else 2)
+            self.stdout.write(
+                f'Running {len(users)} virtual users against {options["url"]} for {options["duration"]:.0f}s...'
+            )
+            started = time.monotonic()
+            asyncio.run(self.run_users(users, options['ramp_up'], options['duration']))
+            elapsed = time.monotonic() - started
+        finally:
+            if server is not None:
+                server.terminate()
+                server.wait(timeout=30)
+
+        report = self.build_report(elapsed)
+        self.print_report(report)
+        if options['json_path']:
+            Path(options['json_path']).write_text(json.dumps(report, indent=2) + '\n')
+
+    async def run_users(self, users, ramp_up, duration):
+        deadline = time.monotonic() + ramp_up + duration
+
+        async def start(index, user):
+            await asyncio.sleep(ramp_up * index / len(users))
+            await user.run(deadline)
+
+        await asyncio.gather(*(start(index, user) for index, user in enumerate(users)))
+
+    def start_server(self, options):
+        command = [
+            'gunicorn', 'skill_sync.wsgi:application',
+            '-w', str(options['server_workers']), '-k', 'gthread', '--threads', str(options['server_threads']),
+            '-b', f'{self.host}:{self.port}',
+        ]
+        log_path = Path(tempfile.gettempdir()) / 'loadtest-server.log'
+        self.stdout.write(f'Starting {" ".join(command)} (output in {log_path})')
+        with open(log_path, 'wb') as log:
+            return subprocess.Popen(command, cwd=settings.BASE_DIR, stdout=log, stderr=subprocess.STDOUT)
+
+    def wait_for_server(self, timeout):
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                with socket.create_connection((self.host, self.port), timeout=1):
+                    return
+            except OSError:
+                if time.monotonic() > deadline:
+                    raise CommandError(f'Nothing is listening on {self.host}:{self.port}')
+                time.sleep(0.2)
+
+    def build_report(self, elapsed):
+        endpoints = {}
+        for label in sorted(self.stats.latencies):
+            latencies = sorted(self.stats.latencies[label])
+            count = len(latencies)
+            histogram = [0] * (len(BUCKETS_MS) + 1)
+            for value in latencies:
+                histogram[next((i for i, bound in enumerate(BUCKETS_MS) if value <= bound), len(BUCKETS_MS))] += 1
+            endpoints[label] = {
+                'requests': count,
+                'throughput_rps': round(count / elapsed, 2),
+                'error_rate': round(self.stats.errors[label] / count, 4),
+                'statuses': {str(status): n for status, n in sorted(self.stats.statuses[label].items())},
+                'p50_ms': round(latencies[count // 2], 2),
+                'p90_ms': round(latencies[min(count - 1, int(count * 0.9))], 2),
+                'p99_ms': round(latencies[min(count - 1, int(count * 0.99))], 2),
+                'max_ms': round(latencies[-1], 2),
+                'histogram_ms': dict(zip([f'<={bound}' for bound in BUCKETS_MS] + [f'>{BUCKETS_MS[-1]}'], histogram)),
+            }
+        total = sum(endpoint['requests'] for endpoint in endpoints.values())
+        errors = sum(self.stats.errors.values())
+        return {
+            'duration_s': round(elapsed, 2),
+            'requests': total,
+            'throughput_rps': round(total / elapsed, 2) if elapsed else 0,
+            'error_rate': round(errors / total, 4) if total else 0,
+            'endpoints': endpoints,
+        }
+
+    def print_report(self, report):
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f'\n{report["requests"]} requests in {report["duration_s"]}s: '
+            f'{report["throughput_rps"]} req/s, error rate {report["error_rate"]:.2%}'
+        ))
+        for label, endpoint in report['endpoints'].items():
+            self.stdout.write(
+                f'\n{label}\n  {endpoint["requests"]} requests, {endpoint["throughput_rps"]} req/s, '
+                f'errors {endpoint["error_rate"]:.2%}, statuses {endpoint["statuses"]}\n'
+                f'  p50 {endpoint["p50_ms"]} ms  p90 {endpoint["p90_ms"]} ms  '
+                f'p99 {endpoint["p99_ms"]} ms  max {endpoint["max_ms"]} ms'
+            )
+            peak = max(endpoint['histogram_ms'].values()) or 1
+            for bucket, count in endpoint['histogram_ms'].items():
+                if count:
+                    bar = '█' * max(1, round(30 * count / peak))
+                    self.stdout.write(f'  {bucket:>8} ms {bar} {count}')
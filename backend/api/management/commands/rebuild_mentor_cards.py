@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from api.mentor_cards import refresh_mentor_cards
+
+
+class Command(BaseCommand):
+    help = 'Rebuild every MentorCard row from profiles, skills and ratings'
+
+    def handle(self, *args, **options):
+        count = refresh_mentor_cards()
+        self.stdout.write(self.style.SUCCESS(f'✓ Rebuilt {count} mentor cards'))
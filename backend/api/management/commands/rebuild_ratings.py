@@ -0,0 +1,87 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import connections, transaction
+from django.db.models import Q, Sum, Count
+from api.models import Profile, Rating
+from api.authentication import invalidate_principals
+from api.recommendations import mark_changed
+from api.mentor_cards import schedule_refresh
+
+
+class Command(BaseCommand):
+    help = 'Recompute the rating aggregate of every profile that is or was rated from the ratings table'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size', type=int, default=1000,
+            help='Number of profiles recomputed per batch (default: 1000)'
+        )
+        parser.add_argument(
+            '--workers', type=int, default=1,
+            help='Number of batches processed in parallel (default: 1; keep at 1 on SQLite)'
+        )
+
+    def handle(self, *args, **options):
+        chunk_size = max(1, options['chunk_size'])
+        workers = max(1, options['workers'])
+
+        # Mentors, anyone rated as a session's mentor (is_mentor may have been
+        # turned off since) and stale aggregates with no ratings left behind them
+        user_ids = list(
+            Profile.objects.filter(
+                Q(is_mentor=True)
+                | Q(user_id__in=Rating.objects.values('session__mentor_id'))
+                | ~Q(rating_count=0)
+                | ~Q(rating_sum=0)
+            ).order_by('user_id').values_list('user_id', flat=True)
+        )
+        chunks = [user_ids[i:i + chunk_size] for i in range(0, len(user_ids), chunk_size)]
+        self.stdout.write(f'Rebuilding ratings for {len(user_ids)} profiles in {len(chunks)} batches...')
+
+        if workers == 1:
+            changed = sum(self.rebuild_chunk(chunk) for chunk in chunks)
+        else:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                changed = sum(executor.map(self.rebuild_chunk_in_thread, chunks))
+
+        self.stdout.write(self.style.SUCCESS(f'✓ Rebuilt ratings, {changed} profiles corrected'))
+
+    def rebuild_chunk_in_thread(self, user_ids):
+        """Run a batch on a worker thread and release its database connection"""
+        try:
+            return self.rebuild_chunk(user_ids)
+        finally:
+            connections.close_all()
+
+    def rebuild_chunk(self, user_ids):
+        """Recompute one batch of profiles with a single grouped aggregate query"""
+        totals = {
+            row['session__mentor_id']: (row['total'], row['count'])
+            for row in Rating.objects.filter(
+                session__mentor_id__in=user_ids,
+                session__status='completed',
+            ).values('session__mentor_id').annotate(total=Sum('score'), count=Count('id'))
+        }
+
+        with transaction.atomic():
+            profiles = list(
+                Profile.objects.select_for_update()
+                .filter(user_id__in=user_ids)
+                .only('id', 'user_id', 'rating_sum', 'rating_count', 'rating_avg')
+            )
+            stale = []
+            for profile in profiles:
+                total, count = totals.get(profile.user_id, (0, 0))
+                avg = total / count if count else 0.0
+                if (profile.rating_sum, profile.rating_count, profile.rating_avg) != (total, count, avg):
+                    profile.rating_sum, profile.rating_count, profile.rating_avg = total, count, avg
+                    stale.append(profile)
+            Profile.objects.bulk_update(stale, ['rating_sum', 'rating_count', 'rating_avg'])
+            # bulk_update sends no signals, so refresh the mentor cards (which also
+            # invalidates the directory cache) and the auth and recommendation caches here
+            if stale:
+                schedule_refresh(*(profile.user_id for profile in stale))
+                invalidate_principals(*(profile.user_id for profile in stale))
+                mark_changed(*(profile.user_id for profile in stale))
+        return len(stale)
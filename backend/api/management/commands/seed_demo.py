@@ -1,14 +1,319 @@
-from django.core.management.base import BaseCommand
+import multiprocessing
+import random
+import time
+from bisect import bisect_left, bisect_right
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import timedelta
+from itertools import accumulate
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.contrib.auth.hashers import make_password
 from django.contrib.auth.models import User
+from django.db import connections, transaction
+from django.db.models import F, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Least
 from django.utils import timezone
-from datetime import timedelta
-from api.models import Skill, Profile, Session, Rating, Message
+from django.utils.text import slugify
+from api.models import Skill, Profile, AvailabilityWindow, Session, Rating, Message, MentorCard
+from api.availability import normalize_availability
+
+SYNTHETIC_PREFIX = 'seed_'
+
+FIRST_NAMES = [
+    'Olivia', 'Liam', 'Emma', 'Noah', 'Amelia', 'Oliver', 'Ava', 'Elijah', 'Sophia', 'Mateo',
+    'Isabella', 'Lucas', 'Mia', 'Levi', 'Charlotte', 'Ezra', 'Harper', 'Asher', 'Priya', 'Wei',
+    'Fatima', 'Diego', 'Yuki', 'Kwame', 'Ingrid', 'Omar', 'Chloe', 'Ravi', 'Lena', 'Tomasz',
+]
+LAST_NAMES = [
+    'Smith', 'Garcia', 'Chen', 'Patel', 'Johnson', 'Kim', 'Nguyen', 'Müller', 'Rossi', 'Silva',
+    'Brown', 'Okafor', 'Kowalski', 'Tanaka', 'Hernandez', 'Ivanova', 'Ali', 'Martin', 'Dubois', 'Larsen',
+]
+EXTRA_SKILLS = [
+    'Go', 'Rust', 'Java', 'Kotlin', 'Swift', 'C++', 'C#', 'Ruby', 'Rails', 'PHP',
+    'Vue', 'Angular', 'Svelte', 'Next.js', 'GraphQL', 'Redis', 'MongoDB', 'MySQL', 'Kubernetes', 'Terraform',
+    'GCP', 'Azure', 'Linux', 'Machine Learning', 'Data Science', 'Pandas', 'NumPy', 'Spark', 'Kafka', 'CI/CD',
+    'Testing', 'Security', 'System Design', 'Algorithms', 'UX Design', 'Figma', 'iOS', 'Android', 'Flutter', 'SQL',
+]
+BIO_TEMPLATES = [
+    '{years} years as a {role}, happy to help with {skills}.',
+    '{role} at a {company}. I mentor on {skills}.',
+    'Self-taught {role} with {years} years of experience in {skills}.',
+    'Former {role}, now teaching {skills} to career switchers.',
+]
+ROLES = ['backend engineer', 'frontend developer', 'full-stack developer', 'data engineer', 'SRE', 'tech lead']
+COMPANIES = ['startup', 'bank', 'game studio', 'consultancy', 'hospital', 'university', 'retailer']
+SESSION_TOPICS = [
+    'Code review of my {skill} project', 'Getting started with {skill}', 'Interview prep: {skill}',
+    'Debugging a {skill} issue', 'Best practices for {skill}', 'Career advice around {skill}',
+]
+MESSAGE_LINES = [
+    'Hi! Looking forward to our session.', 'Could you share the repository link?',
+    'I pushed the latest changes.', 'Thanks, that was really helpful!', 'Can we move it by 15 minutes?',
+    'Here is the error I mentioned.', 'Sure, see you then.', 'I added some notes to the doc.',
+]
+RATING_COMMENTS = ['', '', 'Great session!', 'Very clear explanations.', 'Helpful, thanks.', 'A bit rushed.']
+
+# Statuses that hold the mentor's time; they must not overlap (see Session.conflicting)
+BOOKED_STATUSES = ('accepted', 'completed')
+
+# Skewed (Zipf-like) popularity: mentor demand, learner activity, skill popularity
+MENTOR_SKEW = 1.1
+LEARNER_SKEW = 0.8
+SKILL_SKEW = 1.0
+
+# Worker process state, filled by _init_worker
+_state = {}
+
+
+def zipf_weights(count, exponent):
+    return [rank ** -exponent for rank in range(1, count + 1)]
+
+
+def zipf_cum_weights(count, exponent):
+    return list(accumulate(zipf_weights(count, exponent)))
+
+
+def pick(rng, population, cum_weights):
+    return population[bisect_left(cum_weights, rng.random() * cum_weights[-1])]
+
+
+def _init_worker(state):
+    """Runs once per worker process (and in-process when --workers is 1)"""
+    _state.clear()
+    _state.update(state)
+
+
+def create_people(kind, start, stop, seed):
+    """Create users `start`..`stop` of one kind with their profiles, windows and skills"""
+    rng = random.Random(seed)
+    is_mentor = kind == 'mentor'
+    skill_ids, skill_cum, skill_names = _state['skill_ids'], _state['skill_cum'], _state['skill_names']
+
+    users = []
+    for i in range(start, stop):
+        first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        username = f'{SYNTHETIC_PREFIX}{kind}_{i}'
+        users.append(User(
+            username=username,
+            email=f'{username}@example.com',
+            first_name=first,
+            last_name=last,
+            password=_state['password'],
+        ))
+
+    with transaction.atomic():
+        User.objects.bulk_create(users)
+        if users and users[0].pk is None:
+            # Backends that cannot return ids from a bulk insert
+            ids = dict(
+                User.objects.filter(username__in=[user.username for user in users]).values_list('username', 'id')
+            )
+            for user in users:
+                user.pk = ids[user.username]
+
+        profiles, profile_skills = [], []
+        for user in users:
+            skills, bio, availability = [], '', []
+            if is_mentor:
+                skills = sorted({pick(rng, skill_ids, skill_cum) for _ in range(rng.randint(1, 5))})
+                bio = rng.choice(BIO_TEMPLATES).format(
+                    years=rng.randint(2, 20),
+                    role=rng.choice(ROLES),
+                    company=rng.choice(COMPANIES),
+                    skills=', '.join(skill_names[skill_id] for skill_id in skills[:3]),
+                )
+                for day in sorted(rng.sample(range(7), rng.randint(1, 4))):
+                    start_hour = rng.randint(7, 14)
+                    end_hour = min(22, start_hour + rng.randint(2, 8))
+                    availability.append({'day': day, 'start': f'{start_hour:02d}:00', 'end': f'{end_hour:02d}:00'})
+            document = [user.username, user.first_name, user.last_name, bio]
+            document += sorted(skill_names[skill_id] for skill_id in skills)
+            profiles.append(Profile(
+                user_id=user.pk,
+                is_mentor=is_mentor,
+                bio=bio,
+                availability=availability,
+                search_document=' '.join(part for part in document if part),
+            ))
+            profile_skills.append(skills)
+
+        Profile.objects.bulk_create(profiles)
+        if profiles and profiles[0].pk is None:
+            ids = dict(Profile.objects.filter(user_id__in=[user.pk for user in users]).values_list('user_id', 'id'))
+            for profile in profiles:
+                profile.pk = ids[profile.user_id]
+
+        AvailabilityWindow.objects.bulk_create([
+            AvailabilityWindow(profile_id=profile.pk, day=day, start_minute=start_minute, end_minute=end_minute)
+            for profile in profiles
+            for day, start_minute, end_minute in normalize_availability(profile.availability, strict=False)
+        ])
+        Profile.skills.through.objects.bulk_create([
+            Profile.skills.through(profile_id=profile.pk, skill_id=skill_id)
+            for profile, skills in zip(profiles, profile_skills)
+            for skill_id in skills
+        ])
+    return len(users)
+
+
+class MentorCalendar:
+    """Booked (accepted or completed) intervals of a set of mentors"""
+
+    def __init__(self, mentor_ids):
+        self.starts, self.ends = {}, {}
+        booked = Session.objects.filter(
+            mentor_id__in=mentor_ids, status__in=BOOKED_STATUSES, scheduled_time__isnull=False,
+        ).order_by('scheduled_time').values_list('mentor_id', 'scheduled_time', 'end_time')
+        for mentor_id, start, end in booked.iterator():
+            self.starts.setdefault(mentor_id, []).append(start)
+            self.ends.setdefault(mentor_id, []).append(end)
+
+    def book(self, mentor_id, start, end):
+        """Book [start, end) unless it overlaps a booked interval; returns whether it was booked"""
+        starts = self.starts.setdefault(mentor_id, [])
+        ends = self.ends.setdefault(mentor_id, [])
+        # Booked intervals never overlap, so both lists are sorted
+        index = bisect_right(starts, start)
+        if (index and ends[index - 1] > start) or (index < len(starts) and starts[index] < end):
+            return False
+        starts.insert(index, start)
+        ends.insert(index, end)
+        return True
+
+
+def create_sessions(count, seed, messages_per_session, partition=0, partitions=1):
+    """
+    Create `count` sessions with ratings and messages; returns (sessions, ratings, messages).
+
+    Mentors are split into `partitions` disjoint groups and this call books
+    only mentors of group `partition`, so parallel calls never book the same
+    mentor and each can enforce the no-overlap rule on its own. Rows are
+    inserted in batches of --chunk-size.
+    """
+    rng = random.Random(seed)
+    mentors = _state['mentor_ids'][partition::partitions]
+    mentor_cum = list(accumulate(_state['mentor_weights'][partition::partitions]))
+    learners, learner_cum = _state['learner_ids'], _state['learner_cum']
+    mentor_skills, skill_names = _state['mentor_skills'], _state['skill_names']
+    durations = [value for value, _ in Session.DURATION_CHOICES]
+    now = timezone.now().replace(second=0, microsecond=0)
+
+    calendar = MentorCalendar(mentors)
+    totals = [0, 0, 0]
+    for batch_start in range(0, count, _state['chunk_size']):
+        sessions = []
+        for _ in range(min(_state['chunk_size'], count - batch_start)):
+            mentor_id = pick(rng, mentors, mentor_cum)
+            requester_id = pick(rng, learners, learner_cum)
+            if requester_id == mentor_id:
+                continue
+            # A year of history and two months of bookings ahead, on quarter hours
+            scheduled_time = now + timedelta(minutes=15 * rng.randint(-365 * 96, 60 * 96))
+            if scheduled_time < now:
+                status = rng.choices(['completed', 'cancelled', 'accepted', 'requested'], weights=[80, 15, 3, 2])[0]
+            else:
+                status = rng.choices(['requested', 'accepted', 'cancelled'], weights=[45, 45, 10])[0]
+            skills = mentor_skills.get(mentor_id, ())
+            skill_id = rng.choice(skills) if skills else None
+            duration = rng.choices(durations, weights=[10, 45, 15, 30])[0]
+            end_time = Session.compute_end_time(scheduled_time, duration)
+            if status in BOOKED_STATUSES and not calendar.book(mentor_id, scheduled_time, end_time):
+                # The mentor is already booked then: the request was turned down
+                status = 'cancelled'
+            # Message.save() bumps chat_version once per message
+            message_count = 0
+            if messages_per_session and status in BOOKED_STATUSES:
+                message_count = round(rng.expovariate(1 / messages_per_session))
+            sessions.append(Session(
+                requester_id=requester_id,
+                mentor_id=mentor_id,
+                skill_id=skill_id,
+                duration_minutes=duration,
+                description=rng.choice(SESSION_TOPICS).format(skill=skill_names.get(skill_id, 'programming')),
+                status=status,
+                scheduled_time=scheduled_time,
+                # bulk_create skips Session.save(), which normally derives end_time
+                end_time=end_time,
+                meeting_url=(
+                    f'https://meet.example.com/{rng.getrandbits(48):012x}' if status in BOOKED_STATUSES else ''
+                ),
+                chat_version=message_count,
+            ))
+        for index, created in enumerate(insert_sessions(sessions, rng, now)):
+            totals[index] += created
+    return tuple(totals)
+
+
+def insert_sessions(sessions, rng, now):
+    """Insert one batch of sessions with their ratings and messages"""
+    with transaction.atomic():
+        Session.objects.bulk_create(sessions)
+        if not sessions or sessions[0].pk is None:
+            return len(sessions), 0, 0
+        ids = [session.pk for session in sessions]
+        # created_at is auto_now_add: backdate it to a few days before the booking
+        Session.objects.filter(pk__gte=min(ids), pk__lte=max(ids)).update(
+            created_at=Least(F('scheduled_time') - timedelta(days=3), Value(now)),
+        )
+
+        ratings = [
+            Rating(
+                session_id=session.pk,
+                rater_id=session.requester_id,
+                score=rng.choices([1, 2, 3, 4, 5], weights=[3, 5, 12, 35, 45])[0],
+                comment=rng.choice(RATING_COMMENTS),
+            )
+            for session in sessions
+            if session.status == 'completed' and rng.random() < 0.7
+        ]
+        Rating.objects.bulk_create(ratings)
+        if ratings:
+            Rating.objects.filter(session_id__gte=min(ids), session_id__lte=max(ids)).update(
+                created_at=Subquery(Session.objects.filter(pk=OuterRef('session_id')).values('end_time')[:1]),
+            )
+
+        messages = []
+        for session in sessions:
+            participants = (session.requester_id, session.mentor_id)
+            for n in range(session.chat_version):
+                messages.append(Message(
+                    session_id=session.pk,
+                    sender_id=participants[n % 2],
+                    text=rng.choice(MESSAGE_LINES),
+                ))
+        Message.objects.bulk_create(messages, batch_size=5000)
+    return len(sessions), len(ratings), len(messages)
 
 
 class Command(BaseCommand):
-    help = 'Seed the database with demo data'
+    help = 'Seed the database with demo data, optionally plus a large synthetic dataset'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--mentors', type=int, default=0,
+                            help='Synthetic mentors to create (default: 0)')
+        parser.add_argument('--learners', type=int, default=0,
+                            help='Synthetic learners to create (default: 0)')
+        parser.add_argument('--sessions', type=int, default=0,
+                            help='Synthetic sessions to create between mentors and learners (default: 0)')
+        parser.add_argument('--messages-per-session', type=float, default=0,
+                            help='Mean chat messages per accepted/completed session (default: 0)')
+        parser.add_argument('--chunk-size', type=int, default=5000,
+                            help='Rows per bulk insert and per work unit; sessions are split '
+                                 'into work units by mentor group instead (default: 5000)')
+        parser.add_argument('--workers', type=int, default=1,
+                            help='Parallel worker processes (default: 1; keep at 1 on SQLite)')
+        parser.add_argument('--seed', type=int, default=42,
+                            help='Random seed, for reproducible datasets (default: 42)')
+        parser.add_argument('--reset', action='store_true',
+                            help='Delete previously generated synthetic users (and their data) first')
+
+    def handle(self, *args, **options):
+        self.seed_demo_accounts()
+        if options['mentors'] or options['learners'] or options['sessions']:
+            self.seed_synthetic(options)
 
-    def handle(self, *args, **kwargs):
+    def seed_demo_accounts(self):
         self.stdout.write('Seeding database...')
         
         # Clear existing data (optional, comment out if you want to keep existing data)
@@ -118,6 +423,7 @@ class Command(BaseCommand):
                 {"day": 5, "start": "10:00", "end": "16:00"}
             ]
             user.profile.save()
+            user.profile.sync_availability_windows()
             
             # Add skills
             for skill_name in skill_names:
@@ -209,3 +515,160 @@ class Command(BaseCommand):
         self.stdout.write('  Admin: admin / admin123')
         self.stdout.write('  Learners: alice / password123, bob / password123')
         self.stdout.write('  Mentors: sarah_mentor / password123, mike_mentor / password123, etc.')
+
+    def seed_synthetic(self, options):
+        chunk_size = max(1, options['chunk_size'])
+        workers = max(1, options['workers'])
+        seed = options['seed']
+        synthetic = User.objects.filter(username__startswith=SYNTHETIC_PREFIX)
+        if options['reset']:
+            self.stdout.write('Removing previous synthetic data...')
+            self.delete_synthetic(synthetic)
+        elif (options['mentors'] or options['learners']) and synthetic.exists():
+            raise CommandError('Synthetic users already exist; pass --reset to regenerate them')
+        started = time.monotonic()
+
+        skills = self.ensure_skill_catalogue()
+        skill_ids = [skill.pk for skill in skills]
+        rng = random.Random(seed)
+        rng.shuffle(skill_ids)
+        state = {
+            'password': make_password('password123'),
+            'chunk_size': chunk_size,
+            'skill_ids': skill_ids,
+            'skill_cum': zipf_cum_weights(len(skill_ids), SKILL_SKEW),
+            'skill_names': {skill.pk: skill.name for skill in skills},
+        }
+
+        tasks = []
+        for kind in ('mentor', 'learner'):
+            total = options[f'{kind}s']
+            for start in range(0, total, chunk_size):
+                tasks.append((create_people, (kind, start, min(total, start + chunk_size), f'{seed}:{kind}:{start}')))
+        if tasks:
+            self.stdout.write(f'Creating {options["mentors"]} mentors and {options["learners"]} learners...')
+            self.run_tasks(tasks, state, workers)
+
+        if options['sessions']:
+            # Pools include the demo accounts; shuffled so popularity is not tied to id order
+            mentor_ids = list(Profile.objects.filter(is_mentor=True).values_list('user_id', flat=True))
+            learner_ids = list(
+                Profile.objects.filter(is_mentor=False, user__is_staff=False).values_list('user_id', flat=True)
+            )
+            if not mentor_ids or not learner_ids:
+                raise CommandError('Sessions need at least one mentor and one learner')
+            rng.shuffle(mentor_ids)
+            rng.shuffle(learner_ids)
+            mentor_skills = {}
+            for user_id, skill_id in Profile.skills.through.objects.filter(
+                profile__is_mentor=True
+            ).values_list('profile__user_id', 'skill_id'):
+                mentor_skills.setdefault(user_id, []).append(skill_id)
+            state.update({
+                'mentor_ids': mentor_ids,
+                'mentor_weights': zipf_weights(len(mentor_ids), MENTOR_SKEW),
+                'learner_ids': learner_ids,
+                'learner_cum': zipf_cum_weights(len(learner_ids), LEARNER_SKEW),
+                'mentor_skills': mentor_skills,
+            })
+            # One work unit per disjoint group of mentors (see create_sessions),
+            # each creating its share of the sessions by popularity
+            total = options['sessions']
+            partitions = min(len(mentor_ids), -(-total // chunk_size))
+            weights = [sum(state['mentor_weights'][partition::partitions]) for partition in range(partitions)]
+            bounds = [round(total * share / sum(weights)) for share in accumulate(weights)]
+            tasks = [
+                (create_sessions, (
+                    bounds[partition] - (bounds[partition - 1] if partition else 0),
+                    f'{seed}:sessions:{partition}',
+                    options['messages_per_session'],
+                    partition,
+                    partitions,
+                ))
+                for partition in range(partitions)
+            ]
+            self.stdout.write(f'Creating {options["sessions"]} sessions...')
+            self.run_tasks(tasks, state, workers)
+
+        self.rebuild_derived_data()
+        self.stdout.write(self.style.SUCCESS(
+            f'✓ Synthetic data created in {time.monotonic() - started:.1f}s '
+            f'(synthetic users log in with password123)'
+        ))
+
+    def delete_synthetic(self, users):
+        """
+        Delete synthetic users and everything hanging off them with one DELETE
+        per table. A cascading QuerySet.delete() would load every row to send
+        its delete signals; the derived data those signals maintain is rebuilt
+        afterwards by rebuild_derived_data().
+        """
+        user_ids = users.values('pk')
+        sessions = Session.objects.filter(Q(requester__in=user_ids) | Q(mentor__in=user_ids))
+        with transaction.atomic():
+            for queryset in [
+                Message.objects.filter(Q(session__in=sessions.values('pk')) | Q(sender__in=user_ids)),
+                Rating.objects.filter(Q(session__in=sessions.values('pk')) | Q(rater__in=user_ids)),
+                sessions,
+                AvailabilityWindow.objects.filter(profile__user__in=user_ids),
+                Profile.skills.through.objects.filter(profile__user__in=user_ids),
+                MentorCard.objects.filter(user__in=user_ids),
+                Profile.objects.filter(user__in=user_ids),
+            ]:
+                queryset._raw_delete(queryset.db)
+            # Anything else referencing the users is few rows; let the ORM cascade it
+            users.delete()
+
+    def ensure_skill_catalogue(self):
+        Skill.objects.bulk_create([
+            Skill(name=name, slug=slugify(name.replace('+', 'p').replace('#', 'sharp')))
+            for name in EXTRA_SKILLS
+        ], ignore_conflicts=True)
+        return list(Skill.objects.order_by('id'))
+
+    def run_tasks(self, tasks, state, workers):
+        """Run (function, args) tasks in-process or on a process pool, reporting progress"""
+        done = 0
+        if workers == 1:
+            _init_worker(state)
+            for function, args in tasks:
+                function(*args)
+                done += 1
+                self.report_progress(done, len(tasks))
+            return
+        # Forked children open their own connections; never share the parent's
+        connections.close_all()
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context('fork'),
+            initializer=_init_worker,
+            initargs=(state,),
+        ) as executor:
+            futures = [executor.submit(function, *args) for function, args in tasks]
+            for future in as_completed(futures):
+                future.result()
+                done += 1
+                self.report_progress(done, len(tasks))
+
+    def report_progress(self, done, total):
+        if done == total or done % max(1, total // 20) == 0:
+            self.stdout.write(f'  {done}/{total} batches')
+
+    def rebuild_derived_data(self):
+        """Bulk inserts send no signals: rebuild what the receivers normally maintain"""
+        from api import autocomplete
+        from api.caching import bump
+        from api.mentor_cards import refresh_mentor_cards
+        from api.recommendations import ALL_MENTORS, mark_changed
+
+        self.stdout.write('Rebuilding rating aggregates, mentor cards and indexes...')
+        # Also refreshes the cards of every mentor whose aggregate changed
+        call_command('rebuild_ratings', stdout=self.stdout)
+        missing = list(Profile.objects.filter(is_mentor=True).exclude(
+            user_id__in=MentorCard.objects.values('user_id')
+        ).values_list('user_id', flat=True))
+        for start in range(0, len(missing), 5000):
+            refresh_mentor_cards(missing[start:start + 5000])
+        autocomplete.index.rebuild()
+        mark_changed(ALL_MENTORS)
+        bump('skills', 'mentor-list')
@@ -0,0 +1,156 @@
+"""
+Maintenance of the MentorCard read model.
+
+The mentor directory is served from MentorCard rows, so rendering a page is a
+single query. Writes that change what a card shows (profile, user names and
+ratings through api.signals; skill links and skills below) queue the mentor
+for a refresh; queued mentors are re-rendered once after the transaction
+commits, and the directory response cache is bumped only after the new
+cards are written.
+
+    python manage.py rebuild_mentor_cards   # full rebuild / repair
+"""
+import threading
+
+from django.contrib.auth.models import User
+from django.db import connections, transaction
+from django.db.models.signals import post_save, post_delete, pre_delete, m2m_changed, post_migrate
+from django.dispatch import receiver
+from rest_framework import filters
+
+from .availability import normalize_availability
+from .caching import bump
+from .models import MentorCard, Profile, Skill
+
+_pending = threading.local()
+
+
+def build_cards(user_ids=None):
+    """Render MentorCard instances for the given mentors (all when None) in three queries"""
+    from .serializers import MentorListSerializer
+
+    mentors = User.objects.filter(profile__is_mentor=True).select_related('profile').prefetch_related(
+        'profile__skills'
+    )
+    if user_ids is not None:
+        mentors = mentors.filter(pk__in=user_ids)
+
+    cards = []
+    for user in mentors:
+        profile = user.profile
+        skills = sorted(profile.skills.all(), key=lambda skill: skill.name)
+        windows = normalize_availability(profile.availability, strict=False)
+        cards.append(MentorCard(
+            user=user,
+            profile=profile,
+            username=user.username,
+            rating_avg=profile.rating_avg,
+            rating_count=profile.rating_count,
+            skill_names=' '.join(skill.name for skill in skills),
+            skill_slugs=' '.join(skill.slug for skill in skills),
+            available_days=sum({1 << day for day, _, _ in windows}),
+            weekly_available_minutes=sum(end - start for _, start, end in windows),
+            document=MentorListSerializer(user).data,
+        ))
+    return cards
+
+
+def refresh_mentor_cards(user_ids=None):
+    """Upsert cards for current mentors and drop cards of everyone else in `user_ids`"""
+    cards = build_cards(user_ids)
+    with transaction.atomic():
+        if user_ids is None:
+            MentorCard.objects.exclude(user__profile__is_mentor=True).delete()
+        else:
+            MentorCard.objects.filter(user_id__in=set(user_ids) - {card.user_id for card in cards}).delete()
+        MentorCard.objects.bulk_create(
+            cards,
+            batch_size=500,
+            update_conflicts=True,
+            unique_fields=['user'],
+            update_fields=[
+                'profile', 'username', 'rating_avg', 'rating_count', 'skill_names', 'skill_slugs',
+                'available_days', 'weekly_available_minutes', 'document',
+            ],
+        )
+    # Bump after the cards are written, so the response cache cannot re-store old cards
+    if user_ids is None:
+        bump('mentor-list')
+    else:
+        bump('mentor-list', *(f'mentor:{user_id}' for user_id in user_ids))
+    return len(cards)
+
+
+def _flush():
+    user_ids = getattr(_pending, 'user_ids', None)
+    _pending.user_ids = set()
+    if user_ids:
+        refresh_mentor_cards(user_ids)
+
+
+def schedule_refresh(*user_ids):
+    """Refresh these mentors' cards once, after the current transaction commits"""
+    pending = getattr(_pending, 'user_ids', None)
+    if pending is None:
+        pending = _pending.user_ids = set()
+    pending.update(user_ids)
+    # Every call registers a flush: the first one after commit does the work
+    # and the rest find nothing pending (a rolled-back flush is simply dropped)
+    transaction.on_commit(_flush)
+
+
+class MentorCardOrderingFilter(filters.OrderingFilter):
+    """OrderingFilter accepting the original ?ordering= names for card columns"""
+    aliases = {'profile__rating_avg': 'rating_avg'}
+
+    def get_ordering(self, request, queryset, view):
+        ordering = super().get_ordering(request, queryset, view)
+        if not ordering:
+            return ordering
+        return [
+            ('-' if term.startswith('-') else '') + self.aliases.get(term.lstrip('-'), term.lstrip('-'))
+            for term in ordering
+        ]
+
+
+@receiver(post_migrate)
+def backfill_mentor_cards(sender, using, **kwargs):
+    """Populate the cards on first migrate; later changes arrive through signals"""
+    if sender.label != 'api' or MentorCard._meta.db_table not in connections[using].introspection.table_names():
+        return
+    if MentorCard.objects.using(using).exists():
+        return
+    if Profile.objects.using(using).filter(is_mentor=True).exists():
+        refresh_mentor_cards()
+
+
+@receiver(m2m_changed, sender=Profile.skills.through)
+def refresh_skill_link_cards(sender, instance, action, reverse, pk_set, **kwargs):
+    if action == 'pre_clear' and reverse:
+        instance._card_user_ids = list(instance.profiles.values_list('user_id', flat=True))
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        if instance.is_mentor:
+            schedule_refresh(instance.user_id)
+    elif action == 'post_clear':
+        schedule_refresh(*getattr(instance, '_card_user_ids', ()))
+    else:
+        schedule_refresh(*Profile.objects.filter(pk__in=pk_set, is_mentor=True).values_list('user_id', flat=True))
+
+
+@receiver(post_save, sender=Skill)
+def refresh_skill_cards(sender, instance, created, **kwargs):
+    if not created:
+        schedule_refresh(*instance.profiles.filter(is_mentor=True).values_list('user_id', flat=True))
+
+
+@receiver(pre_delete, sender=Skill)
+def remember_skill_cards(sender, instance, **kwargs):
+    # The link rows are deleted without m2m signals
+    instance._card_user_ids = list(instance.profiles.filter(is_mentor=True).values_list('user_id', flat=True))
+
+
+@receiver(post_delete, sender=Skill)
+def refresh_deleted_skill_cards(sender, instance, **kwargs):
+    schedule_refresh(*getattr(instance, '_card_user_ids', ()))
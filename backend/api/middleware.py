@@ -0,0 +1,296 @@
+import hashlib
+import json
+import logging
+import math
+import random
+import time
+from datetime import timedelta
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.http import HttpResponse, JsonResponse
+from django.utils import timezone
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from . import instrumentation, replicas
+from .models import IdempotencyRecord
+
+logger = logging.getLogger('api.requests')
+
+
+class IdempotencyMiddleware:
+    """
+    Makes any POST safe to retry when the client sends X-Idempotency-Key.
+
+    The first request reserves the key, runs normally, and a successful (2xx)
+    response is stored with its body and REPLAYED_HEADERS. A retry within the
+    TTL is answered from that row with a single unique-index lookup, without
+    running the view or the serializers again. Keys are scoped to the caller
+    and the path. A key reused with a different body gets 422.
+
+    The reservation is a lease of PENDING_LEASE_SECONDS: a retry that races
+    the original request gets 409, but once the lease lapses (the worker was
+    killed or timed out) the retry takes the key over and runs the request.
+    """
+    header = 'HTTP_X_IDEMPOTENCY_KEY'
+    max_key_length = 255
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        config = getattr(settings, 'IDEMPOTENCY', {})
+        self.ttl = timedelta(seconds=config.get('TTL_SECONDS', 24 * 60 * 60))
+        self.lease = timedelta(seconds=config.get('PENDING_LEASE_SECONDS', 60))
+        self.excluded_paths = tuple(config.get('EXCLUDED_PATHS', ()))
+        self.replayed_headers = tuple(config.get('REPLAYED_HEADERS', ('Location',)))
+
+    def __call__(self, request):
+        key = request.META.get(self.header)
+        if request.method != 'POST' or not key or request.path.startswith(self.excluded_paths):
+            return self.get_response(request)
+        if len(key) > self.max_key_length:
+            return JsonResponse(
+                {'detail': f'X-Idempotency-Key must be at most {self.max_key_length} characters.'},
+                status=400
+            )
+
+        key_hash = self.hash_key(request, key)
+        fingerprint = hashlib.sha256(request.body).hexdigest()
+
+        record = IdempotencyRecord.objects.filter(key_hash=key_hash).first()
+        now = timezone.now()
+        if record is not None and record.expires_at > now:
+            return self.replay(record, fingerprint, now)
+
+        reservation = self.reserve(key_hash, fingerprint, expired=record, now=now)
+        if reservation is None:
+            # Lost the race to a concurrent request with the same key
+            record = IdempotencyRecord.objects.filter(key_hash=key_hash).first()
+            if record is None:
+                return self.get_response(request)
+            return self.replay(record, fingerprint, now)
+
+        # Update and delete by primary key: if this request outlived its lease
+        # and a retry took the key over, the retry's row is left alone
+        try:
+            response = self.get_response(request)
+        except Exception:
+            IdempotencyRecord.objects.filter(pk=reservation.pk).delete()
+            raise
+
+        if 200 <= response.status_code < 300 and not response.streaming:
+            IdempotencyRecord.objects.filter(pk=reservation.pk).update(
+                status_code=response.status_code,
+                content_type=response.get('Content-Type', ''),
+                headers={name: response[name] for name in self.replayed_headers if response.has_header(name)},
+                body=response.content,
+                expires_at=timezone.now() + self.ttl,
+            )
+        else:
+            # Failed requests may be retried with the same key
+            IdempotencyRecord.objects.filter(pk=reservation.pk).delete()
+        return response
+
+    def hash_key(self, request, key):
+        return hashlib.sha256(
+            '\0'.join([self.caller(request), request.path, key]).encode('utf-8')
+        ).hexdigest()
+
+    def caller(self, request):
+        """User id from a valid bearer token (verified, no query), else the raw header"""
+        header = request.META.get(jwt_settings.AUTH_HEADER_NAME, '')
+        parts = header.split()
+        if len(parts) == 2 and parts[0] in jwt_settings.AUTH_HEADER_TYPES:
+            try:
+                return f'user:{AccessToken(parts[1])[jwt_settings.USER_ID_CLAIM]}'
+            except (TokenError, KeyError):
+                pass
+        return 'anonymous:' + hashlib.sha256(header.encode('utf-8')).hexdigest()
+
+    def reserve(self, key_hash, fingerprint, expired, now):
+        """The new pending record, or None when another request holds the key"""
+        try:
+            with transaction.atomic():
+                if expired is not None:
+                    # Only if still expired, so two takeovers cannot both succeed
+                    IdempotencyRecord.objects.filter(pk=expired.pk, expires_at__lte=now).delete()
+                return IdempotencyRecord.objects.create(
+                    key_hash=key_hash,
+                    fingerprint=fingerprint,
+                    expires_at=now + self.lease,
+                )
+        except IntegrityError:
+            return None
+
+    def replay(self, record, fingerprint, now):
+        if record.fingerprint != fingerprint:
+            return JsonResponse(
+                {'detail': 'X-Idempotency-Key was already used for a different request.'},
+                status=422
+            )
+        if record.status_code is None:
+            response = JsonResponse(
+                {'detail': 'A request with this X-Idempotency-Key is still being processed.'},
+                status=409
+            )
+            response['Retry-After'] = str(max(1, math.ceil((record.expires_at - now).total_seconds())))
+            return response
+        response = HttpResponse(
+            bytes(record.body),
+            status=record.status_code,
+            content_type=record.content_type or None,
+        )
+        for name, value in record.headers.items():
+            response[name] = value
+        response['Idempotent-Replayed'] = 'true'
+        return response
+
+
+class RequestMetricsMiddleware:
+    """
+    Reports per-request DB query count and time, view, serializer and render
+    time as a Server-Timing header and a JSON log line on the `api.requests`
+    logger.
+
+    Only a SAMPLE_RATE fraction of requests is measured in detail and logged
+    at DEBUG. Any request slower than SLOW_REQUEST_MS is logged at WARNING,
+    sampled or not, and every query slower than SLOW_QUERY_MS is logged with
+    its SQL.
+    Works as sync (WSGI) and async (ASGI) middleware; keep it first in
+    MIDDLEWARE so `total` covers the whole stack.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        config = instrumentation.get_config()
+        self.enabled = config.get('ENABLED', True)
+        self.sample_rate = config.get('SAMPLE_RATE', 0.01)
+        self.server_timing = config.get('SERVER_TIMING', True)
+        self.slow_request_seconds = config.get('SLOW_REQUEST_MS', 500) / 1000
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+        instrumentation.instrument_open_connections()
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        if not self.enabled:
+            return self.get_response(request)
+        if not self.sampled():
+            started = time.perf_counter()
+            response = self.get_response(request)
+            self.log_unsampled(request, response, time.perf_counter() - started)
+            return response
+        metrics, token = instrumentation.start()
+        try:
+            response = self.get_response(request)
+        finally:
+            instrumentation.stop(token)
+        return self.report(request, response, metrics)
+
+    async def __acall__(self, request):
+        if not self.enabled:
+            return await self.get_response(request)
+        if not self.sampled():
+            started = time.perf_counter()
+            response = await self.get_response(request)
+            self.log_unsampled(request, response, time.perf_counter() - started)
+            return response
+        metrics, token = instrumentation.start()
+        try:
+            response = await self.get_response(request)
+        finally:
+            instrumentation.stop(token)
+        return self.report(request, response, metrics)
+
+    def sampled(self):
+        return self.sample_rate >= 1 or random.random() < self.sample_rate
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        metrics = instrumentation.current()
+        if metrics is not None:
+            metrics.view_started = time.perf_counter()
+        return None
+
+    def process_template_response(self, request, response):
+        # DRF responses are rendered after the view returns: split view from render
+        metrics = instrumentation.current()
+        if metrics is not None:
+            metrics.view_finished = time.perf_counter()
+            response.add_post_render_callback(lambda rendered: self.mark_rendered(metrics))
+        return response
+
+    @staticmethod
+    def mark_rendered(metrics):
+        metrics.render_finished = time.perf_counter()
+
+    def report(self, request, response, metrics):
+        timings = metrics.timings(time.perf_counter())
+        if self.server_timing:
+            entries = []
+            for name, seconds in timings.items():
+                entry = f'{name};dur={seconds * 1000:.1f}'
+                if name == 'db':
+                    entry += f';desc="{metrics.query_count} queries"'
+                entries.append(entry)
+            response['Server-Timing'] = ', '.join(entries)
+
+        slow = timings['total'] >= self.slow_request_seconds
+        level = logging.WARNING if slow else logging.DEBUG
+        if logger.isEnabledFor(level):
+            logger.log(level, json.dumps({
+                'event': 'request',
+                'method': request.method,
+                'path': request.path,
+                'status': response.status_code,
+                'queries': metrics.query_count,
+                **{f'{name}_ms': round(seconds * 1000, 1) for name, seconds in timings.items()},
+                'slow': slow,
+            }))
+        for alias, seconds, sql in metrics.slow_queries:
+            logger.warning(json.dumps({
+                'event': 'slow_query',
+                'path': request.path,
+                'database': alias,
+                'duration_ms': round(seconds * 1000, 1),
+                'sql': sql,
+            }))
+        return response
+
+    def log_unsampled(self, request, response, seconds):
+        if seconds >= self.slow_request_seconds:
+            logger.warning(json.dumps({
+                'event': 'request',
+                'method': request.method,
+                'path': request.path,
+                'status': response.status_code,
+                'total_ms': round(seconds * 1000, 1),
+                'slow': True,
+                'sampled': False,
+            }))
+
+
+class ReplicaPinMiddleware:
+    """
+    Keeps a user's reads on the primary database for a few seconds after any
+    successful write of theirs, so replica lag never hides their own changes
+    (see api.replicas). Does nothing unless read replicas are configured.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if request.method in replicas.SAFE_METHODS or response.status_code >= 400 or not replicas.enabled():
+            return response
+        # DRF authenticates inside the view and sets the user on the Django request too
+        user = getattr(request, 'user', None)
+        if user is not None and user.is_authenticated:
+            replicas.pin(user.pk)
+        return response
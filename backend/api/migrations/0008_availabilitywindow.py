@@ -0,0 +1,43 @@
+# Generated by Django 5.0.1 on 2026-10-18 04:15
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+from api.availability import normalize_availability
+
+
+def backfill_windows(apps, schema_editor):
+    Profile = apps.get_model('api', 'Profile')
+    AvailabilityWindow = apps.get_model('api', 'AvailabilityWindow')
+    windows = []
+    for profile in Profile.objects.exclude(availability=[]).only('id', 'availability').iterator():
+        for day, start, end in normalize_availability(profile.availability, strict=False):
+            windows.append(AvailabilityWindow(
+                profile_id=profile.id, day=day, start_minute=start, end_minute=end
+            ))
+    AvailabilityWindow.objects.bulk_create(windows, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0007_remove_mentorzoomapp_user_delete_platformsettings_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AvailabilityWindow',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.PositiveSmallIntegerField()),
+                ('start_minute', models.PositiveSmallIntegerField()),
+                ('end_minute', models.PositiveSmallIntegerField()),
+                ('profile', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='availability_windows', to='api.profile')),
+            ],
+            options={
+                'ordering': ['day', 'start_minute'],
+                'indexes': [models.Index(fields=['day', 'start_minute', 'end_minute'], name='api_avail_day_range_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_windows, migrations.RunPython.noop),
+    ]
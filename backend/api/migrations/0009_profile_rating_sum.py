@@ -0,0 +1,32 @@
+# Generated by Django 5.0.1 on 2026-10-18 04:17
+
+from django.db import migrations, models
+from django.db.models import Sum
+
+
+def backfill_rating_sum(apps, schema_editor):
+    Profile = apps.get_model('api', 'Profile')
+    Rating = apps.get_model('api', 'Rating')
+    totals = (
+        Rating.objects.filter(session__status='completed')
+        .values('session__mentor_id')
+        .annotate(total=Sum('score'))
+    )
+    for row in totals:
+        Profile.objects.filter(user_id=row['session__mentor_id']).update(rating_sum=row['total'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0008_availabilitywindow'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profile',
+            name='rating_sum',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_rating_sum, migrations.RunPython.noop),
+    ]
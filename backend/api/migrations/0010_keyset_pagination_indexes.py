@@ -0,0 +1,27 @@
+# Generated by Django 5.0.1 on 2026-10-18 04:18
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0009_profile_rating_sum'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='message',
+            index=models.Index(fields=['session', 'timestamp', 'id'], name='api_message_session_ts_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='rating',
+            index=models.Index(fields=['-created_at', '-id'], name='api_rating_created_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='session',
+            index=models.Index(fields=['-created_at', '-id'], name='api_session_created_id_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.1 on 2026-10-18 04:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0010_keyset_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='session',
+            name='chat_version',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
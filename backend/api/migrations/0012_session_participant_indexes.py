@@ -0,0 +1,23 @@
+# Generated by Django 5.0.1 on 2026-10-18 04:22
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0011_session_chat_version'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='session',
+            index=models.Index(fields=['requester', 'status', 'created_at'], name='api_session_req_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='session',
+            index=models.Index(fields=['mentor', 'status', 'created_at'], name='api_session_mentor_status_idx'),
+        ),
+    ]
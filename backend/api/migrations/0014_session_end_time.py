@@ -0,0 +1,41 @@
+# Generated by Django 5.0.1 on 2026-10-18 04:31
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_end_time(apps, schema_editor):
+    Session = apps.get_model('api', 'Session')
+    batch = []
+    for session in Session.objects.filter(scheduled_time__isnull=False).only(
+        'id', 'scheduled_time', 'duration_minutes'
+    ).iterator(chunk_size=1000):
+        session.end_time = session.scheduled_time + timedelta(minutes=session.duration_minutes)
+        batch.append(session)
+        if len(batch) >= 1000:
+            Session.objects.bulk_update(batch, ['end_time'])
+            batch = []
+    Session.objects.bulk_update(batch, ['end_time'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0013_idempotencyrecord'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='session',
+            name='end_time',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(backfill_end_time, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='session',
+            index=models.Index(condition=models.Q(('status', 'accepted')), fields=['mentor', 'scheduled_time', 'end_time'], name='api_session_mentor_slot_idx'),
+        ),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 5.0.1 on 2026-10-18 04:37
+
+from django.db import migrations, models
+
+
+def backfill_search_document(apps, schema_editor):
+    Profile = apps.get_model('api', 'Profile')
+    documents = {
+        profile_id: [username, first_name, last_name, bio]
+        for profile_id, username, first_name, last_name, bio in Profile.objects.values_list(
+            'id', 'user__username', 'user__first_name', 'user__last_name', 'bio'
+        )
+    }
+    for profile_id, name in Profile.skills.through.objects.order_by('skill__name').values_list(
+        'profile_id', 'skill__name'
+    ):
+        documents[profile_id].append(name)
+    Profile.objects.bulk_update(
+        [
+            Profile(id=profile_id, search_document=' '.join(part for part in parts if part))
+            for profile_id, parts in documents.items()
+        ],
+        ['search_document'],
+        batch_size=500,
+    )
+
+
+def create_trigram_index(apps, schema_editor):
+    # Serves search_document__icontains (UPPER(...) LIKE UPPER(...)) on
+    # PostgreSQL; SQLite uses the FTS5 table installed by api.search instead
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    schema_editor.execute(
+        'CREATE INDEX IF NOT EXISTS api_profile_search_trgm_idx '
+        'ON api_profile USING gin (UPPER(search_document) gin_trgm_ops)'
+    )
+
+
+def drop_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute('DROP INDEX IF EXISTS api_profile_search_trgm_idx')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0014_session_end_time'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profile',
+            name='search_document',
+            field=models.TextField(blank=True, default='', editable=False),
+        ),
+        migrations.RunPython(backfill_search_document, migrations.RunPython.noop),
+        migrations.RunPython(create_trigram_index, drop_trigram_index),
+    ]
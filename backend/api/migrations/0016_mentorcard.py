@@ -0,0 +1,36 @@
+# Generated by Django 5.0.1 on 2026-10-18 04:39
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0015_profile_search_document'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MentorCard',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='mentor_card', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('username', models.CharField(max_length=150)),
+                ('rating_avg', models.FloatField(default=0.0)),
+                ('rating_count', models.IntegerField(default=0)),
+                ('skill_names', models.TextField(blank=True, default='')),
+                ('skill_slugs', models.TextField(blank=True, default='')),
+                ('available_days', models.PositiveSmallIntegerField(default=0)),
+                ('weekly_available_minutes', models.PositiveIntegerField(default=0)),
+                ('document', models.JSONField(default=dict)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('profile', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='mentor_card', to='api.profile')),
+            ],
+            options={
+                'ordering': ['-rating_avg'],
+                'indexes': [models.Index(fields=['-rating_avg', 'user'], name='api_mentorcard_rating_idx'), models.Index(fields=['username'], name='api_mentorcard_username_idx')],
+            },
+        ),
+    ]
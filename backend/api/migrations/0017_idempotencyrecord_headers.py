@@ -0,0 +1,18 @@
+# Generated by Django 5.0.1 on 2026-10-18 05:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0016_mentorcard'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='idempotencyrecord',
+            name='headers',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
@@ -0,0 +1,23 @@
+class QueryPlanMixin:
+    """
+    Applies the related-object loading plan a viewset declares.
+
+    Nested serializers walk relations (user -> profile, session -> rating ->
+    rater, profile -> skills); declaring them here keeps every list response
+    at a fixed number of queries, whatever the page size. `list_query_budget`
+    is that number (see api.testing.assert_list_query_budget).
+    """
+    select_related_fields = ()
+    prefetch_related_fields = ()
+    list_query_budget = None
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        return self.apply_query_plan(queryset)
+
+    def apply_query_plan(self, queryset):
+        if self.select_related_fields:
+            queryset = queryset.select_related(*self.select_related_fields)
+        if self.prefetch_related_fields:
+            queryset = queryset.prefetch_related(*self.prefetch_related_fields)
+        return queryset
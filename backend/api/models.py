@@ -1,8 +1,64 @@
-from django.db import models
+import copy
+from datetime import timedelta
+
+from django.db import models, transaction
 from django.contrib.auth.models import User
-from django.db.models.signals import post_save
+from django.db.models import F, Q, Case, When, Value, FloatField
+from django.db.models.functions import Cast
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 
+from .availability import normalize_availability
+
+
+class ChangeTrackingMixin:
+    """
+    Remembers the loaded values of `tracked_fields` so save handlers can tell
+    which of them actually changed. Unsaved instances report every tracked field.
+    """
+    tracked_fields = ()
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._snapshot_tracked_fields()
+        return instance
+    
+    def _snapshot_tracked_fields(self):
+        loaded = self.get_deferred_fields()
+        self._loaded_values = {
+            name: copy.deepcopy(getattr(self, name))
+            for name in self.tracked_fields if name not in loaded
+        }
+    
+    def changed_fields(self):
+        loaded_values = getattr(self, '_loaded_values', None)
+        if loaded_values is None:
+            return set(self.tracked_fields)
+        return {
+            name for name, value in loaded_values.items()
+            if getattr(self, name) != value
+        }
+    
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        self._snapshot_tracked_fields()
+    
+    def save_changed(self, extra_fields=()):
+        """Write only the changed tracked fields plus `extra_fields`; False if nothing was written"""
+        if self._state.adding:
+            self.save()
+            return True
+        update_fields = self.changed_fields() | set(extra_fields)
+        if not update_fields:
+            return False
+        # auto_now columns are only refreshed when listed in update_fields
+        update_fields |= {
+            field.name for field in self._meta.concrete_fields if getattr(field, 'auto_now', False)
+        }
+        self.save(update_fields=update_fields)
+        return True
+
 
 class Skill(models.Model):
     """Represents a skill that can be taught/learned"""
@@ -17,7 +73,7 @@ class Skill(models.Model):
         return self.name
 
 
-class Profile(models.Model):
+class Profile(ChangeTrackingMixin, models.Model):
     """Extended user profile for mentors and learners"""
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='profile')
     bio = models.TextField(blank=True, default='')
@@ -25,31 +81,95 @@ class Profile(models.Model):
     is_mentor = models.BooleanField(default=False)
     rating_avg = models.FloatField(default=0.0)
     rating_count = models.IntegerField(default=0)
+    # Running sum of rating scores, so rating_avg can be maintained in O(1)
+    rating_sum = models.IntegerField(default=0)
     
     # Store availability as JSON: [{"day": 1, "start": "09:00", "end": "17:00"}, ...]
     # day: 0=Monday, 6=Sunday
     availability = models.JSONField(default=list, blank=True)
     
+    # Username, names, bio and skill names for indexed search (see api.search)
+    search_document = models.TextField(blank=True, default='', editable=False)
+    
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    # Fields shown in the mentor directory
+    tracked_fields = ('bio', 'is_mentor', 'availability', 'rating_avg', 'rating_count')
+    
     def __str__(self):
         return f"{self.user.username}'s profile"
     
+    def directory_changes(self, created=False):
+        """Changed tracked fields, but only if this profile is, or just stopped being, a mentor"""
+        if created:
+            return set(self.tracked_fields) if self.is_mentor else set()
+        changed = self.changed_fields()
+        if self.is_mentor or 'is_mentor' in changed:
+            return changed
+        return set()
+    
     def update_rating(self):
-        """Recalculate average rating from all completed sessions"""
-        from django.db.models import Avg, Count
+        """Recalculate rating aggregates from all completed sessions (full repair path)"""
+        from django.db.models import Sum, Count
         mentor_sessions = self.user.mentor_sessions.filter(
             status='completed',
             rating__isnull=False
         )
         result = mentor_sessions.aggregate(
-            avg=Avg('rating__score'),
+            total=Sum('rating__score'),
             count=Count('rating')
         )
-        self.rating_avg = result['avg'] or 0.0
+        self.rating_sum = result['total'] or 0
         self.rating_count = result['count'] or 0
-        self.save()
+        self.rating_avg = self.rating_sum / self.rating_count if self.rating_count else 0.0
+        self.save(update_fields=['rating_sum', 'rating_count', 'rating_avg'])
+    
+    @classmethod
+    def apply_rating_delta(cls, user_id, score_delta, count_delta):
+        """Fold a rating change into a mentor's running aggregate with a single UPDATE"""
+        new_sum = F('rating_sum') + score_delta
+        new_count = F('rating_count') + count_delta
+        cls.objects.filter(user_id=user_id).update(
+            rating_sum=new_sum,
+            rating_count=new_count,
+            rating_avg=Case(
+                When(rating_count__lte=-count_delta, then=Value(0.0)),
+                default=Cast(new_sum, FloatField()) / new_count,
+                output_field=FloatField(),
+            ),
+        )
+    
+    def sync_availability_windows(self):
+        """Rebuild the indexed AvailabilityWindow rows from the availability JSON"""
+        windows = normalize_availability(self.availability, strict=False)
+        self.availability_windows.all().delete()
+        AvailabilityWindow.objects.bulk_create([
+            AvailabilityWindow(profile=self, day=day, start_minute=start, end_minute=end)
+            for day, start, end in windows
+        ])
+
+
+class AvailabilityWindow(models.Model):
+    """Normalized weekly availability window, derived from Profile.availability"""
+    profile = models.ForeignKey(
+        Profile,
+        on_delete=models.CASCADE,
+        related_name='availability_windows'
+    )
+    # day: 0=Monday, 6=Sunday; minutes are counted from midnight
+    day = models.PositiveSmallIntegerField()
+    start_minute = models.PositiveSmallIntegerField()
+    end_minute = models.PositiveSmallIntegerField()
+    
+    class Meta:
+        ordering = ['day', 'start_minute']
+        indexes = [
+            models.Index(fields=['day', 'start_minute', 'end_minute'], name='api_avail_day_range_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.profile.user.username}: day {self.day} {self.start_minute}-{self.end_minute}"
 
 
 @receiver(post_save, sender=User)
@@ -61,9 +181,10 @@ def create_user_profile(sender, instance, created, **kwargs):
 
 @receiver(post_save, sender=User)
 def save_user_profile(sender, instance, **kwargs):
-    """Save profile when user is saved"""
-    if hasattr(instance, 'profile'):
-        instance.profile.save()
+    """Save the user's loaded profile along with the user, if it has unsaved changes"""
+    # An unloaded profile has nothing to save; checking the cache avoids a query
+    if User.profile.related.is_cached(instance):
+        instance.profile.save_changed()
 
 
 class Session(models.Model):
@@ -104,17 +225,70 @@ class Session(models.Model):
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='requested')
     
     scheduled_time = models.DateTimeField(null=True, blank=True)
+    # scheduled_time + duration_minutes, kept in sync by save() for overlap checks
+    end_time = models.DateTimeField(null=True, blank=True, editable=False)
     meeting_url = models.URLField(blank=True, default='')
-    # Idempotency key to prevent duplicate creations from client retries/HMR
-    idempotency_key = models.CharField(max_length=64, blank=True, null=True, unique=True)
+    # Bumped on every chat message change; cheap ETag source for the message list
+    chat_version = models.PositiveIntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Keyset pagination key for /api/sessions/
+            models.Index(fields=['-created_at', '-id'], name='api_session_created_id_idx'),
+            # Per-participant scans for /api/sessions/ (one per UNION branch)
+            models.Index(fields=['requester', 'status', 'created_at'], name='api_session_req_status_idx'),
+            models.Index(fields=['mentor', 'status', 'created_at'], name='api_session_mentor_status_idx'),
+            # Interval index for double-booking checks (see conflicting())
+            models.Index(
+                fields=['mentor', 'scheduled_time', 'end_time'],
+                name='api_session_mentor_slot_idx',
+                condition=Q(status='accepted'),
+            ),
+        ]
     
     def __str__(self):
         return f"Session: {self.requester.username} → {self.mentor.username} ({self.status})"
+    
+    def save(self, *args, **kwargs):
+        self.end_time = self.compute_end_time(self.scheduled_time, self.duration_minutes)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'scheduled_time', 'duration_minutes'} & set(update_fields):
+            kwargs['update_fields'] = {*update_fields, 'end_time'}
+        super().save(*args, **kwargs)
+    
+    @staticmethod
+    def compute_end_time(scheduled_time, duration_minutes):
+        if scheduled_time is None or not duration_minutes:
+            return None
+        return scheduled_time + timedelta(minutes=duration_minutes)
+    
+    @classmethod
+    def conflicting(cls, mentor_id, start, end, exclude_pk=None):
+        """
+        Accepted sessions of `mentor_id` overlapping [start, end).
+        
+        No session is longer than the longest duration choice, so an overlapping
+        session must start within (start - longest, end). That bounds the
+        index range scan to the few sessions around the slot.
+        """
+        longest = timedelta(minutes=max(value for value, _ in cls.DURATION_CHOICES))
+        queryset = cls.objects.filter(
+            mentor_id=mentor_id,
+            status='accepted',
+            scheduled_time__gt=start - longest,
+            scheduled_time__lt=end,
+            end_time__gt=start,
+        )
+        if exclude_pk is not None:
+            queryset = queryset.exclude(pk=exclude_pk)
+        return queryset
+    
+    @classmethod
+    def bump_chat_version(cls, session_id):
+        cls.objects.filter(pk=session_id).update(chat_version=F('chat_version') + 1)
 
 
 class Rating(models.Model):
@@ -137,14 +311,57 @@ class Rating(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Keyset pagination key for /api/ratings/
+            models.Index(fields=['-created_at', '-id'], name='api_rating_created_id_idx'),
+        ]
     
     def __str__(self):
         return f"Rating {self.score}/5 for session {self.session.id}"
     
+    def rated_mentor_id(self):
+        """The mentor whose aggregate counts this rating, resolved once per session"""
+        cached = getattr(self, '_rated_mentor', None)
+        if cached is None or cached[0] != self.session_id:
+            if Rating.session.is_cached(self):
+                session = self.session
+                mentor_id = session.mentor_id if session.status == 'completed' else None
+            else:
+                mentor_id = rated_mentor_id(self.session_id)
+            cached = self._rated_mentor = (self.session_id, mentor_id)
+        return cached[1]
+    
     def save(self, *args, **kwargs):
-        super().save(*args, **kwargs)
-        # Update mentor's average rating
-        self.session.mentor.profile.update_rating()
+        with transaction.atomic():
+            previous_score = None
+            if not self._state.adding:
+                # Lock the row, so concurrent edits apply their deltas one after another
+                previous_score = Rating.objects.select_for_update().filter(pk=self.pk).values_list(
+                    'score', flat=True
+                ).first()
+            # Resolved before saving, so post_save receivers (api.signals) reuse it
+            mentor_id = self.rated_mentor_id()
+            super().save(*args, **kwargs)
+            # Update mentor's running rating aggregate in place
+            if mentor_id is None:
+                return
+            if previous_score is None:
+                Profile.apply_rating_delta(mentor_id, self.score, 1)
+            elif previous_score != self.score:
+                Profile.apply_rating_delta(mentor_id, self.score - previous_score, 0)
+
+
+def rated_mentor_id(session_id):
+    """The mentor whose aggregate counts a rating of this session (completed sessions only)"""
+    return Session.objects.filter(pk=session_id, status='completed').values_list('mentor_id', flat=True).first()
+
+
+@receiver(post_delete, sender=Rating)
+def remove_rating_from_profile(sender, instance, **kwargs):
+    """Take a deleted rating back out of the mentor's running aggregate"""
+    mentor_id = instance.rated_mentor_id()
+    if mentor_id:
+        Profile.apply_rating_delta(mentor_id, -instance.score, -1)
 
 
 class Message(models.Model):
@@ -164,6 +381,72 @@ class Message(models.Model):
     
     class Meta:
         ordering = ['timestamp']
+        indexes = [
+            # Keyset pagination key for a session's chat history
+            models.Index(fields=['session', 'timestamp', 'id'], name='api_message_session_ts_idx'),
+        ]
     
     def __str__(self):
         return f"Message from {self.sender.username} in session {self.session.id}"
+    
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            Session.bump_chat_version(self.session_id)
+
+
+@receiver(post_delete, sender=Message)
+def bump_chat_version_on_delete(sender, instance, **kwargs):
+    """Invalidate the chat ETag when a message is removed"""
+    Session.bump_chat_version(instance.session_id)
+
+
+class IdempotencyRecord(models.Model):
+    """Stored response for a POST carrying an X-Idempotency-Key header"""
+    # sha256 of (caller, path, client key); the client key itself is never stored
+    key_hash = models.CharField(max_length=64, unique=True)
+    # sha256 of the request body, to reject a key reused for a different request
+    fingerprint = models.CharField(max_length=64)
+    # Null while the original request is still being processed
+    status_code = models.PositiveSmallIntegerField(null=True, blank=True)
+    content_type = models.CharField(max_length=100, blank=True, default='')
+    # Other response headers replayed with the body (IDEMPOTENCY['REPLAYED_HEADERS'])
+    headers = models.JSONField(blank=True, default=dict)
+    body = models.BinaryField(blank=True, default=b'')
+    created_at = models.DateTimeField(auto_now_add=True)
+    # End of the pending lease while processing, then of the stored response
+    expires_at = models.DateTimeField(db_index=True)
+    
+    def __str__(self):
+        return f"Idempotency record {self.key_hash[:12]} ({self.status_code or 'pending'})"
+
+
+class MentorCard(models.Model):
+    """
+    Denormalized mentor directory row, maintained by api.mentor_cards.
+    `document` is the rendered MentorListSerializer output; the other
+    columns exist for filtering and sorting without joins.
+    """
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='mentor_card')
+    profile = models.OneToOneField(Profile, on_delete=models.CASCADE, related_name='mentor_card')
+    username = models.CharField(max_length=150)
+    rating_avg = models.FloatField(default=0.0)
+    rating_count = models.IntegerField(default=0)
+    # Space-separated, for single-column skill filters
+    skill_names = models.TextField(blank=True, default='')
+    skill_slugs = models.TextField(blank=True, default='')
+    # Bit n set when the mentor has a window on day n (0=Monday)
+    available_days = models.PositiveSmallIntegerField(default=0)
+    weekly_available_minutes = models.PositiveIntegerField(default=0)
+    document = models.JSONField(default=dict)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        ordering = ['-rating_avg']
+        indexes = [
+            models.Index(fields=['-rating_avg', 'user'], name='api_mentorcard_rating_idx'),
+            models.Index(fields=['username'], name='api_mentorcard_username_idx'),
+        ]
+    
+    def __str__(self):
+        return f"Mentor card for {self.username}"
@@ -0,0 +1,193 @@
+import base64
+import json
+from collections import OrderedDict
+
+from django.core.exceptions import EmptyResultSet
+from django.db import connections
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination keyed on a unique (timestamp, id) pair.
+
+    Each page is a single index range scan (no COUNT(*) and no OFFSET), so deep
+    pages cost the same as the first one. Older clients that send ?page= (or a
+    custom ?ordering=, which the key cannot follow) get PageNumberPagination.
+
+    Views whose filter is an OR across indexed columns can define
+    get_keyset_arms() returning one queryset per index. The page is then read
+    as a UNION ALL of per-arm index scans in one query (each branch wrapped in
+    a subquery on backends that cannot LIMIT inside UNION branches, e.g.
+    SQLite) and the full rows are loaded by primary key.
+    """
+    page_size = api_settings.PAGE_SIZE
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Invalid cursor'
+    # Leading '-' means newest first; both fields must be covered by an index
+    ordering = ('-created_at', '-id')
+    fallback_class = PageNumberPagination
+    fallback_query_params = ('page', 'ordering')
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.fallback = None
+        if any(param in request.query_params for param in self.fallback_query_params):
+            self.fallback = self.fallback_class()
+            return self.fallback.paginate_queryset(queryset, request, view)
+
+        self.fields = [field.lstrip('-') for field in self.ordering]
+        self.descending = self.ordering[0].startswith('-')
+        position, reverse = self.decode_cursor(request)
+
+        # Walking backwards means scanning the index in the opposite direction
+        scan_descending = self.descending != reverse
+        order = [('-' if scan_descending else '') + field for field in self.fields]
+        arms = self.get_arms(queryset, view)
+        if arms:
+            rows = self.union_rows(queryset, arms, order, position, scan_descending)
+        else:
+            queryset = queryset.order_by(*order)
+            if position is not None:
+                queryset = self.filter_after(queryset, position, scan_descending)
+            rows = list(queryset[:self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if reverse:
+            rows.reverse()
+
+        if reverse:
+            self.has_next = position is not None
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = position is not None
+        self.page = rows
+        return rows
+
+    def get_arms(self, queryset, view):
+        get_keyset_arms = getattr(view, 'get_keyset_arms', None)
+        if get_keyset_arms is None:
+            return None
+        return get_keyset_arms()
+
+    def union_rows(self, queryset, arms, order, position, descending):
+        """Read one page as UNION ALL of per-arm index scans, then load rows by pk"""
+        limit = self.page_size + 1
+        keys = []
+        for arm in arms:
+            arm = arm.order_by(*order)
+            if position is not None:
+                arm = self.filter_after(arm, position, descending)
+            keys.append(arm.values_list('pk', *self.fields)[:limit])
+        if connections[queryset.db].features.supports_slicing_ordering_in_compound:
+            combined = keys[0].union(*keys[1:], all=True).order_by(*order)[:limit]
+        else:
+            combined = self.union_subqueries(keys, queryset.db, descending, limit)
+        pks = [row[0] for row in combined]
+        objects = queryset.order_by().in_bulk(pks)
+        return [objects[pk] for pk in pks if pk in objects]
+
+    def union_subqueries(self, keys, using, descending, limit):
+        """
+        SELECT * FROM (<arm> LIMIT n) UNION ALL ... ORDER BY ... LIMIT n: the
+        same plan (one short index scan per arm) in a single query
+        """
+        sql, params = self.union_subqueries_sql(keys, using, descending, limit)
+        if sql is None:
+            return []
+        with connections[using].cursor() as cursor:
+            cursor.execute(sql, params)
+            return cursor.fetchall()
+
+    def union_subqueries_sql(self, keys, using, descending, limit):
+        """(sql, params) of union_subqueries(), or (None, []) when every arm is empty"""
+        parts, params = [], []
+        for key in keys:
+            try:
+                sql, key_params = key.query.get_compiler(using=using).as_sql()
+            except EmptyResultSet:
+                continue
+            parts.append(f'SELECT * FROM ({sql})')
+            params.extend(key_params)
+        if not parts:
+            return None, []
+        direction = 'DESC' if descending else 'ASC'
+        # Result columns are (pk, *self.fields)
+        order = ', '.join(f'{position} {direction}' for position in range(2, len(self.ordering) + 2))
+        return f'{" UNION ALL ".join(parts)} ORDER BY {order} LIMIT {int(limit)}', params
+
+    def filter_after(self, queryset, position, descending):
+        """Restrict to rows strictly past `position` in scan order"""
+        primary, secondary = self.fields
+        primary_value, secondary_value = position
+        cmp = 'lt' if descending else 'gt'
+        # The leading inclusive bound is what lets the database seek the index
+        return queryset.filter(**{f'{primary}__{cmp}e': primary_value}).filter(
+            Q(**{f'{primary}__{cmp}': primary_value}) | Q(**{f'{secondary}__{cmp}': secondary_value})
+        )
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')).decode('utf-8'))
+            primary, secondary = payload['p']
+            timestamp = parse_datetime(primary)
+            if timestamp is None:
+                raise ValueError(primary)
+            return (timestamp, int(secondary)), bool(payload.get('r'))
+        except (TypeError, ValueError, KeyError, UnicodeError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, obj, reverse):
+        primary, secondary = (getattr(obj, field) for field in self.fields)
+        payload = {'p': [primary.isoformat(), secondary]}
+        if reverse:
+            payload['r'] = 1
+        encoded = base64.urlsafe_b64encode(json.dumps(payload).encode('utf-8')).decode('ascii')
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, encoded)
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.request.build_absolute_uri(), self.cursor_query_param)
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def get_paginated_response(self, data):
+        if self.fallback is not None:
+            return self.fallback.get_paginated_response(data)
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+
+class MessageKeysetPagination(KeysetPagination):
+    """Chat history is read oldest first"""
+    ordering = ('timestamp', 'id')
@@ -0,0 +1,231 @@
+"""
+Real-time fan-out of chat messages to Server-Sent Event streams.
+
+Every process keeps a MessageHub mapping session ids to the asyncio queues of
+the SSE streams it is serving. New Message rows are serialized once, handed to
+the configured broker on commit, and the broker delivers them to the hub of
+every process that may hold subscribers:
+
+- 'local': same-process delivery only (runserver, a single ASGI worker)
+- 'unix':  datagrams over Unix sockets in REALTIME['SOCKET_DIR'], a stand-in
+           for Redis pub/sub that fans out to every worker on the host
+
+Browsers' EventSource cannot send an Authorization header, so a stream is
+opened with a short-lived signed ticket (issue_stream_token) in ?token=.
+
+A message whose JSON exceeds REALTIME['MAX_EVENT_BYTES'] is sent as a
+'message-ref' event carrying only its id and session, so every event fits
+in one datagram; clients fetch the body from /api/messages/<id>/?session=<id>.
+"""
+import asyncio
+import json
+import logging
+import os
+import socket
+import threading
+import uuid
+from collections import defaultdict
+
+from django.conf import settings
+from django.core import signing
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from .models import Message
+
+logger = logging.getLogger(__name__)
+
+
+class MessageHub:
+    """In-process registry of stream subscribers, keyed by session id"""
+
+    def __init__(self, queue_size=100):
+        self.queue_size = queue_size
+        self._subscribers = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def subscribe(self, session_id):
+        """Register a queue for the calling event loop; pair with unsubscribe()"""
+        subscriber = (asyncio.get_running_loop(), asyncio.Queue(maxsize=self.queue_size))
+        with self._lock:
+            self._subscribers[session_id].add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, session_id, subscriber):
+        with self._lock:
+            subscribers = self._subscribers.get(session_id)
+            if subscribers is not None:
+                subscribers.discard(subscriber)
+                if not subscribers:
+                    del self._subscribers[session_id]
+
+    def subscriber_count(self, session_id=None):
+        with self._lock:
+            if session_id is not None:
+                return len(self._subscribers.get(session_id, ()))
+            return sum(len(s) for s in self._subscribers.values())
+
+    def dispatch(self, session_id, event):
+        """Deliver an (id, frame) event to local subscribers; safe from any thread"""
+        with self._lock:
+            subscribers = list(self._subscribers.get(session_id, ()))
+        for loop, queue in subscribers:
+            try:
+                loop.call_soon_threadsafe(self._offer, queue, event)
+            except RuntimeError:
+                # Event loop already closed; the stream is gone
+                self.unsubscribe(session_id, (loop, queue))
+
+    @staticmethod
+    def _offer(queue, event):
+        try:
+            queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # Slow consumer: close its stream, the client resumes via Last-Event-ID
+            while not queue.empty():
+                queue.get_nowait()
+            queue.put_nowait(None)
+
+
+class LocalBroker:
+    """Delivers published events to this process only"""
+
+    def __init__(self, hub):
+        self.hub = hub
+
+    def has_listeners(self, session_id):
+        return self.hub.subscriber_count(session_id) > 0
+
+    def publish(self, session_id, event):
+        self.hub.dispatch(session_id, event)
+
+
+class UnixSocketBroker:
+    """
+    Fans events out to every process on the host through Unix datagram sockets.
+
+    Each process binds one socket in `directory` and a daemon thread feeds what
+    it receives into the local hub. Publishing sends one datagram per bound
+    socket and removes sockets whose process has exited.
+    """
+
+    def __init__(self, hub, directory):
+        self.hub = hub
+        self.directory = directory
+        self._sock = None
+        self._path = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        with self._lock:
+            if self._sock is not None:
+                return
+            os.makedirs(self.directory, exist_ok=True)
+            self._path = os.path.join(self.directory, f'{os.getpid()}-{uuid.uuid4().hex[:8]}.sock')
+            self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+            self._sock.bind(self._path)
+            threading.Thread(target=self._listen, name='realtime-broker', daemon=True).start()
+
+    def _listen(self):
+        while True:
+            try:
+                data = self._sock.recv(65536)
+                envelope = json.loads(data)
+                self.hub.dispatch(envelope['session'], tuple(envelope['event']))
+            except OSError:
+                return
+            except (ValueError, KeyError):
+                logger.warning('Dropping malformed realtime datagram')
+
+    def has_listeners(self, session_id):
+        # Subscribers may live in any worker on the host
+        return True
+
+    def publish(self, session_id, event):
+        self.start()
+        data = json.dumps({'session': session_id, 'event': event}).encode('utf-8')
+        sender = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        try:
+            for name in os.listdir(self.directory):
+                if not name.endswith('.sock'):
+                    continue
+                path = os.path.join(self.directory, name)
+                try:
+                    sender.sendto(data, path)
+                except (ConnectionRefusedError, FileNotFoundError):
+                    if path != self._path:
+                        self._remove_stale(path)
+                except OSError:
+                    logger.warning('Could not deliver realtime event to %s', path)
+        finally:
+            sender.close()
+
+    @staticmethod
+    def _remove_stale(path):
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+
+
+hub = MessageHub()
+_broker = None
+
+
+def get_broker():
+    global _broker
+    if _broker is None:
+        config = getattr(settings, 'REALTIME', {})
+        if config.get('BROKER', 'local') == 'unix':
+            _broker = UnixSocketBroker(hub, config.get('SOCKET_DIR', '/tmp/skill_sync_realtime'))
+            _broker.start()
+        else:
+            _broker = LocalBroker(hub)
+    return _broker
+
+
+STREAM_TOKEN_SALT = 'api.realtime.stream'
+
+
+def issue_stream_token(user_id, session_id):
+    """Signed ticket that lets `user_id` open the stream of one session"""
+    return signing.dumps([user_id, session_id], salt=STREAM_TOKEN_SALT)
+
+
+def read_stream_token(token, session_id):
+    """The user id of a valid, unexpired ticket for `session_id`, else None"""
+    max_age = getattr(settings, 'REALTIME', {}).get('STREAM_TOKEN_SECONDS', 60)
+    try:
+        user_id, token_session_id = signing.loads(token, salt=STREAM_TOKEN_SALT, max_age=max_age)
+    except (signing.BadSignature, TypeError, ValueError):
+        return None
+    return user_id if token_session_id == session_id else None
+
+
+def encode_event(message_data):
+    """Render one message as an (id, SSE frame) pair; the message id doubles as the SSE event id"""
+    message_id = message_data['id']
+    payload = json.dumps(message_data, cls=DjangoJSONEncoder)
+    max_bytes = getattr(settings, 'REALTIME', {}).get('MAX_EVENT_BYTES', 16 * 1024)
+    if len(payload.encode('utf-8')) > max_bytes:
+        # Too big for one broker datagram: send the ids, the client fetches the body
+        payload = json.dumps({'id': message_id, 'session': message_data['session']})
+        return message_id, f"id: {message_id}\nevent: message-ref\ndata: {payload}\n\n"
+    return message_id, f"id: {message_id}\nevent: message\ndata: {payload}\n\n"
+
+
+@receiver(post_save, sender=Message)
+def publish_message(sender, instance, created, **kwargs):
+    """Push new chat messages to stream subscribers once the row is committed"""
+    if not created:
+        return
+    broker = get_broker()
+    session_id = instance.session_id
+    if not broker.has_listeners(session_id):
+        return
+    from .serializers import MessageSerializer
+    # Serialize once here instead of once per subscriber
+    event = encode_event(MessageSerializer(instance).data)
+    transaction.on_commit(lambda: broker.publish(session_id, event))
@@ -0,0 +1,232 @@
+"""
+Mentor recommendations from an in-memory skill-incidence matrix.
+
+Each worker keeps a NumPy matrix with one row per mentor and one column per
+skill, plus rating arrays, so ranking every mentor is a handful of vector
+operations instead of per-mentor queries.
+
+Writers record which mentors changed in a change log in the default cache,
+which every worker must share (see CACHES in settings): a generation counter
+plus one 'change:<generation>' entry per change. Before answering, a worker
+replays the entries it has not seen and reloads only those rows. It
+rebuilds from scratch when the log has gaps (evicted entries, a restarted
+cache) or a change touches an unknown set of mentors.
+"""
+import threading
+
+import numpy as np
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count
+from django.db.models.signals import m2m_changed, post_delete
+from django.dispatch import receiver
+
+from .caching import KEY_PREFIX
+from .models import Profile, Session, Skill
+
+GENERATION_KEY = f'{KEY_PREFIX}:recommend:gen'
+CHANGE_TIMEOUT = 60 * 60
+MAX_REPLAY = 500
+# Change log entry meaning "any mentor may have changed"
+ALL_MENTORS = 0
+
+# Score = requested-skill coverage, past-session skill affinity, and a
+# Bayesian rating pulled towards PRIOR_MEAN until a mentor has ratings
+WEIGHTS = {'requested': 0.6, 'history': 0.25, 'rating': 0.15}
+PRIOR_MEAN = 3.5
+PRIOR_WEIGHT = 5
+
+
+def _change_key(generation):
+    return f'{KEY_PREFIX}:recommend:change:{generation}'
+
+
+def _current_generation():
+    cache.add(GENERATION_KEY, 0, timeout=None)
+    return cache.get(GENERATION_KEY) or 0
+
+
+def _record_changes(user_ids):
+    for user_id in user_ids:
+        while True:
+            try:
+                generation = cache.incr(GENERATION_KEY)
+            except ValueError:
+                cache.add(GENERATION_KEY, 0, timeout=None)
+                generation = cache.incr(GENERATION_KEY)
+            # incr is a read-then-write on the file and database backends, so
+            # two writers can draw the same generation; add() lets only one
+            # claim it and the other draws again
+            if cache.add(_change_key(generation), user_id, timeout=CHANGE_TIMEOUT):
+                break
+
+
+def mark_changed(*user_ids):
+    """Queue mentors for reloading once the current transaction commits"""
+    user_ids = tuple(user_ids)
+    transaction.on_commit(lambda: _record_changes(user_ids))
+
+
+class MentorMatrix:
+    """Per-process mentor x skill incidence matrix with rating arrays"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.generation = None
+        self.reset()
+
+    def reset(self):
+        self.size = 0
+        self.user_ids = np.zeros(0, dtype=np.int64)
+        self.row_of = {}
+        self.col_of = {}
+        self.skills = np.zeros((0, 0), dtype=bool)
+        self.active = np.zeros(0, dtype=bool)
+        self.rating_avg = np.zeros(0, dtype=np.float32)
+        self.rating_count = np.zeros(0, dtype=np.float32)
+
+    def sync(self):
+        """Bring the matrix up to date with the shared change log"""
+        with self.lock:
+            # Read the generation before the database, so anything committed
+            # afterwards is replayed on the next sync
+            shared = _current_generation()
+            if self.generation is None or not 0 <= shared - self.generation <= MAX_REPLAY:
+                self.rebuild()
+            elif shared > self.generation:
+                keys = [_change_key(g) for g in range(self.generation + 1, shared + 1)]
+                changes = cache.get_many(keys)
+                if len(changes) < len(keys) or ALL_MENTORS in changes.values():
+                    self.rebuild()
+                else:
+                    self.load(set(changes.values()))
+            self.generation = shared
+
+    def rebuild(self):
+        self.reset()
+        self.load(None)
+
+    def load(self, user_ids):
+        """(Re)load the given mentors' rows, or every mentor when user_ids is None"""
+        profiles = Profile.objects.filter(is_mentor=True)
+        links = Profile.skills.through.objects.filter(profile__is_mentor=True)
+        if user_ids is not None:
+            profiles = profiles.filter(user_id__in=user_ids)
+            links = links.filter(profile__user_id__in=user_ids)
+            # Mentors that stopped mentoring, or were deleted, drop out
+            for user_id in user_ids:
+                row = self.row_of.get(user_id)
+                if row is not None:
+                    self.active[row] = False
+                    self.skills[row] = False
+
+        rows = list(profiles.values_list('user_id', 'rating_avg', 'rating_count'))
+        links = list(links.values_list('profile__user_id', 'skill_id'))
+        self.grow(
+            [user_id for user_id, _, _ in rows if user_id not in self.row_of],
+            {skill_id for _, skill_id in links if skill_id not in self.col_of},
+        )
+        for user_id, rating_avg, rating_count in rows:
+            row = self.row_of[user_id]
+            self.active[row] = True
+            self.rating_avg[row] = rating_avg
+            self.rating_count[row] = rating_count
+        if links:
+            link_rows = np.fromiter((self.row_of[user_id] for user_id, _ in links), dtype=np.int64, count=len(links))
+            link_cols = np.fromiter((self.col_of[skill_id] for _, skill_id in links), dtype=np.int64, count=len(links))
+            self.skills[link_rows, link_cols] = True
+
+    def grow(self, new_user_ids, new_skill_ids):
+        """Append rows for new mentors and columns for new skills"""
+        for skill_id in sorted(new_skill_ids):
+            self.col_of[skill_id] = len(self.col_of)
+        for user_id in new_user_ids:
+            self.row_of[user_id] = self.size
+            self.size += 1
+
+        rows, cols = self.skills.shape
+        if self.size > rows or len(self.col_of) > cols:
+            # Over-allocate rows so repeated small additions stay amortized O(1)
+            new_rows = max(self.size, 2 * rows) if self.size > rows else rows
+            skills = np.zeros((new_rows, max(len(self.col_of), cols)), dtype=bool)
+            skills[:rows, :cols] = self.skills
+            self.skills = skills
+            for name in ('user_ids', 'active', 'rating_avg', 'rating_count'):
+                array = getattr(self, name)
+                resized = np.zeros(new_rows, dtype=array.dtype)
+                resized[:len(array)] = array
+                setattr(self, name, resized)
+        for user_id in new_user_ids:
+            self.user_ids[self.row_of[user_id]] = user_id
+
+    def rank(self, requested_skill_ids=(), history=None, exclude_user_id=None, limit=10):
+        """
+        Return [(user_id, score)] for the best `limit` mentors.
+
+        With requested skills, only mentors teaching at least one of them are
+        ranked. `history` maps skill ids to how often the learner booked them.
+        """
+        with self.lock:
+            n = self.size
+            skills = self.skills[:n]
+            score = np.zeros(n, dtype=np.float32)
+            eligible = self.active[:n].copy()
+
+            requested = [self.col_of[s] for s in set(requested_skill_ids) if s in self.col_of]
+            if requested_skill_ids:
+                matches = skills[:, requested].sum(axis=1, dtype=np.float32)
+                eligible &= matches > 0
+                score += WEIGHTS['requested'] * matches / len(set(requested_skill_ids))
+
+            history = {self.col_of[s]: count for s, count in (history or {}).items() if s in self.col_of}
+            if history:
+                weights = np.fromiter(history.values(), dtype=np.float32, count=len(history))
+                score += WEIGHTS['history'] * (skills[:, list(history)] @ (weights / weights.sum()))
+
+            count = self.rating_count[:n]
+            bayesian = (self.rating_avg[:n] * count + PRIOR_MEAN * PRIOR_WEIGHT) / (count + PRIOR_WEIGHT)
+            score += WEIGHTS['rating'] * bayesian / 5
+
+            if exclude_user_id in self.row_of:
+                eligible[self.row_of[exclude_user_id]] = False
+            candidates = np.flatnonzero(eligible)
+            if not len(candidates) or limit < 1:
+                return []
+            k = min(limit, len(candidates))
+            top = candidates[np.argpartition(-score[candidates], k - 1)[:k]]
+            top = top[np.lexsort((self.user_ids[top], -score[top]))]
+            return [(int(self.user_ids[row]), round(float(score[row]), 4)) for row in top]
+
+
+matrix = MentorMatrix()
+
+
+def recommend(user, skill_ids, limit=10):
+    """Rank mentors for `user` (may be anonymous) asking for `skill_ids`"""
+    matrix.sync()
+    history = {}
+    if user.is_authenticated:
+        history = dict(
+            Session.objects.filter(requester=user, skill__isnull=False)
+            .values_list('skill_id').annotate(n=Count('id')).order_by()
+        )
+    return matrix.rank(
+        requested_skill_ids=skill_ids,
+        history=history,
+        exclude_user_id=user.pk if user.is_authenticated else None,
+        limit=limit,
+    )
+
+
+@receiver(m2m_changed, sender=Profile.skills.through)
+def reload_profile_skills(sender, instance, action, reverse, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    # skill.profiles.add(...) may touch any number of mentors
+    mark_changed(ALL_MENTORS if reverse else instance.user_id)
+
+
+@receiver(post_delete, sender=Skill)
+def reload_deleted_skill(sender, instance, **kwargs):
+    # The cascade removes the skill from every profile without m2m_changed
+    mark_changed(ALL_MENTORS)
@@ -0,0 +1,215 @@
+"""
+Read replicas for the public mentor directory and skill list.
+
+DATABASE_REPLICA_URLS (settings.py) adds one 'replica_<n>' database per URL
+and installs ReplicaRouter. Only views with ReplicaReadMixin read from a
+replica, and only for safe methods; everything else, and every write, uses
+the primary ('default').
+
+A request picks one replica (round robin, skipping replicas that failed a
+health check or lag too far behind) and reads all its rows from it. Reads
+stay on the primary for REPLICAS['STICKY_SECONDS']:
+
+- for a user after any successful write of theirs (ReplicaPinMiddleware),
+  so they see their own changes;
+- for cache fills of a scope whose generation was just bumped (note_writes),
+  so a lagging replica cannot put pre-write rows under the new generation.
+
+Pins and write markers live in the default cache; use a shared cache backend
+when several workers run.
+"""
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+from rest_framework.permissions import SAFE_METHODS
+
+KEY_PREFIX = 'replicas'
+
+_reads = contextvars.ContextVar('replica_reads', default=None)
+
+
+def get_config():
+    return getattr(settings, 'REPLICAS', {})
+
+
+def replica_aliases():
+    return [alias for alias in settings.DATABASES if alias.startswith('replica_')]
+
+
+def enabled():
+    return bool(replica_aliases())
+
+
+class ReplicaPool:
+    """Health-aware round robin over the replica aliases (per process)"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.position = 0
+        self.down_until = {}
+        self.checked_at = {}
+
+    def choose(self):
+        """A healthy replica alias, or None when every replica is down"""
+        aliases = replica_aliases()
+        for _ in range(len(aliases)):
+            with self.lock:
+                alias = aliases[self.position % len(aliases)]
+                self.position += 1
+            if self.down_until.get(alias, 0) <= time.monotonic() and self.check(alias):
+                return alias
+        return None
+
+    def check(self, alias):
+        """Probe `alias` at most once per HEALTH_CHECK_INTERVAL seconds"""
+        now = time.monotonic()
+        if now - self.checked_at.get(alias, float('-inf')) < get_config().get('HEALTH_CHECK_INTERVAL', 5):
+            return True
+        self.checked_at[alias] = now
+        try:
+            lag = replication_lag(connections[alias])
+        except DatabaseError:
+            self.mark_down(alias)
+            return False
+        if lag is not None and lag > get_config().get('MAX_LAG_SECONDS', 10):
+            # Healthy but behind: skip it until the next check
+            self.down_until[alias] = now + get_config().get('HEALTH_CHECK_INTERVAL', 5)
+            return False
+        return True
+
+    def mark_down(self, alias):
+        """Skip `alias` for RETRY_AFTER_SECONDS; the next use reconnects"""
+        self.down_until[alias] = time.monotonic() + get_config().get('RETRY_AFTER_SECONDS', 30)
+        self.checked_at.pop(alias, None)
+        try:
+            connections[alias].close()
+        except DatabaseError:
+            pass
+
+
+pool = ReplicaPool()
+
+
+def replication_lag(connection):
+    """Seconds a PostgreSQL standby is behind (0 when caught up); None where unknown"""
+    with connection.cursor() as cursor:
+        if connection.vendor != 'postgresql':
+            cursor.execute('SELECT 1')
+            return None
+        cursor.execute(
+            'SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 '
+            'ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) END'
+        )
+        lag = cursor.fetchone()[0]
+    return float(lag) if lag is not None else None
+
+
+class ReplicaReads:
+    """Routing state of one request"""
+    __slots__ = ('allowed', 'alias', 'failed')
+
+    def __init__(self):
+        self.allowed = False
+        self.alias = None
+        self.failed = False
+
+
+class ReplicaRouter:
+    """Sends reads to the replica chosen for the current request, everything else to the primary"""
+
+    def db_for_read(self, model, **hints):
+        reads = _reads.get()
+        if reads is None or not reads.allowed:
+            return None
+        if reads.alias is None:
+            reads.alias = pool.choose()
+            if reads.alias is None:
+                reads.allowed = False
+                return None
+        return reads.alias
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, **hints):
+        # Replicas get their schema through replication
+        return False if db in replica_aliases() else None
+
+
+def _pin_key(user_id):
+    return f'{KEY_PREFIX}:pin:{user_id}'
+
+
+def _written_key(scope):
+    return f'{KEY_PREFIX}:written:{scope}'
+
+
+def pin(user_id):
+    """Keep `user_id` reading from the primary for STICKY_SECONDS"""
+    cache.set(_pin_key(user_id), 1, timeout=get_config().get('STICKY_SECONDS', 5))
+
+
+def is_pinned(user_id):
+    return cache.get(_pin_key(user_id)) is not None
+
+
+def note_writes(scopes):
+    """Record that cache `scopes` were just bumped (see api.caching.bump)"""
+    if enabled():
+        timeout = get_config().get('STICKY_SECONDS', 5)
+        cache.set_many({_written_key(scope): 1 for scope in scopes}, timeout=timeout)
+
+
+@contextmanager
+def primary_if_written(scopes):
+    """Read from the primary inside the block if one of `scopes` was written recently"""
+    reads = _reads.get()
+    if reads is None or not reads.allowed or not cache.get_many([_written_key(scope) for scope in scopes]):
+        yield
+        return
+    reads.allowed = False
+    try:
+        yield
+    finally:
+        reads.allowed = True
+
+
+class ReplicaReadMixin:
+    """
+    Safe-method requests read from a replica unless the user wrote recently.
+    A request that fails on its replica is retried once on the primary.
+    """
+
+    def dispatch(self, request, *args, **kwargs):
+        if not enabled():
+            return super().dispatch(request, *args, **kwargs)
+        reads = ReplicaReads()
+        token = _reads.set(reads)
+        try:
+            try:
+                return super().dispatch(request, *args, **kwargs)
+            except DatabaseError:
+                if reads.alias is None:
+                    raise
+                pool.mark_down(reads.alias)
+                reads.allowed, reads.alias, reads.failed = False, None, True
+                return super().dispatch(request, *args, **kwargs)
+        finally:
+            _reads.reset(token)
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        reads = _reads.get()
+        if reads is None or reads.failed or request.method not in SAFE_METHODS:
+            return
+        user_id = request.user.pk if request.user.is_authenticated else None
+        reads.allowed = user_id is None or not is_pinned(user_id)
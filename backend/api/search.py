@@ -0,0 +1,170 @@
+"""
+Indexed mentor search.
+
+Profile.search_document holds a mentor's username, names, bio and skill
+names, refreshed by api.signals (user and profile changes, including
+becoming a mentor) and the skill receivers below. Learners' documents are
+not maintained, since only mentors are searched. Every whitespace-separated
+term must occur in it as a case-insensitive substring:
+
+- PostgreSQL  icontains served by a pg_trgm GIN index on UPPER(search_document)
+- SQLite      an FTS5 trigram table kept in sync by triggers (created after
+              every migrate, since SQLite table rebuilds drop triggers)
+- otherwise   icontains on the single column, still without joins
+
+Terms shorter than three characters cannot use a trigram index; those are
+matched with a plain LIKE on the same column.
+"""
+import re
+
+from django.db import DatabaseError, connections
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+from django.db.models.signals import post_save, post_delete, pre_delete, m2m_changed, post_migrate
+from django.dispatch import receiver
+from rest_framework.filters import BaseFilterBackend
+
+from .models import Profile, Skill
+
+FTS_TABLE = 'api_profile_fts'
+MAX_TERMS = 8
+TRIGRAM = 3
+
+_TERM_RE = re.compile(r'\w+')
+_fts_ready = {}
+
+
+def search_terms(value):
+    return _TERM_RE.findall(value or '')[:MAX_TERMS]
+
+
+def sqlite_fts_available(using):
+    if using not in _fts_ready:
+        connection = connections[using]
+        _fts_ready[using] = (
+            connection.vendor == 'sqlite' and FTS_TABLE in connection.introspection.table_names()
+        )
+    return _fts_ready[using]
+
+
+def filter_mentors(queryset, terms):
+    """Restrict a User or MentorCard queryset to mentors whose search document contains every term"""
+    if not terms:
+        return queryset
+    long_terms = [term for term in terms if len(term) >= TRIGRAM]
+    short_terms = [term for term in terms if len(term) < TRIGRAM]
+
+    if long_terms and sqlite_fts_available(queryset.db):
+        match = ' '.join('"%s"' % term for term in long_terms)
+        queryset = queryset.filter(profile__id__in=RawSQL(
+            f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s', [match]
+        ))
+    else:
+        short_terms = terms
+
+    condition = Q()
+    for term in short_terms:
+        condition &= Q(profile__search_document__icontains=term)
+    return queryset.filter(condition)
+
+
+class MentorSearchFilter(BaseFilterBackend):
+    """Drop-in replacement for SearchFilter on the mentor directory"""
+    search_param = 'search'
+
+    def filter_queryset(self, request, queryset, view):
+        return filter_mentors(queryset, search_terms(request.query_params.get(self.search_param)))
+
+
+def build_search_documents(profile_ids):
+    """{profile_id: document} for the given profiles, in two queries"""
+    documents = {
+        profile_id: [username, first_name, last_name, bio]
+        for profile_id, username, first_name, last_name, bio in Profile.objects.filter(
+            pk__in=profile_ids
+        ).values_list('id', 'user__username', 'user__first_name', 'user__last_name', 'bio')
+    }
+    for profile_id, name in Profile.skills.through.objects.filter(
+        profile_id__in=documents
+    ).order_by('skill__name').values_list('profile_id', 'skill__name'):
+        documents[profile_id].append(name)
+    return {profile_id: ' '.join(part for part in parts if part) for profile_id, parts in documents.items()}
+
+
+def refresh_search_documents(profile_ids):
+    """Rewrite search_document without sending save signals"""
+    documents = build_search_documents(set(profile_ids))
+    profiles = [Profile(id=profile_id, search_document=document) for profile_id, document in documents.items()]
+    Profile.objects.bulk_update(profiles, ['search_document'], batch_size=500)
+
+
+def ensure_sqlite_fts(using):
+    """Create (or repair) the FTS5 table and its triggers and reindex it"""
+    connection = connections[using]
+    if connection.vendor != 'sqlite':
+        return
+    statements = [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+        f"search_document, content='api_profile', content_rowid='id', tokenize='trigram')",
+        f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON api_profile BEGIN "
+        f"INSERT INTO {FTS_TABLE}(rowid, search_document) VALUES (new.id, new.search_document); END",
+        f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON api_profile BEGIN "
+        f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, search_document) "
+        f"VALUES ('delete', old.id, old.search_document); END",
+        f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF search_document ON api_profile BEGIN "
+        f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, search_document) "
+        f"VALUES ('delete', old.id, old.search_document); "
+        f"INSERT INTO {FTS_TABLE}(rowid, search_document) VALUES (new.id, new.search_document); END",
+        f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')",
+    ]
+    try:
+        with connection.cursor() as cursor:
+            for statement in statements:
+                cursor.execute(statement)
+    except DatabaseError:
+        # SQLite built without FTS5/trigram: searches fall back to LIKE
+        pass
+    _fts_ready.pop(using, None)
+
+
+@receiver(post_migrate)
+def install_sqlite_fts(sender, using, plan=None, **kwargs):
+    if sender.label == 'api' and 'api_profile' in connections[using].introspection.table_names():
+        ensure_sqlite_fts(using)
+
+
+@receiver(m2m_changed, sender=Profile.skills.through)
+def refresh_profile_skills(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        if instance.is_mentor:
+            refresh_search_documents([instance.pk])
+    elif action == 'post_clear':
+        # pk_set is unknown after a clear; the skill's mentors were captured in pre_clear
+        refresh_search_documents(getattr(instance, '_search_profile_ids', ()))
+    else:
+        refresh_search_documents(pk_set)
+
+
+@receiver(m2m_changed, sender=Profile.skills.through)
+def remember_cleared_profiles(sender, instance, action, reverse, **kwargs):
+    if action == 'pre_clear' and reverse:
+        instance._search_profile_ids = list(instance.profiles.values_list('id', flat=True))
+
+
+@receiver(post_save, sender=Skill)
+def refresh_skill(sender, instance, created, **kwargs):
+    if not created:
+        refresh_search_documents(instance.profiles.values_list('id', flat=True))
+
+
+@receiver(pre_delete, sender=Skill)
+def remember_skill_profiles(sender, instance, **kwargs):
+    # The through rows are gone (without m2m signals) by post_delete
+    instance._search_profile_ids = list(instance.profiles.values_list('id', flat=True))
+
+
+@receiver(post_delete, sender=Skill)
+def refresh_deleted_skill(sender, instance, **kwargs):
+    refresh_search_documents(getattr(instance, '_search_profile_ids', ()))
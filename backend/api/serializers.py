@@ -1,10 +1,14 @@
 from rest_framework import serializers
 from django.contrib.auth.models import User
 from django.contrib.auth.password_validation import validate_password
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from .authentication import record_login
+from .instrumentation import InstrumentedSerializerMixin
 from .models import Profile, Skill, Session, Rating, Message
+from .availability import normalize_availability
 
 
-class SkillSerializer(serializers.ModelSerializer):
+class SkillSerializer(InstrumentedSerializerMixin, serializers.ModelSerializer):
     """Serializer for Skill model"""
     class Meta:
         model = Skill
@@ -12,7 +16,7 @@ class SkillSerializer(serializers.ModelSerializer):
         read_only_fields = ['id']
 
 
-class ProfileSerializer(serializers.ModelSerializer):
+class ProfileSerializer(InstrumentedSerializerMixin, serializers.ModelSerializer):
     """Serializer for Profile model"""
     skills = SkillSerializer(many=True, read_only=True)
     skill_ids = serializers.PrimaryKeyRelatedField(
@@ -29,9 +33,33 @@ class ProfileSerializer(serializers.ModelSerializer):
             'rating_avg', 'rating_count', 'availability'
         ]
         read_only_fields = ['id', 'rating_avg', 'rating_count']
+    
+    def validate_availability(self, value):
+        """Reject entries the availability index cannot represent"""
+        try:
+            normalize_availability(value)
+        except ValueError as exc:
+            raise serializers.ValidationError(str(exc))
+        return value
+    
+    def update(self, instance, validated_data):
+        """Write only the fields whose values changed, and skip the save if none did"""
+        skills = validated_data.pop('skills', None)
+        for attr, value in validated_data.items():
+            setattr(instance, attr, value)
+        changed = instance.changed_fields()
+        untracked = set(validated_data) - set(instance.tracked_fields)
+        instance.save_changed(extra_fields=untracked)
+        if skills is not None:
+            # set() only adds and removes the differences
+            instance.skills.set(skills)
+        # Keep the indexed availability windows in sync with the JSON list
+        if 'availability' in changed:
+            instance.sync_availability_windows()
+        return instance
 
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(InstrumentedSerializerMixin, serializers.ModelSerializer):
     """Serializer for User model with profile"""
     profile = ProfileSerializer(read_only=True)
     
@@ -41,7 +69,7 @@ class UserSerializer(serializers.ModelSerializer):
         read_only_fields = ['id']
 
 
-class RegisterSerializer(serializers.ModelSerializer):
+class RegisterSerializer(InstrumentedSerializerMixin, serializers.ModelSerializer):
     """Serializer for user registration"""
     password = serializers.CharField(
         write_only=True, 
@@ -65,7 +93,7 @@ class RegisterSerializer(serializers.ModelSerializer):
         return user
 
 
-class UserSummarySerializer(serializers.ModelSerializer):
+class UserSummarySerializer(InstrumentedSerializerMixin, serializers.ModelSerializer):
     """Lightweight user serializer for nested relations"""
     rating_avg = serializers.FloatField(source='profile.rating_avg', read_only=True)
     rating_count = serializers.IntegerField(source='profile.rating_count', read_only=True)
@@ -77,7 +105,7 @@ class UserSummarySerializer(serializers.ModelSerializer):
         read_only_fields = fields
 
 
-class RatingSerializer(serializers.ModelSerializer):
+class RatingSerializer(InstrumentedSerializerMixin, serializers.ModelSerializer):
     """Serializer for Rating model"""
     rater = UserSummarySerializer(read_only=True)
     session_id = serializers.PrimaryKeyRelatedField(
@@ -107,7 +135,7 @@ class RatingSerializer(serializers.ModelSerializer):
         return super().create(validated_data)
 
 
-class SessionSerializer(serializers.ModelSerializer):
+class SessionSerializer(InstrumentedSerializerMixin, serializers.ModelSerializer):
     """Serializer for Session model"""
     requester = UserSummarySerializer(read_only=True)
     mentor = UserSummarySerializer(read_only=True)
@@ -133,7 +161,9 @@ class SessionSerializer(serializers.ModelSerializer):
             'duration_minutes', 'description', 'status', 'scheduled_time',
             'meeting_url', 'rating', 'created_at', 'updated_at'
         ]
-        read_only_fields = ['id', 'requester', 'created_at', 'updated_at']
+        # Status only changes through the accept/complete/cancel actions, which
+        # enforce the state machine and the overlap check
+        read_only_fields = ['id', 'requester', 'status', 'created_at', 'updated_at']
     
     def validate_mentor_id(self, value):
         """Ensure mentor is actually a mentor and not the requester themself"""
@@ -165,6 +195,22 @@ class SessionSerializer(serializers.ModelSerializer):
         mentor = attrs.get('mentor')
         if request and mentor and mentor == request.user:
             raise serializers.ValidationError({'mentor_id': 'You cannot request a session with yourself.'})
+        # reject slots that overlap one of the mentor's accepted sessions
+        instance = self.instance
+        if instance is None or 'scheduled_time' in attrs or 'duration_minutes' in attrs:
+            mentor = mentor or getattr(instance, 'mentor', None)
+            start = attrs.get('scheduled_time', getattr(instance, 'scheduled_time', None))
+            duration = attrs.get(
+                'duration_minutes',
+                instance.duration_minutes if instance else Session._meta.get_field('duration_minutes').default
+            )
+            end = Session.compute_end_time(start, duration)
+            if mentor is not None and end is not None and Session.conflicting(
+                mentor.pk, start, end, exclude_pk=getattr(instance, 'pk', None)
+            ).exists():
+                raise serializers.ValidationError({
+                    'scheduled_time': 'The mentor already has an accepted session at this time.'
+                })
         return attrs
     
     def create(self, validated_data):
@@ -178,14 +224,9 @@ class SessionSerializer(serializers.ModelSerializer):
         description = validated_data.get('description', '')
         duration = validated_data.get('duration_minutes')
 
-        # Prefer header key when provided
-        idem = request.META.get('HTTP_X_IDEMPOTENCY_KEY')
-        if idem:
-            existing = Session.objects.filter(idempotency_key=idem).first()
-            if existing:
-                return existing
-
-        # Time/window-based guard as fallback
+        # Requests with X-Idempotency-Key are deduplicated by IdempotencyMiddleware.
+        # Time/window-based guard for clients that send no key; the
+        # (requester, status, created_at) index narrows this to a few rows.
         window_start = timezone.now() - timedelta(minutes=10)
         existing = Session.objects.filter(
             requester=requester,
@@ -200,14 +241,12 @@ class SessionSerializer(serializers.ModelSerializer):
             return existing
 
         validated_data['requester'] = requester
-        if idem:
-            validated_data['idempotency_key'] = idem
         with transaction.atomic():
             obj = super().create(validated_data)
         return obj
 
 
-class MessageSerializer(serializers.ModelSerializer):
+class MessageSerializer(InstrumentedSerializerMixin, serializers.ModelSerializer):
     """Serializer for Message model (mock chat)"""
     sender = UserSummarySerializer(read_only=True)
     session_id = serializers.PrimaryKeyRelatedField(
@@ -226,7 +265,7 @@ class MessageSerializer(serializers.ModelSerializer):
         return super().create(validated_data)
 
 
-class MentorListSerializer(serializers.ModelSerializer):
+class MentorListSerializer(InstrumentedSerializerMixin, serializers.ModelSerializer):
     """Specialized serializer for mentor list view"""
     profile = ProfileSerializer(read_only=True)
     
@@ -234,3 +273,19 @@ class MentorListSerializer(serializers.ModelSerializer):
         model = User
         fields = ['id', 'username', 'first_name', 'last_name', 'profile']
         read_only_fields = fields
+
+
+class MentorCardSerializer(serializers.BaseSerializer):
+    """Read-only: a MentorCard already holds its rendered MentorListSerializer document"""
+    
+    def to_representation(self, instance):
+        return instance.document
+
+
+class LoginSerializer(TokenObtainPairSerializer):
+    """Token pair grant that records last_login at a coarse resolution"""
+    
+    def validate(self, attrs):
+        data = super().validate(attrs)
+        record_login(self.user)
+        return data
@@ -0,0 +1,263 @@
+"""
+Session status transitions (the session state machine).
+
+Every transition is one conditional UPDATE:
+
+    UPDATE api_session SET status = <target>, updated_at = now()
+    WHERE id IN (...) AND status IN (<sources>) AND <caller is an allowed actor>
+    [AND NOT EXISTS (<overlapping accepted session>)]      -- accept only
+    RETURNING <every column>, <skill name and slug>
+
+so the status check, the permission check and the write cannot race with
+a concurrent click. Where the backend supports RETURNING (PostgreSQL,
+SQLite >= 3.35) the updated rows, with their skill, come back in the same
+round trip; load_related() adds the participants in one more query. Only a
+failed transition pays for a query to explain why it failed.
+"""
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.models import F, Q, Exists, OuterRef, sql
+from django.db.models.signals import post_save
+from django.utils import timezone
+
+from .models import Session, Skill
+
+MAX_BULK_SESSIONS = 100
+
+# Skill fields returned with each updated row (see SkillSerializer)
+RETURNED_SKILL_FIELDS = ('name', 'slug')
+
+TRANSITIONS = {
+    'accept': {
+        'sources': ('requested',),
+        'target': 'accepted',
+        'actors': ('mentor',),
+        'forbidden': 'Only the mentor can accept this session',
+        'invalid': 'Session is not in requested state',
+    },
+    'complete': {
+        'sources': ('accepted',),
+        'target': 'completed',
+        'actors': ('mentor', 'requester'),
+        'forbidden': 'Only session participants can complete the session',
+        'invalid': 'Session must be accepted before completion',
+    },
+    'cancel': {
+        'sources': ('requested', 'accepted'),
+        'target': 'cancelled',
+        'actors': ('mentor', 'requester'),
+        'forbidden': 'Only session participants can cancel the session',
+        'invalid': 'Only requested or accepted sessions can be cancelled',
+    },
+}
+
+
+class TransitionError(Exception):
+    """A transition matched no row; `code` is not_found, forbidden, invalid or conflict"""
+
+    def __init__(self, code, message, session_id=None):
+        super().__init__(message)
+        self.code = code
+        self.message = message
+        self.session_id = session_id
+
+
+def _actor_filter(actors, user):
+    condition = Q()
+    for actor in actors:
+        condition |= Q(**{f'{actor}_id': user.pk})
+    return condition
+
+
+def _overlapping_accepted():
+    """Accepted sessions of the same mentor overlapping the outer row (see Session.conflicting)"""
+    longest = timedelta(minutes=max(value for value, _ in Session.DURATION_CHOICES))
+    return Session.objects.filter(
+        mentor_id=OuterRef('mentor_id'),
+        status='accepted',
+        scheduled_time__gt=OuterRef('scheduled_time') - longest,
+        scheduled_time__lt=OuterRef('end_time'),
+        end_time__gt=OuterRef('scheduled_time'),
+    ).exclude(pk=OuterRef('pk'))
+
+
+def transition_queryset(action, user, session_ids, using=DEFAULT_DB_ALIAS):
+    """The rows `user` may move with `action` right now"""
+    spec = TRANSITIONS[action]
+    queryset = Session.objects.using(using).filter(
+        _actor_filter(spec['actors'], user),
+        pk__in=session_ids,
+        status__in=spec['sources'],
+    ).order_by()
+    if action == 'accept':
+        queryset = queryset.filter(~Exists(_overlapping_accepted()))
+    return queryset
+
+
+def _returning_columns(connection):
+    """Every Session column plus the skill fields SessionSerializer renders"""
+    qn = connection.ops.quote_name
+    table = qn(Session._meta.db_table)
+    skill_table = qn(Skill._meta.db_table)
+    columns = [f'{table}.{qn(field.column)}' for field in Session._meta.concrete_fields]
+    for name in RETURNED_SKILL_FIELDS:
+        columns.append(
+            f'(SELECT {skill_table}.{qn(name)} FROM {skill_table} '
+            f'WHERE {skill_table}.{qn("id")} = {table}.{qn("skill_id")}) AS {qn("skill_" + name)}'
+        )
+    return ', '.join(columns)
+
+
+def supports_update_returning(connection):
+    """
+    UPDATE ... RETURNING: PostgreSQL and SQLite >= 3.35. Django's
+    can_return_columns_from_insert is no guide: MariaDB sets it but only
+    supports RETURNING on INSERT and DELETE.
+    """
+    if connection.vendor == 'postgresql':
+        return True
+    if connection.vendor == 'sqlite':
+        return connection.Database.sqlite_version_info >= (3, 35)
+    return False
+
+
+def update_returning(queryset, **values):
+    """queryset.update(**values), returning the updated Session rows"""
+    using = queryset.db
+    connection = connections[using]
+    if supports_update_returning(connection):
+        query = queryset.query.chain(sql.UpdateQuery)
+        query.add_update_values(values)
+        update_sql, params = query.get_compiler(using).as_sql()
+        returning = _returning_columns(connection)
+        return list(Session.objects.db_manager(using).raw(f'{update_sql} RETURNING {returning}', params))
+
+    # No RETURNING: lock the matching rows, update them and read them back
+    with transaction.atomic(using=using):
+        pks = list(queryset.select_for_update().values_list('pk', flat=True))
+        Session.objects.using(using).filter(pk__in=pks).update(**values)
+        return list(Session.objects.using(using).filter(pk__in=pks).annotate(
+            **{f'skill_{name}': F(f'skill__{name}') for name in RETURNED_SKILL_FIELDS}
+        ))
+
+
+def load_related(sessions, using=DEFAULT_DB_ALIAS):
+    """
+    Attach what SessionSerializer renders to sessions returned by a
+    transition: the skill from the returned columns, requester and mentor
+    (with profiles) in one query. A transition never leaves a session rated,
+    since ratings need a completed session and no transition starts there.
+    """
+    user_ids = {session.requester_id for session in sessions} | {session.mentor_id for session in sessions}
+    users = User.objects.using(using).select_related('profile').in_bulk(user_ids) if sessions else {}
+    fields = {name: Session._meta.get_field(name) for name in ('requester', 'mentor', 'skill', 'rating')}
+    for session in sessions:
+        fields['requester'].set_cached_value(session, users[session.requester_id])
+        fields['mentor'].set_cached_value(session, users[session.mentor_id])
+        skill = None
+        if session.skill_id is not None:
+            skill = Skill(id=session.skill_id, **{
+                name: getattr(session, f'skill_{name}') for name in RETURNED_SKILL_FIELDS
+            })
+        fields['skill'].set_cached_value(session, skill)
+        fields['rating'].set_cached_value(session, None)
+    return sessions
+
+
+def apply_transition(action, user, session_ids, using=DEFAULT_DB_ALIAS):
+    """Move every eligible session in `session_ids`; returns the updated sessions"""
+    spec = TRANSITIONS[action]
+    with transaction.atomic(using=using):
+        if action == 'accept' and connections[using].features.has_select_for_update:
+            # Serialize accepts per mentor so overlapping accepts cannot both pass NOT EXISTS
+            list(User.objects.using(using).select_for_update().filter(pk=user.pk).values_list('pk', flat=True))
+        sessions = update_returning(
+            transition_queryset(action, user, session_ids, using),
+            status=spec['target'],
+            updated_at=timezone.now(),
+        )
+        # UPDATE sends no signals; tell the cache receivers (slots, ...) explicitly
+        for session in sessions:
+            post_save.send(
+                sender=Session, instance=session, created=False,
+                update_fields=frozenset({'status', 'updated_at'}), raw=False, using=using,
+            )
+    return sessions
+
+
+def explain_failures(action, user, session_ids, using=DEFAULT_DB_ALIAS):
+    """{session_id: TransitionError} for sessions that did not move, in one query"""
+    spec = TRANSITIONS[action]
+    rows = {
+        row['id']: row
+        for row in Session.objects.using(using).filter(
+            Q(requester_id=user.pk) | Q(mentor_id=user.pk), pk__in=session_ids
+        ).values('id', 'status', 'mentor_id', 'requester_id')
+    }
+    errors = {}
+    for session_id in session_ids:
+        row = rows.get(session_id)
+        if row is None:
+            errors[session_id] = TransitionError('not_found', 'Session not found', session_id)
+        elif not any(row[f'{actor}_id'] == user.pk for actor in spec['actors']):
+            errors[session_id] = TransitionError('forbidden', spec['forbidden'], session_id)
+        elif row['status'] not in spec['sources']:
+            errors[session_id] = TransitionError('invalid', spec['invalid'], session_id)
+        else:
+            errors[session_id] = TransitionError(
+                'conflict', 'You already have an accepted session at this time', session_id
+            )
+    return errors
+
+
+def transition(action, user, session_id, using=DEFAULT_DB_ALIAS):
+    """Move one session, or raise TransitionError explaining why it could not move"""
+    sessions = apply_transition(action, user, [session_id], using)
+    if not sessions:
+        raise explain_failures(action, user, [session_id], using)[session_id]
+    return sessions[0]
+
+
+def _non_overlapping(rows):
+    """
+    Earliest-first pick of rows that do not overlap each other. Unscheduled
+    rows occupy no time, so they are always picked.
+    """
+    rows = list(rows)
+    unscheduled = [row for row in rows if row['scheduled_time'] is None]
+    scheduled = [row for row in rows if row['scheduled_time'] is not None]
+    chosen = []
+    for row in sorted(scheduled, key=lambda row: (row['scheduled_time'], row['id'])):
+        if not chosen or row['scheduled_time'] >= chosen[-1]['end_time']:
+            chosen.append(row)
+    return [row['id'] for row in unscheduled + chosen]
+
+
+def bulk_transition(action, user, session_ids, using=DEFAULT_DB_ALIAS):
+    """
+    Apply `action` to many sessions in one transaction.
+
+    Returns {session_id: Session | TransitionError}. Accepting requests that
+    overlap each other accepts the earliest and reports the rest as conflicts.
+    """
+    session_ids = list(dict.fromkeys(session_ids))
+    with transaction.atomic(using=using):
+        if action == 'accept':
+            if connections[using].features.has_select_for_update:
+                list(User.objects.using(using).select_for_update().filter(pk=user.pk).values_list('pk', flat=True))
+            # The UPDATE checks against already accepted sessions only; resolve
+            # overlaps inside the batch before running it
+            candidates = transition_queryset(action, user, session_ids, using).values(
+                'id', 'scheduled_time', 'end_time'
+            )
+            eligible = _non_overlapping(candidates)
+        else:
+            eligible = session_ids
+        sessions = apply_transition(action, user, eligible, using) if eligible else []
+        results = {session.pk: session for session in sessions}
+        failed = [session_id for session_id in session_ids if session_id not in results]
+        if failed:
+            results.update(explain_failures(action, user, failed, using))
+    return {session_id: results[session_id] for session_id in session_ids}
@@ -0,0 +1,96 @@
+"""
+One receiver per User, Profile and Rating change for every derived copy.
+
+The mentor directory response cache, mentor cards, autocomplete, search
+documents, cached principals, recommendations and free-slot caches all
+depend on who is a mentor and on a few of their fields. The receivers below
+work that out once per save (is the user a mentor, which directory fields
+changed, which mentor a rating counts for) and call each subsystem directly,
+instead of every subsystem re-querying it in a receiver of its own.
+
+Skill, skill-link and session changes stay with the subsystems they affect.
+"""
+from django.contrib.auth.models import User
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from . import authentication, autocomplete, caching, mentor_cards, recommendations, search, slots
+from .models import Profile, Rating
+
+# User fields shown in the directory, autocomplete and search
+NAME_FIELDS = {'username', 'first_name', 'last_name'}
+
+
+def mentor_profile_id(user):
+    """The user's profile id if they are a mentor, else None; no query when the profile is loaded"""
+    if User.profile.related.is_cached(user):
+        profile = user.profile
+        return profile.pk if profile.is_mentor else None
+    return Profile.objects.filter(user_id=user.pk, is_mentor=True).values_list('id', flat=True).first()
+
+
+def mentor_changed(user_id):
+    """A mentor's card and directory responses are out of date"""
+    caching.invalidate_mentor(user_id)
+    mentor_cards.schedule_refresh(user_id)
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, created, update_fields=None, **kwargs):
+    authentication.invalidate_principals(instance.pk)
+    if created:
+        return
+    # Logins (last_login only) and learners' names do not show anywhere;
+    # a learner who becomes a mentor is picked up by profile_saved
+    if update_fields is not None and not NAME_FIELDS & set(update_fields):
+        return
+    profile_id = mentor_profile_id(instance)
+    if profile_id is None:
+        return
+    mentor_changed(instance.pk)
+    autocomplete.schedule_refresh(mentor_ids=[instance.pk])
+    search.refresh_search_documents([profile_id])
+
+
+@receiver(post_delete, sender=User)
+def user_deleted(sender, instance, **kwargs):
+    authentication.invalidate_principals(instance.pk)
+
+
+@receiver(post_save, sender=Profile)
+def profile_saved(sender, instance, created, **kwargs):
+    authentication.invalidate_principals(instance.user_id)
+    changed = instance.directory_changes(created)
+    if not changed:
+        return
+    user_id = instance.user_id
+    mentor_changed(user_id)
+    if 'is_mentor' in changed:
+        autocomplete.schedule_refresh(mentor_ids=[user_id])
+    if instance.is_mentor and changed & {'bio', 'is_mentor'}:
+        search.refresh_search_documents([instance.pk])
+    if changed & {'is_mentor', 'rating_avg', 'rating_count'}:
+        recommendations.mark_changed(user_id)
+    if 'availability' in changed and not created:
+        slots.invalidate_mentor(user_id)
+
+
+@receiver(post_delete, sender=Profile)
+def profile_deleted(sender, instance, **kwargs):
+    authentication.invalidate_principals(instance.user_id)
+    if instance.is_mentor:
+        # The card goes with the profile (on_delete=CASCADE)
+        caching.invalidate_mentor(instance.user_id)
+        autocomplete.schedule_refresh(mentor_ids=[instance.user_id])
+        recommendations.mark_changed(instance.user_id)
+
+
+@receiver(post_save, sender=Rating)
+@receiver(post_delete, sender=Rating)
+def rating_changed(sender, instance, **kwargs):
+    """Ratings update the mentor's aggregate with a signal-less UPDATE"""
+    mentor_id = instance.rated_mentor_id()
+    if mentor_id is not None:
+        mentor_changed(mentor_id)
+        authentication.invalidate_principals(mentor_id)
+        recommendations.mark_changed(mentor_id)
@@ -0,0 +1,97 @@
+"""
+SQLite backend tuned for several gthread workers sharing one database file.
+
+ENGINE 'api.sqlite' (selected in settings.py for SQLite databases when
+SQLITE_TUNED=True) behaves like django.db.backends.sqlite3 plus:
+
+* Every new connection applies the pragmas in settings.SQLITE: WAL
+  journaling (readers never block the writer), synchronous=NORMAL,
+  busy_timeout, mmap_size and cache_size.
+* Transactions start with BEGIN IMMEDIATE. A deferred transaction that reads
+  before it writes has to upgrade its lock; under WAL that upgrade fails at
+  once with "database is locked" when another connection got there first,
+  and busy_timeout cannot help. IMMEDIATE takes the write lock up front, so
+  concurrent writers queue on busy_timeout instead.
+* Threads of one process also queue on an in-process lock per database
+  before BEGIN IMMEDIATE, so they wait in turn rather than polling SQLite's
+  busy handler against each other. Other processes are still serialized by
+  SQLite itself.
+"""
+import threading
+
+from django.conf import settings
+from django.db.backends.sqlite3 import base
+
+DEFAULTS = {
+    'JOURNAL_MODE': 'WAL',
+    'SYNCHRONOUS': 'NORMAL',
+    'BUSY_TIMEOUT_MS': 5000,
+    'MMAP_SIZE': 256 * 1024 * 1024,
+    'CACHE_SIZE_KB': 64 * 1024,
+    'IMMEDIATE_TRANSACTIONS': True,
+    'SERIALIZE_WRITES': True,
+}
+
+_write_locks = {}
+_write_locks_guard = threading.Lock()
+
+
+def get_config():
+    return {**DEFAULTS, **getattr(settings, 'SQLITE', {})}
+
+
+def write_lock(name):
+    """The in-process lock serializing write transactions on database `name`"""
+    with _write_locks_guard:
+        return _write_locks.setdefault(str(name), threading.Lock())
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    holds_write_lock = False
+
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        config = get_config()
+        conn.execute(f'PRAGMA busy_timeout = {int(config["BUSY_TIMEOUT_MS"])}')
+        if not self.is_in_memory_db():
+            conn.execute(f'PRAGMA journal_mode = {config["JOURNAL_MODE"]}')
+            conn.execute(f'PRAGMA mmap_size = {int(config["MMAP_SIZE"])}')
+        conn.execute(f'PRAGMA synchronous = {config["SYNCHRONOUS"]}')
+        # Negative cache_size is in KiB rather than pages
+        conn.execute(f'PRAGMA cache_size = -{int(config["CACHE_SIZE_KB"])}')
+        return conn
+
+    def _start_transaction_under_autocommit(self):
+        config = get_config()
+        if not config['IMMEDIATE_TRANSACTIONS']:
+            return super()._start_transaction_under_autocommit()
+        if config['SERIALIZE_WRITES'] and not self.is_in_memory_db():
+            # On timeout carry on unlocked; BEGIN IMMEDIATE still waits on busy_timeout
+            self.holds_write_lock = write_lock(self.settings_dict['NAME']).acquire(
+                timeout=config['BUSY_TIMEOUT_MS'] / 1000
+            )
+        try:
+            self.cursor().execute('BEGIN IMMEDIATE')
+        except BaseException:
+            self.release_write_lock()
+            raise
+
+    def release_write_lock(self):
+        if self.holds_write_lock:
+            self.holds_write_lock = False
+            write_lock(self.settings_dict['NAME']).release()
+
+    def _set_autocommit(self, autocommit):
+        # The outermost atomic block ends (after COMMIT or ROLLBACK) by
+        # switching autocommit back on
+        try:
+            super()._set_autocommit(autocommit)
+        finally:
+            if autocommit:
+                self.release_write_lock()
+
+    def _close(self):
+        try:
+            return super()._close()
+        finally:
+            self.release_write_lock()
@@ -0,0 +1,72 @@
+"""
+Helpers for keeping list endpoints at a fixed number of queries.
+
+    from api.testing import assert_list_query_budget
+    assert_list_query_budget(client, '/api/sessions/')
+
+The budget defaults to the view's `list_query_budget` (see QueryPlanMixin).
+measure_request() is the building block of the bench_endpoints command.
+"""
+import time
+from contextlib import contextmanager
+from unittest import mock
+from urllib.parse import urlsplit
+
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import resolve
+from rest_framework.settings import api_settings
+
+
+NO_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}}
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+@contextmanager
+def assert_max_queries(budget, using=DEFAULT_DB_ALIAS, label=''):
+    """Fail when the wrapped block runs more than `budget` queries"""
+    with CaptureQueriesContext(connections[using]) as context:
+        yield context
+    if len(context) > budget:
+        statements = '\n'.join(
+            f'  {i}. {query["sql"]}' for i, query in enumerate(context.captured_queries, start=1)
+        )
+        raise QueryBudgetExceeded(
+            f'{label or "Block"} ran {len(context)} queries, budget is {budget}:\n{statements}'
+        )
+
+
+def assert_list_query_budget(client, url, budget=None, page_sizes=(1, 10, 50), using=DEFAULT_DB_ALIAS):
+    """
+    GET a list endpoint once per page size and fail if any response needs more
+    queries than the budget. Returns {page_size: query_count}. Caches are
+    disabled meanwhile, so every request is rendered from the database.
+    """
+    view_class = resolve(urlsplit(url).path).func.cls
+    if budget is None:
+        budget = view_class.list_query_budget
+    if budget is None:
+        raise ValueError(f'{view_class.__name__} declares no list_query_budget')
+    pagination_class = view_class.pagination_class or api_settings.DEFAULT_PAGINATION_CLASS
+
+    counts = {}
+    for page_size in page_sizes:
+        with mock.patch.object(pagination_class, 'page_size', page_size), override_settings(CACHES=NO_CACHES):
+            with assert_max_queries(budget, using, label=f'GET {url} (page_size={page_size})') as context:
+                response = client.get(url)
+        if response.status_code != 200:
+            raise AssertionError(f'GET {url} returned {response.status_code}')
+        counts[page_size] = len(context)
+    return counts
+
+
+def measure_request(client, method, url, data=None, using=DEFAULT_DB_ALIAS):
+    """Issue one request; returns (response, query_count, milliseconds)"""
+    with CaptureQueriesContext(connections[using]) as context:
+        start = time.perf_counter()
+        response = getattr(client, method.lower())(url, data, format='json')
+        elapsed = (time.perf_counter() - start) * 1000
+    return response, len(context), elapsed
@@ -0,0 +1,75 @@
+"""Fixtures shared by the api test modules"""
+import shutil
+import tempfile
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from ..models import Session, Skill
+
+# A private in-process cache instead of the shared file cache
+LOCMEM_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'api-tests',
+    }
+}
+
+
+@override_settings(
+    CACHES=LOCMEM_CACHES,
+    PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'],
+)
+class APITestCase(TestCase):
+    """TestCase with a clean cache and an autocomplete snapshot in a temp directory"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.snapshot_dir = tempfile.mkdtemp()
+        cls.autocomplete_settings = override_settings(AUTOCOMPLETE={
+            'SNAPSHOT_PATH': f'{cls.snapshot_dir}/autocomplete.json',
+            'CHECK_INTERVAL': 1.0,
+            'COMPACT_BYTES': 256 * 1024,
+            # The writer thread cannot see rows inside a test's transaction
+            'BACKGROUND_REFRESH': False,
+        })
+        cls.autocomplete_settings.enable()
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        cls.autocomplete_settings.disable()
+        shutil.rmtree(cls.snapshot_dir, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+
+    def create_user(self, username, mentor=False):
+        user = User.objects.create_user(username=username, password='password123')
+        if mentor:
+            user.profile.is_mentor = True
+            user.profile.save()
+        return user
+
+    def create_skill(self, name='Django'):
+        return Skill.objects.create(name=name, slug=name.lower())
+
+    def create_session(self, requester, mentor, hours=24, minutes=30, **fields):
+        """A session starting `hours` from now"""
+        return Session.objects.create(
+            requester=requester,
+            mentor=mentor,
+            scheduled_time=timezone.now() + timedelta(hours=hours),
+            duration_minutes=minutes,
+            **fields,
+        )
+
+    def client_for(self, user):
+        client = APIClient()
+        client.force_authenticate(user)
+        return client
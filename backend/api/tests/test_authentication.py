@@ -0,0 +1,65 @@
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import override_settings
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from ..authentication import CachedJWTAuthentication
+from .helpers import APITestCase
+
+
+class PrincipalCacheTests(APITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.user = self.create_user('learner')
+        self.token = AccessToken.for_user(self.user)
+        self.authentication = CachedJWTAuthentication()
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.token}')
+
+    def test_cached_principal_needs_no_queries(self):
+        self.authentication.get_user(self.token)
+        with self.assertNumQueries(0):
+            user = self.authentication.get_user(self.token)
+            self.assertEqual(user.profile.pk, self.user.profile.pk)
+
+    def test_principal_is_cached_for_the_token_lifetime(self):
+        with mock.patch.object(cache, 'set', wraps=cache.set) as cache_set:
+            self.authentication.get_user(self.token)
+        lifetime = api_settings.ACCESS_TOKEN_LIFETIME.total_seconds()
+        self.assertAlmostEqual(cache_set.call_args.kwargs['timeout'], lifetime, delta=5)
+
+    def test_deactivation_drops_the_principal(self):
+        self.authentication.get_user(self.token)
+        self.user.is_active = False
+        self.user.save()
+        with self.assertRaises(AuthenticationFailed):
+            self.authentication.get_user(self.token)
+
+    def test_deleted_user_is_refused(self):
+        self.client.get('/api/auth/me/')
+        User.objects.get(pk=self.user.pk).delete()
+        self.assertEqual(self.client.get('/api/auth/me/').status_code, 401)
+
+    @override_settings(AUTH_PRINCIPAL_CACHE={'ENABLED': True, 'RECHECK_ACTIVE': True})
+    def test_recheck_sees_deactivation_that_bypasses_signals(self):
+        self.authentication.get_user(self.token)
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        with self.assertNumQueries(1), self.assertRaises(AuthenticationFailed):
+            self.authentication.get_user(self.token)
+
+    def test_profile_change_drops_the_principal(self):
+        self.client.get('/api/auth/me/')
+        self.client.patch('/api/auth/me/', {'bio': 'New bio'}, format='json')
+        self.assertEqual(self.client.get('/api/auth/me/').data['profile']['bio'], 'New bio')
+
+    @override_settings(AUTH_PRINCIPAL_CACHE={'ENABLED': False})
+    def test_disabled_cache_loads_the_user_every_time(self):
+        self.authentication.get_user(self.token)
+        with self.assertNumQueries(1):
+            self.authentication.get_user(self.token)
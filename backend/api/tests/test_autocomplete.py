@@ -0,0 +1,84 @@
+import threading
+from pathlib import Path
+from unittest import mock
+
+from django.apps import apps
+from django.conf import settings
+from django.test import override_settings
+from rest_framework.test import APIClient
+
+from .. import autocomplete
+from ..autocomplete import AutocompleteIndex
+from .helpers import APITestCase
+
+
+class AutocompleteTests(APITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.create_skill('Django')
+        self.create_skill('Docker')
+        self.mentor = self.create_user('dana', mentor=True)
+        self.mentor.first_name, self.mentor.last_name = 'Dana', 'Scully'
+        self.mentor.save()
+        # A private index, so no trie carries over between tests
+        self.index = AutocompleteIndex()
+        patcher = mock.patch.object(autocomplete, 'index', self.index)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def suggest(self, query, **params):
+        response = APIClient().get('/api/autocomplete/', {'q': query, **params})
+        self.assertEqual(response.status_code, 200)
+        return [(item['type'], item['label']) for item in response.data['results']]
+
+    def test_prefix_matches_skills_and_mentor_names(self):
+        self.index.rebuild()
+        self.assertEqual(
+            sorted(self.suggest('d')),
+            [('mentor', 'Dana Scully'), ('skill', 'Django'), ('skill', 'Docker')],
+        )
+        self.assertEqual(self.suggest('scu'), [('mentor', 'Dana Scully')])
+        self.assertEqual(self.suggest('d', type='skill', limit=1), [('skill', 'Django')])
+
+    def test_invalid_type_is_rejected(self):
+        response = APIClient().get('/api/autocomplete/', {'q': 'd', 'type': 'session'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('error', response.data)
+
+    def test_committed_edits_are_appended_to_the_log(self):
+        self.index.rebuild()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.create_skill('Rust')
+        self.assertEqual(self.suggest('ru'), [('skill', 'Rust')])
+        # A worker that loads the snapshot later replays the log
+        other = AutocompleteIndex()
+        self.assertTrue(other.load_snapshot())
+        self.assertEqual([label for _, _, label in other.search('ru')], ['Rust'])
+
+    def test_refresh_runs_on_the_writer_thread(self):
+        threads = []
+        config = {**settings.AUTOCOMPLETE, 'BACKGROUND_REFRESH': True}
+        with override_settings(AUTOCOMPLETE=config), \
+                mock.patch.object(self.index, 'refresh', side_effect=lambda **ids: threads.append(
+                    (threading.current_thread().name, ids)
+                )):
+            with self.captureOnCommitCallbacks(execute=True):
+                skill = self.create_skill('Rust')
+            self.index.flush()
+        self.assertEqual(threads, [('autocomplete-writer', {'skill_ids': [skill.pk], 'mentor_ids': []})])
+
+    def test_start_loads_the_snapshot_in_the_background(self):
+        AutocompleteIndex().rebuild()
+        self.index.start()
+        self.index.worker.join()
+        self.assertEqual([label for _, _, label in self.index.search('doc')], ['Docker'])
+
+    def test_app_ready_does_not_load_the_index(self):
+        with mock.patch.object(AutocompleteIndex, 'load_snapshot') as load_snapshot:
+            apps.get_app_config('api').ready()
+        load_snapshot.assert_not_called()
+
+    @override_settings(AUTOCOMPLETE={})
+    def test_default_snapshot_lives_under_base_dir(self):
+        self.assertEqual(Path(AutocompleteIndex().path).parent, Path(settings.BASE_DIR))
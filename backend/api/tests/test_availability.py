@@ -0,0 +1,74 @@
+from rest_framework.test import APIClient
+
+from ..availability import normalize_availability
+from ..models import AvailabilityWindow
+from .helpers import APITestCase
+
+
+class NormalizeAvailabilityTests(APITestCase):
+
+    def test_windows_are_sorted_and_merged_per_day(self):
+        windows = normalize_availability([
+            {'day': 2, 'start': '13:00', 'end': '15:00'},
+            {'day': 2, 'start': '09:00', 'end': '12:00'},
+            {'day': 2, 'start': '12:00', 'end': '12:30'},
+            {'day': 0, 'start': '18:00', 'end': '24:00'},
+        ])
+        self.assertEqual(windows, [(0, 1080, 1440), (2, 540, 750), (2, 780, 900)])
+
+    def test_malformed_entries_raise_or_are_skipped(self):
+        entries = [{'day': 7, 'start': '09:00', 'end': '10:00'}, {'day': 1, 'start': '10:00', 'end': '11:00'}]
+        with self.assertRaises(ValueError):
+            normalize_availability(entries)
+        self.assertEqual(normalize_availability(entries, strict=False), [(1, 600, 660)])
+
+
+class MentorAvailabilitySearchTests(APITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.early = self.set_availability('early', [{'day': 2, 'start': '08:00', 'end': '12:00'}])
+        self.late = self.set_availability('late', [
+            {'day': 2, 'start': '13:00', 'end': '15:00'},
+            {'day': 2, 'start': '15:00', 'end': '18:00'},
+        ])
+
+    def set_availability(self, username, availability):
+        user = self.create_user(username, mentor=True)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client_for(user).patch('/api/auth/me/', {'availability': availability}, format='json')
+        self.assertEqual(response.status_code, 200)
+        return user
+
+    def mentors(self, **params):
+        response = APIClient().get('/api/mentors/', params)
+        self.assertEqual(response.status_code, 200)
+        return sorted(row['username'] for row in response.data['results'])
+
+    def test_profile_update_keeps_the_index_in_sync(self):
+        windows = AvailabilityWindow.objects.filter(profile__user=self.late)
+        self.assertEqual(list(windows.values_list('day', 'start_minute', 'end_minute')), [(2, 780, 1080)])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client_for(self.late).patch('/api/auth/me/', {'availability': []}, format='json')
+        self.assertFalse(windows.exists())
+
+    def test_filter_by_day_and_time_range(self):
+        self.assertEqual(self.mentors(day=2), ['early', 'late'])
+        self.assertEqual(self.mentors(day=3), [])
+        self.assertEqual(self.mentors(day=2, start='09:00', end='11:00'), ['early'])
+        # Touching windows were merged, so this spans both entries
+        self.assertEqual(self.mentors(day=2, start='14:00', end='16:00'), ['late'])
+        self.assertEqual(self.mentors(day=2, start='11:30', end='13:30'), [])
+        self.assertEqual(self.mentors(start='17:00'), ['late'])
+
+    def test_invalid_parameters_are_rejected(self):
+        for params in ({'day': 9}, {'start': '25:00'}, {'start': '15:00', 'end': '14:00'}):
+            response = APIClient().get('/api/mentors/', params)
+            self.assertEqual(response.status_code, 400, params)
+
+    def test_invalid_availability_is_not_saved(self):
+        response = self.client_for(self.early).patch(
+            '/api/auth/me/', {'availability': [{'day': 1, 'start': '10:00', 'end': '09:00'}]}, format='json'
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertTrue(AvailabilityWindow.objects.filter(profile__user=self.early).exists())
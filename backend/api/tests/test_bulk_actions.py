@@ -0,0 +1,81 @@
+from ..models import Session
+from ..session_states import TransitionError, bulk_transition
+from .helpers import APITestCase
+
+
+class BulkTransitionTests(APITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.learner = self.create_user('learner')
+        self.mentor = self.create_user('mentor', mentor=True)
+
+    def test_bulk_accept_keeps_the_earliest_of_overlapping_requests(self):
+        first = self.create_session(self.learner, self.mentor, hours=24, minutes=60)
+        overlapping = self.create_session(self.learner, self.mentor, hours=24.5)
+        later = self.create_session(self.learner, self.mentor, hours=26)
+
+        outcomes = bulk_transition('accept', self.mentor, [overlapping.pk, first.pk, later.pk])
+
+        self.assertEqual(list(outcomes), [overlapping.pk, first.pk, later.pk])
+        self.assertEqual(outcomes[first.pk].status, 'accepted')
+        self.assertEqual(outcomes[later.pk].status, 'accepted')
+        self.assertIsInstance(outcomes[overlapping.pk], TransitionError)
+        self.assertEqual(outcomes[overlapping.pk].code, 'conflict')
+
+    def test_bulk_accept_passes_unscheduled_requests_through(self):
+        unscheduled = Session.objects.create(requester=self.learner, mentor=self.mentor)
+        first = self.create_session(self.learner, self.mentor, minutes=60)
+        overlapping = self.create_session(self.learner, self.mentor, hours=24.5)
+
+        outcomes = bulk_transition('accept', self.mentor, [unscheduled.pk, overlapping.pk, first.pk])
+
+        self.assertEqual(outcomes[unscheduled.pk].status, 'accepted')
+        self.assertEqual(outcomes[first.pk].status, 'accepted')
+        self.assertEqual(outcomes[overlapping.pk].code, 'conflict')
+
+    def test_bulk_accept_reports_each_failure(self):
+        accepted = self.create_session(self.learner, self.mentor, status='accepted')
+        requested = self.create_session(self.learner, self.mentor, hours=48)
+
+        outcomes = bulk_transition('accept', self.mentor, [accepted.pk, requested.pk, 0])
+
+        self.assertEqual(outcomes[accepted.pk].code, 'invalid')
+        self.assertEqual(outcomes[requested.pk].status, 'accepted')
+        self.assertEqual(outcomes[0].code, 'not_found')
+
+    def test_bulk_cancel_endpoint(self):
+        sessions = [self.create_session(self.learner, self.mentor, hours=hours) for hours in (24, 48)]
+        completed = self.create_session(self.learner, self.mentor, hours=72, status='completed')
+        ids = [session.pk for session in sessions] + [completed.pk]
+
+        response = self.client_for(self.learner).post('/api/sessions/bulk_cancel/', {'ids': ids}, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        statuses = {row['id']: row['status'] for row in response.data['results']}
+        self.assertEqual(statuses, {sessions[0].pk: 200, sessions[1].pk: 200, completed.pk: 400})
+        self.assertEqual(
+            set(Session.objects.filter(pk__in=ids).values_list('status', flat=True)),
+            {'cancelled', 'completed'},
+        )
+
+    def test_bulk_accept_endpoint_renders_moved_sessions(self):
+        skill = self.create_skill('Django')
+        sessions = [self.create_session(self.learner, self.mentor, hours=hours, skill=skill) for hours in (24, 48)]
+
+        response = self.client_for(self.mentor).post(
+            '/api/sessions/bulk_accept/', {'ids': [session.pk for session in sessions]}, format='json'
+        )
+
+        self.assertEqual(response.status_code, 200)
+        for row in response.data['results']:
+            self.assertEqual(row['status'], 200)
+            self.assertEqual(row['session']['status'], 'accepted')
+            self.assertEqual(row['session']['requester']['username'], 'learner')
+            self.assertEqual(row['session']['skill']['slug'], 'django')
+
+    def test_bulk_endpoint_validates_ids(self):
+        client = self.client_for(self.mentor)
+        for ids in ([], 'x', [True], list(range(1, 102))):
+            response = client.post('/api/sessions/bulk_accept/', {'ids': ids}, format='json')
+            self.assertEqual(response.status_code, 400)
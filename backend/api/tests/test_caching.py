@@ -0,0 +1,53 @@
+from rest_framework.test import APIClient
+
+from .helpers import APITestCase
+
+
+class MentorDirectoryCacheTests(APITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.mentor = self.create_user('mentor', mentor=True)
+        self.learner = self.create_user('learner')
+        self.anonymous = APIClient()
+
+    def get_mentors(self):
+        response = self.anonymous.get('/api/mentors/')
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def patch_me(self, user, data):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client_for(user).patch('/api/auth/me/', data, format='json')
+        self.assertEqual(response.status_code, 200)
+
+    def test_repeated_request_is_a_hit(self):
+        self.assertEqual(self.get_mentors()['X-Cache'], 'MISS')
+        self.assertEqual(self.get_mentors()['X-Cache'], 'HIT')
+
+    def test_mentor_change_invalidates_the_list(self):
+        self.get_mentors()
+        self.patch_me(self.mentor, {'bio': 'Ten years of Django'})
+        response = self.get_mentors()
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['results'][0]['profile']['bio'], 'Ten years of Django')
+
+    def test_learner_change_keeps_the_list(self):
+        self.get_mentors()
+        self.patch_me(self.learner, {'bio': 'Learning Django', 'first_name': 'Lee'})
+        self.assertEqual(self.get_mentors()['X-Cache'], 'HIT')
+
+    def test_learner_becoming_a_mentor_invalidates_the_list(self):
+        self.get_mentors()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.learner.profile.is_mentor = True
+            self.learner.profile.save()
+        response = self.get_mentors()
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(len(response.data['results']), 2)
+
+    def test_new_skill_invalidates_the_list(self):
+        self.get_mentors()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.create_skill('Rust')
+        self.assertEqual(self.get_mentors()['X-Cache'], 'MISS')
@@ -0,0 +1,65 @@
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from ..models import Profile
+from .helpers import APITestCase
+
+
+class CurrentUserUpdateTests(APITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.user = self.create_user('learner')
+        self.client = self.client_for(self.user)
+
+    def patch(self, data):
+        with CaptureQueriesContext(connection) as queries:
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.patch('/api/auth/me/', data, format='json')
+        updates = [query['sql'] for query in queries if query['sql'].startswith('UPDATE')]
+        return response, updates
+
+    def test_profile_field_is_one_targeted_update(self):
+        response, updates = self.patch({'bio': 'Hello'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['profile']['bio'], 'Hello')
+        [update] = updates
+        self.assertTrue(update.startswith('UPDATE "api_profile" SET "bio" = '))
+        self.assertNotIn('"availability"', update)
+        self.assertEqual(Profile.objects.get(user=self.user).bio, 'Hello')
+
+    def test_user_field_leaves_the_profile_alone(self):
+        response, updates = self.patch({'first_name': 'Ada'})
+        self.assertEqual(response.data['first_name'], 'Ada')
+        [update] = updates
+        self.assertTrue(update.startswith('UPDATE "auth_user" SET "first_name" = '))
+        self.assertNotIn('"password"', update)
+
+    def test_user_and_profile_change_together(self):
+        response, updates = self.patch({'last_name': 'Lovelace', 'availability': []})
+        self.assertEqual(response.status_code, 200)
+        _, updates = self.patch({'last_name': 'Byron', 'bio': 'Poet'})
+        self.assertEqual(sorted(update.split(' SET ')[0] for update in updates), [
+            'UPDATE "api_profile"', 'UPDATE "auth_user"',
+        ])
+
+    def test_unchanged_values_write_nothing(self):
+        self.patch({'first_name': 'Ada', 'bio': 'Hello'})
+        response, updates = self.patch({'first_name': 'Ada', 'bio': 'Hello'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(updates, [])
+
+    def test_invalid_profile_data_writes_nothing(self):
+        response, updates = self.patch({
+            'first_name': 'Ada', 'availability': [{'day': 1, 'start': '10:00', 'end': '09:00'}],
+        })
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(updates, [])
+        self.assertEqual(User.objects.get(pk=self.user.pk).first_name, '')
+
+    def test_saving_a_user_skips_an_unchanged_profile(self):
+        user = User.objects.select_related('profile').get(pk=self.user.pk)
+        with CaptureQueriesContext(connection) as queries:
+            user.save(update_fields=['email'])
+        self.assertEqual([query['sql'].split(' SET ')[0] for query in queries], ['UPDATE "auth_user"'])
@@ -0,0 +1,64 @@
+from datetime import timedelta
+
+from ..models import Session
+from ..session_states import TransitionError, transition
+from .helpers import APITestCase
+
+
+class DoubleBookingTests(APITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.learner = self.create_user('learner')
+        self.mentor = self.create_user('mentor', mentor=True)
+        self.accepted = self.create_session(self.learner, self.mentor, minutes=60, status='accepted')
+
+    def test_end_time_follows_start_and_duration(self):
+        self.assertEqual(self.accepted.end_time, self.accepted.scheduled_time + timedelta(minutes=60))
+        self.accepted.duration_minutes = 15
+        self.accepted.save(update_fields=['duration_minutes'])
+        self.accepted.refresh_from_db()
+        self.assertEqual(self.accepted.end_time, self.accepted.scheduled_time + timedelta(minutes=15))
+
+    def test_conflicting_finds_overlaps_only(self):
+        start = self.accepted.scheduled_time
+        cases = [
+            (start - timedelta(minutes=30), start, False),
+            (start - timedelta(minutes=30), start + timedelta(minutes=1), True),
+            (start + timedelta(minutes=59), start + timedelta(minutes=90), True),
+            (self.accepted.end_time, self.accepted.end_time + timedelta(minutes=30), False),
+        ]
+        for begin, end, overlaps in cases:
+            self.assertEqual(Session.conflicting(self.mentor.pk, begin, end).exists(), overlaps)
+        self.assertFalse(
+            Session.conflicting(self.mentor.pk, start, start + timedelta(minutes=60), exclude_pk=self.accepted.pk).exists()
+        )
+
+    def test_request_for_a_taken_slot_is_rejected(self):
+        response = self.client_for(self.learner).post('/api/sessions/', {
+            'mentor_id': self.mentor.pk,
+            'scheduled_time': (self.accepted.scheduled_time + timedelta(minutes=30)).isoformat(),
+            'duration_minutes': 30,
+        }, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('scheduled_time', response.data)
+
+    def test_accept_rejects_overlap_with_accepted_session(self):
+        other = self.create_user('other')
+        overlapping = self.create_session(other, self.mentor, hours=24.5)
+        with self.assertRaises(TransitionError) as raised:
+            transition('accept', self.mentor, overlapping.pk)
+        self.assertEqual(raised.exception.code, 'conflict')
+        overlapping.refresh_from_db()
+        self.assertEqual(overlapping.status, 'requested')
+        response = self.client_for(self.mentor).post(f'/api/sessions/{overlapping.pk}/accept/')
+        self.assertEqual(response.status_code, 409)
+
+    def test_status_is_read_only_through_update(self):
+        requested = self.create_session(self.learner, self.mentor, hours=48)
+        response = self.client_for(self.mentor).patch(
+            f'/api/sessions/{requested.pk}/', {'status': 'accepted'}, format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+        requested.refresh_from_db()
+        self.assertEqual(requested.status, 'requested')
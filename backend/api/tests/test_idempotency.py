@@ -0,0 +1,102 @@
+import hashlib
+from datetime import timedelta
+
+from django.http import JsonResponse
+from django.test import RequestFactory
+from django.utils import timezone
+
+from ..middleware import IdempotencyMiddleware
+from ..models import IdempotencyRecord, Session
+from .helpers import APITestCase
+
+BODY = b'{"a": 1}'
+
+
+class IdempotencyMiddlewareTests(APITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.calls = 0
+        self.middleware = IdempotencyMiddleware(self.view)
+
+    def view(self, request):
+        self.calls += 1
+        response = JsonResponse({'id': 7}, status=201)
+        response['Location'] = '/api/sessions/7/'
+        return response
+
+    def post(self, body=BODY, key='key-1'):
+        request = RequestFactory().post(
+            '/api/sessions/', data=body, content_type='application/json', HTTP_X_IDEMPOTENCY_KEY=key
+        )
+        return self.middleware(request)
+
+    def pending_record(self, seconds):
+        request = RequestFactory().post('/api/sessions/')
+        return IdempotencyRecord.objects.create(
+            key_hash=self.middleware.hash_key(request, 'key-1'),
+            fingerprint=hashlib.sha256(BODY).hexdigest(),
+            expires_at=timezone.now() + timedelta(seconds=seconds),
+        )
+
+    def test_retry_replays_body_and_headers(self):
+        first = self.post()
+        retry = self.post()
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(retry.status_code, 201)
+        self.assertEqual(retry.content, first.content)
+        self.assertEqual(retry['Location'], '/api/sessions/7/')
+        self.assertEqual(retry['Idempotent-Replayed'], 'true')
+
+    def test_key_reused_with_another_body_is_rejected(self):
+        self.post()
+        self.assertEqual(self.post(body=b'{"a": 2}').status_code, 422)
+        self.assertEqual(self.calls, 1)
+
+    def test_other_keys_run_the_view(self):
+        self.post()
+        self.post(key='key-2')
+        self.assertEqual(self.calls, 2)
+
+    def test_retry_during_the_lease_gets_409(self):
+        self.pending_record(seconds=30)
+        response = self.post()
+        self.assertEqual(response.status_code, 409)
+        self.assertTrue(1 <= int(response['Retry-After']) <= 30)
+        self.assertEqual(self.calls, 0)
+
+    def test_retry_after_the_lease_takes_the_key_over(self):
+        stale = self.pending_record(seconds=-1)
+        response = self.post()
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(self.calls, 1)
+        record = IdempotencyRecord.objects.get()
+        self.assertNotEqual(record.pk, stale.pk)
+        self.assertEqual(record.status_code, 201)
+
+    def test_failed_request_releases_the_key(self):
+        self.middleware = IdempotencyMiddleware(lambda request: JsonResponse({}, status=400))
+        self.post()
+        self.assertFalse(IdempotencyRecord.objects.exists())
+
+
+class IdempotentSessionCreateTests(APITestCase):
+
+    def test_retried_session_request_creates_one_session(self):
+        learner = self.create_user('learner')
+        mentor = self.create_user('mentor', mentor=True)
+        client = self.client_for(learner)
+        payload = {
+            'mentor_id': mentor.pk,
+            'scheduled_time': (timezone.now() + timedelta(days=1)).isoformat(),
+            'duration_minutes': 30,
+        }
+
+        first = client.post('/api/sessions/', payload, format='json', HTTP_X_IDEMPOTENCY_KEY='create-1')
+        retry = client.post('/api/sessions/', payload, format='json', HTTP_X_IDEMPOTENCY_KEY='create-1')
+
+        self.assertEqual(first.status_code, 201)
+        self.assertEqual(retry.status_code, 201)
+        self.assertEqual(retry['Idempotent-Replayed'], 'true')
+        self.assertEqual(retry.json()['id'], first.json()['id'])
+        self.assertEqual(Session.objects.count(), 1)
@@ -0,0 +1,69 @@
+import json
+
+from django.conf import settings
+from django.test import AsyncClient, override_settings
+from rest_framework.test import APIClient
+
+from .helpers import APITestCase
+
+
+def metrics(**overrides):
+    return override_settings(REQUEST_METRICS={
+        'ENABLED': True, 'SAMPLE_RATE': 1.0, 'SERVER_TIMING': True,
+        'SLOW_REQUEST_MS': 60 * 1000, 'SLOW_QUERY_MS': 60 * 1000,
+        **overrides,
+    })
+
+
+class RequestMetricsTests(APITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.create_skill('Django')
+
+    def test_off_under_tests(self):
+        self.assertFalse(settings.REQUEST_METRICS['ENABLED'])
+        self.assertFalse(APIClient().get('/api/skills/').has_header('Server-Timing'))
+
+    @metrics()
+    def test_sampled_request_reports_timings_at_debug(self):
+        with self.assertLogs('api.requests', 'DEBUG') as logs:
+            response = APIClient().get('/api/skills/')
+        timing = response['Server-Timing']
+        for name in ('db;', 'view;', 'render;', 'serialize;', 'total;'):
+            self.assertIn(name, timing)
+        self.assertRegex(timing, r'db;dur=[\d.]+;desc="\d+ queries"')
+        [record] = logs.records
+        self.assertEqual(record.levelname, 'DEBUG')
+        line = json.loads(record.getMessage())
+        self.assertEqual((line['event'], line['path'], line['status'], line['slow']), ('request', '/api/skills/', 200, False))
+        self.assertGreaterEqual(line['queries'], 1)
+
+    @metrics(SAMPLE_RATE=0)
+    def test_unsampled_request_is_not_measured(self):
+        with self.assertNoLogs('api.requests', 'DEBUG'):
+            response = APIClient().get('/api/skills/')
+        self.assertFalse(response.has_header('Server-Timing'))
+
+    @metrics(SLOW_REQUEST_MS=0, SLOW_QUERY_MS=0)
+    def test_slow_requests_and_queries_are_warnings(self):
+        with self.assertLogs('api.requests', 'WARNING') as logs:
+            APIClient().get('/api/skills/')
+        events = [json.loads(record.getMessage()) for record in logs.records]
+        self.assertEqual(events[0]['event'], 'request')
+        self.assertTrue(events[0]['slow'])
+        self.assertTrue(all(event['event'] == 'slow_query' and event['sql'] for event in events[1:]))
+        self.assertGreater(len(events), 1)
+
+    @metrics(SAMPLE_RATE=0, SLOW_REQUEST_MS=0)
+    def test_slow_unsampled_request_is_logged(self):
+        with self.assertLogs('api.requests', 'WARNING') as logs:
+            APIClient().get('/api/skills/')
+        line = json.loads(logs.records[0].getMessage())
+        self.assertFalse(line['sampled'])
+
+    @metrics()
+    async def test_asgi_requests_are_measured(self):
+        response = await AsyncClient().get('/api/skills/')
+        self.assertEqual(response.status_code, 200)
+        self.assertRegex(response['Server-Timing'], r'db;dur=[\d.]+;desc="\d+ queries"')
@@ -0,0 +1,80 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from ..models import MentorCard, Rating
+from ..serializers import MentorListSerializer
+from .helpers import APITestCase
+
+
+class MentorCardTests(APITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.django = self.create_skill('Django')
+        self.learner = self.create_user('learner')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.mentor = self.create_user('mentor', mentor=True)
+            self.mentor.profile.skills.add(self.django)
+            self.other = self.create_user('other', mentor=True)
+
+    def card(self, user=None):
+        return MentorCard.objects.get(user=user or self.mentor)
+
+    def listed(self, query=''):
+        response = APIClient().get(f'/api/mentors/{query}')
+        self.assertEqual(response.status_code, 200)
+        return response.data['results']
+
+    def test_card_document_is_the_serialized_mentor(self):
+        card = self.card()
+        self.assertEqual(card.document, MentorListSerializer(self.mentor).data)
+        self.assertEqual((card.skill_names, card.skill_slugs), ('Django', 'django'))
+
+    def test_list_reads_cards_without_joins(self):
+        with CaptureQueriesContext(connection) as queries:
+            rows = self.listed()
+        self.assertEqual(sorted(row['username'] for row in rows), ['mentor', 'other'])
+        sql = '\n'.join(query['sql'] for query in queries)
+        for table in ('auth_user', 'api_profile_skills', 'api_skill'):
+            self.assertNotIn(f'"{table}"', sql)
+
+    def test_cards_follow_mentor_status(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client_for(self.other).patch('/api/auth/me/', {'is_mentor': False}, format='json')
+        self.assertFalse(MentorCard.objects.filter(user=self.other).exists())
+        self.assertEqual([row['username'] for row in self.listed()], ['mentor'])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client_for(self.learner).patch('/api/auth/me/', {'is_mentor': True}, format='json')
+        self.assertTrue(MentorCard.objects.filter(user=self.learner).exists())
+
+    def test_cards_follow_skill_and_rating_changes(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.django.name = 'Django REST'
+            self.django.save()
+        self.assertEqual(self.card().skill_names, 'Django REST')
+        session = self.create_session(self.learner, self.other, status='completed')
+        with self.captureOnCommitCallbacks(execute=True):
+            Rating.objects.create(session=session, rater=self.learner, score=5)
+        self.assertEqual((self.card(self.other).rating_avg, self.card(self.other).rating_count), (5.0, 1))
+        self.assertEqual([row['username'] for row in self.listed('?ordering=-profile__rating_avg')], ['other', 'mentor'])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.django.delete()
+        self.assertEqual(self.card().skill_names, '')
+
+    def test_cached_list_is_refreshed_after_a_change(self):
+        self.listed()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client_for(self.mentor).patch('/api/auth/me/', {'bio': 'Now teaching'}, format='json')
+        bios = {row['username']: row['profile']['bio'] for row in self.listed()}
+        self.assertEqual(bios['mentor'], 'Now teaching')
+
+    def test_rebuild_command_repairs_cards(self):
+        MentorCard.objects.filter(user=self.mentor).update(skill_names='', rating_count=9)
+        MentorCard.objects.filter(user=self.other).delete()
+        call_command('rebuild_mentor_cards', stdout=StringIO())
+        self.assertEqual((self.card().skill_names, self.card().rating_count), ('Django', 0))
+        self.assertTrue(MentorCard.objects.filter(user=self.other).exists())
@@ -0,0 +1,81 @@
+from datetime import timedelta
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from ..models import Message
+from .helpers import APITestCase
+
+
+class ChatDeltaSyncTests(APITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.learner = self.create_user('learner')
+        self.mentor = self.create_user('mentor', mentor=True)
+        self.session = self.create_session(self.learner, self.mentor, status='accepted')
+        self.messages = [
+            Message.objects.create(session=self.session, sender=self.learner, text=f'message {n}')
+            for n in range(3)
+        ]
+        self.client = self.client_for(self.learner)
+        self.url = f'/api/messages/?session={self.session.pk}'
+
+    def texts(self, query=''):
+        response = self.client.get(self.url + query)
+        self.assertEqual(response.status_code, 200)
+        return [row['text'] for row in response.data['results']]
+
+    def test_history_is_oldest_first(self):
+        self.assertEqual(self.texts(), ['message 0', 'message 1', 'message 2'])
+
+    def test_after_id_returns_only_newer_messages(self):
+        self.assertEqual(self.texts(f'&after_id={self.messages[0].pk}'), ['message 1', 'message 2'])
+        self.assertEqual(self.texts(f'&after_id={self.messages[2].pk}'), [])
+
+    def test_after_id_breaks_timestamp_ties_by_id(self):
+        Message.objects.update(timestamp=timezone.now())
+        self.assertEqual(self.texts(f'&after_id={self.messages[1].pk}'), ['message 2'])
+
+    def test_since_returns_messages_after_a_time(self):
+        now = timezone.now()
+        for n, message in enumerate(self.messages):
+            Message.objects.filter(pk=message.pk).update(timestamp=now + timedelta(minutes=n))
+        since = (now + timedelta(seconds=30)).isoformat().replace('+00:00', 'Z')
+        self.assertEqual(self.texts(f'&since={since}'), ['message 1', 'message 2'])
+
+    def test_invalid_delta_parameters_are_rejected(self):
+        self.assertEqual(self.client.get(self.url + '&after_id=abc').status_code, 400)
+        self.assertEqual(self.client.get(self.url + '&since=yesterday').status_code, 400)
+
+    def test_unchanged_chat_is_not_modified_without_reading_messages(self):
+        etag = self.client.get(self.url)['ETag']
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn(f'"{Message._meta.db_table}"', queries[0]['sql'])
+
+    def test_new_or_deleted_messages_change_the_etag(self):
+        etag = self.client.get(self.url)['ETag']
+        Message.objects.create(session=self.session, sender=self.mentor, text='reply')
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        etag = response['ETag']
+        self.messages[0].delete()
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_etag_depends_on_the_query(self):
+        self.assertNotEqual(
+            self.client.get(self.url)['ETag'],
+            self.client.get(self.url + f'&after_id={self.messages[0].pk}')['ETag'],
+        )
+
+    def test_outsiders_see_no_messages(self):
+        client = self.client_for(self.create_user('outsider'))
+        response = client.get(self.url)
+        self.assertEqual(response.data['results'], [])
+        self.assertFalse(response.has_header('ETag'))
@@ -0,0 +1,99 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.utils import timezone
+
+from ..models import Message, Session
+from ..pagination import KeysetPagination
+from .helpers import APITestCase
+
+
+class KeysetPaginationTests(APITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.learner = self.create_user('learner')
+        self.mentor = self.create_user('mentor', mentor=True)
+        other = self.create_user('other')
+        statuses = ['requested', 'accepted', 'completed', 'cancelled']
+        for index in range(12):
+            self.create_session(self.learner, self.mentor, hours=24 + index, status=statuses[index % 4])
+        for index in range(5):
+            self.create_session(other, self.mentor, hours=48 + index)
+        # Sessions created within one clock tick share created_at; ties are broken by id
+        now = timezone.now()
+        Session.objects.filter(pk__in=Session.objects.order_by('pk').values('pk')[:6]).update(created_at=now)
+        self.client = self.client_for(self.learner)
+
+    def pages(self, url, direction='next'):
+        """Every page from `url` onwards, following the `direction` links"""
+        pages = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            pages.append([row['id'] for row in response.data['results']])
+            url = response.data[direction]
+        return pages
+
+    def test_next_links_walk_the_ordered_query(self):
+        expected = list(
+            Session.objects.filter(requester=self.learner).order_by('-created_at', '-id').values_list('id', flat=True)
+        )
+        with mock.patch.object(KeysetPagination, 'page_size', 5):
+            pages = self.pages('/api/sessions/')
+        self.assertEqual([len(page) for page in pages], [5, 5, 2])
+        self.assertEqual([session_id for page in pages for session_id in page], expected)
+
+    def test_previous_links_return_the_same_pages(self):
+        with mock.patch.object(KeysetPagination, 'page_size', 5):
+            forward = self.pages('/api/sessions/')
+            last = self.client.get('/api/sessions/').data['next']
+            last = self.client.get(last).data['next']
+            backward = self.pages(last, direction='previous')
+        self.assertEqual(backward, forward[::-1])
+
+    def test_status_filter_and_mentor_view(self):
+        with mock.patch.object(KeysetPagination, 'page_size', 4):
+            upcoming = self.pages('/api/sessions/?type=upcoming')
+            mentor = self.client_for(self.mentor)
+            first = mentor.get('/api/sessions/').data
+        expected = list(
+            Session.objects.filter(requester=self.learner, status__in=['requested', 'accepted'])
+            .order_by('-created_at', '-id').values_list('id', flat=True)
+        )
+        self.assertEqual([session_id for page in upcoming for session_id in page], expected)
+        self.assertEqual(len(first['results']), 4)
+        self.assertIsNotNone(first['next'])
+        self.assertIsNone(first['previous'])
+
+    def test_page_parameter_falls_back_to_page_numbers(self):
+        response = self.client.get('/api/sessions/?page=1')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['count'], 12)
+
+    def test_invalid_cursor_is_not_found(self):
+        self.assertEqual(self.client.get('/api/sessions/?cursor=bogus').status_code, 404)
+
+
+class MessagePaginationTests(APITestCase):
+
+    def test_messages_page_oldest_first(self):
+        learner = self.create_user('learner')
+        mentor = self.create_user('mentor', mentor=True)
+        session = self.create_session(learner, mentor, status='accepted')
+        start = timezone.now() - timedelta(hours=1)
+        for index in range(7):
+            message = Message.objects.create(session=session, sender=learner, text=f'message {index}')
+            Message.objects.filter(pk=message.pk).update(timestamp=start + timedelta(minutes=index // 2))
+
+        client = self.client_for(mentor)
+        url = f'/api/messages/?session={session.pk}'
+        ids = []
+        with mock.patch.object(KeysetPagination, 'page_size', 3):
+            while url:
+                data = client.get(url).data
+                ids.extend(row['id'] for row in data['results'])
+                url = data['next']
+
+        expected = list(Message.objects.filter(session=session).order_by('timestamp', 'id').values_list('id', flat=True))
+        self.assertEqual(ids, expected)
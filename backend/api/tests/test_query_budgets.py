@@ -0,0 +1,45 @@
+from rest_framework.test import APIClient
+
+from ..models import Message, Rating
+from ..testing import QueryBudgetExceeded, assert_list_query_budget, assert_max_queries
+from .helpers import APITestCase
+
+
+class ListQueryBudgetTests(APITestCase):
+    """List endpoints cost the same number of queries whatever the page size"""
+
+    def setUp(self):
+        super().setUp()
+        self.learner = self.create_user('learner')
+        skills = [self.create_skill(name) for name in ('Django', 'React', 'Rust')]
+        for index in range(12):
+            mentor = self.create_user(f'mentor{index}', mentor=True)
+            mentor.profile.skills.set(skills[:index % 3 + 1])
+            session = self.create_session(self.learner, mentor, hours=24 + index, status='completed')
+            Rating.objects.create(session=session, rater=self.learner, score=4)
+            Message.objects.create(session=session, sender=self.learner, text='hello')
+        self.session = session
+        self.client = self.client_for(self.learner)
+
+    def test_sessions(self):
+        counts = assert_list_query_budget(self.client, '/api/sessions/')
+        self.assertEqual(set(counts), {1, 10, 50})
+
+    def test_ratings(self):
+        assert_list_query_budget(self.client, '/api/ratings/')
+
+    def test_messages(self):
+        assert_list_query_budget(self.client, f'/api/messages/?session={self.session.pk}')
+
+    def test_mentors(self):
+        assert_list_query_budget(APIClient(), '/api/mentors/')
+
+    def test_budget_overrun_lists_the_queries(self):
+        with self.assertRaises(QueryBudgetExceeded) as raised:
+            assert_list_query_budget(self.client, '/api/sessions/', budget=0)
+        self.assertIn('SELECT', str(raised.exception))
+
+    def test_assert_max_queries(self):
+        with assert_max_queries(1) as context:
+            list(Rating.objects.all())
+        self.assertEqual(len(context), 1)
@@ -0,0 +1,83 @@
+from io import StringIO
+
+from django.core.management import call_command
+
+from ..models import Profile, Rating
+from .helpers import APITestCase
+
+
+class RatingAggregateTests(APITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.learner = self.create_user('learner')
+        self.mentor = self.create_user('mentor', mentor=True)
+
+    def rate(self, score, **fields):
+        session = self.create_session(self.learner, self.mentor, status='completed', **fields)
+        return Rating.objects.create(session=session, rater=self.learner, score=score)
+
+    def aggregate(self, user=None):
+        profile = Profile.objects.get(user=user or self.mentor)
+        return profile.rating_sum, profile.rating_count, profile.rating_avg
+
+    def test_ratings_are_folded_into_the_mentor_aggregate(self):
+        self.rate(5)
+        self.rate(2, hours=48)
+        self.assertEqual(self.aggregate(), (7, 2, 3.5))
+
+    def test_edited_score_replaces_the_old_one(self):
+        rating = self.rate(5)
+        rating.score = 3
+        rating.save()
+        rating.save()
+        self.assertEqual(self.aggregate(), (3, 1, 3.0))
+
+    def test_deleted_rating_is_taken_back_out(self):
+        self.rate(4)
+        self.rate(2, hours=48).delete()
+        self.assertEqual(self.aggregate(), (4, 1, 4.0))
+        Rating.objects.get().delete()
+        self.assertEqual(self.aggregate(), (0, 0, 0.0))
+
+    def test_api_rates_completed_sessions_only(self):
+        session = self.create_session(self.learner, self.mentor, status='accepted')
+        client = self.client_for(self.learner)
+        response = client.post('/api/ratings/', {'session_id': session.pk, 'score': 5}, format='json')
+        self.assertEqual(response.status_code, 400)
+        session.status = 'completed'
+        session.save()
+        response = client.post('/api/ratings/', {'session_id': session.pk, 'score': 5}, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(self.aggregate(), (5, 1, 5.0))
+
+
+class RebuildRatingsTests(APITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.learner = self.create_user('learner')
+        self.mentor = self.create_user('mentor', mentor=True)
+        session = self.create_session(self.learner, self.mentor, status='completed')
+        Rating.objects.create(session=session, rater=self.learner, score=4)
+
+    def rebuild(self):
+        call_command('rebuild_ratings', stdout=StringIO())
+
+    def test_repairs_drifted_aggregates(self):
+        Profile.objects.filter(user=self.mentor).update(rating_sum=40, rating_count=3, rating_avg=13.3)
+        self.rebuild()
+        profile = Profile.objects.get(user=self.mentor)
+        self.assertEqual((profile.rating_sum, profile.rating_count, profile.rating_avg), (4, 1, 4.0))
+
+    def test_includes_rated_profiles_that_are_no_longer_mentors(self):
+        Profile.objects.filter(user=self.mentor).update(is_mentor=False, rating_sum=0, rating_count=0, rating_avg=0)
+        self.rebuild()
+        profile = Profile.objects.get(user=self.mentor)
+        self.assertEqual((profile.rating_sum, profile.rating_count, profile.rating_avg), (4, 1, 4.0))
+
+    def test_clears_stale_aggregates_without_ratings(self):
+        Profile.objects.filter(user=self.learner).update(rating_sum=9, rating_count=2, rating_avg=4.5)
+        self.rebuild()
+        profile = Profile.objects.get(user=self.learner)
+        self.assertEqual((profile.rating_sum, profile.rating_count, profile.rating_avg), (0, 0, 0.0))
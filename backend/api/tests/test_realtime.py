@@ -0,0 +1,86 @@
+import asyncio
+import json
+import shutil
+import tempfile
+from unittest import mock
+
+from asgiref.sync import sync_to_async
+from django.test import AsyncClient, override_settings
+
+from ..models import Message
+from ..realtime import MessageHub, UnixSocketBroker, encode_event, hub, issue_stream_token
+from .helpers import APITestCase
+
+
+def message_data(text):
+    return {'id': 7, 'session': 3, 'sender': None, 'text': text, 'timestamp': None}
+
+
+class EventEncodingTests(APITestCase):
+
+    def test_message_event_carries_the_message(self):
+        event_id, frame = encode_event(message_data('hello'))
+        self.assertEqual(event_id, 7)
+        self.assertTrue(frame.startswith('id: 7\nevent: message\ndata: '))
+        self.assertEqual(json.loads(frame.split('data: ', 1)[1])['text'], 'hello')
+
+    @override_settings(REALTIME={'MAX_EVENT_BYTES': 1024})
+    def test_oversized_message_is_sent_as_a_reference(self):
+        event_id, frame = encode_event(message_data('x' * 2000))
+        self.assertEqual(event_id, 7)
+        self.assertTrue(frame.startswith('id: 7\nevent: message-ref\ndata: '))
+        self.assertEqual(json.loads(frame.split('data: ', 1)[1]), {'id': 7, 'session': 3})
+
+    async def test_unix_broker_delivers_oversized_messages(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        local_hub = MessageHub()
+        broker = UnixSocketBroker(local_hub, directory)
+        self.addCleanup(lambda: broker._sock.close())
+        _, queue = local_hub.subscribe(3)
+        # Far over the 64 KB datagram limit before encoding
+        broker.publish(3, encode_event(message_data('x' * 100 * 1024)))
+        event_id, frame = await asyncio.wait_for(queue.get(), timeout=5)
+        self.assertEqual(event_id, 7)
+        self.assertIn('event: message-ref', frame)
+
+
+class SessionStreamTests(APITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.learner = self.create_user('learner')
+        self.mentor = self.create_user('mentor', mentor=True)
+        self.outsider = self.create_user('outsider')
+        self.session = self.create_session(self.learner, self.mentor)
+        self.url = f'/api/sessions/{self.session.pk}/stream/'
+
+    async def test_unauthenticated_stream_never_subscribes(self):
+        with mock.patch.object(hub, 'subscribe') as subscribe:
+            response = await AsyncClient().get(self.url)
+        self.assertEqual(response.status_code, 401)
+        subscribe.assert_not_called()
+
+    async def test_non_participant_stream_never_subscribes(self):
+        token = issue_stream_token(self.outsider.pk, self.session.pk)
+        with mock.patch.object(hub, 'subscribe') as subscribe:
+            response = await AsyncClient().get(self.url, {'token': token})
+        self.assertEqual(response.status_code, 404)
+        subscribe.assert_not_called()
+
+    async def test_participant_stream_replays_missed_messages(self):
+        message = await sync_to_async(Message.objects.create)(
+            session=self.session, sender=self.mentor, text='missed'
+        )
+        token = issue_stream_token(self.learner.pk, self.session.pk)
+        response = await AsyncClient().get(self.url, {'token': token, 'after_id': 0})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(hub.subscriber_count(self.session.pk), 1)
+        frames = response.streaming_content.__aiter__()
+        self.assertTrue((await frames.__anext__()).startswith(b'retry: '))
+        self.assertIn(f'id: {message.pk}\n'.encode(), await frames.__anext__())
+        # A None event closes the stream, which unsubscribes it
+        hub.dispatch(self.session.pk, None)
+        with self.assertRaises(StopAsyncIteration):
+            await asyncio.wait_for(frames.__anext__(), timeout=5)
+        self.assertEqual(hub.subscriber_count(self.session.pk), 0)
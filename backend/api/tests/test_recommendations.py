@@ -0,0 +1,72 @@
+from unittest import mock
+
+from django.contrib.auth.models import AnonymousUser
+
+from .. import recommendations
+from ..models import Rating
+from ..recommendations import MentorMatrix, recommend
+from .helpers import APITestCase
+
+
+class RecommendationTests(APITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.django = self.create_skill('Django')
+        self.react = self.create_skill('React')
+        self.learner = self.create_user('learner')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.both = self.create_user('both', mentor=True)
+            self.both.profile.skills.set([self.django, self.react])
+            self.backend = self.create_user('backend', mentor=True)
+            self.backend.profile.skills.set([self.django])
+            self.frontend = self.create_user('frontend', mentor=True)
+            self.frontend.profile.skills.set([self.react])
+        # A private matrix, so no state carries over between tests
+        self.matrix = MentorMatrix()
+        patcher = mock.patch.object(recommendations, 'matrix', self.matrix)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def ranked(self, skill_ids, user=None):
+        return [user_id for user_id, _ in recommend(user or AnonymousUser(), skill_ids)]
+
+    def test_mentors_are_ranked_by_requested_skill_coverage(self):
+        self.assertEqual(self.ranked([self.django.pk, self.react.pk])[0], self.both.pk)
+        self.assertCountEqual(self.ranked([self.django.pk]), [self.both.pk, self.backend.pk])
+        self.assertEqual(self.ranked([self.react.pk], user=self.frontend), [self.both.pk])
+
+    def test_learner_history_and_ratings_break_ties(self):
+        session = self.create_session(self.learner, self.backend, skill=self.django, status='completed')
+        with self.captureOnCommitCallbacks(execute=True):
+            Rating.objects.create(session=session, rater=self.learner, score=5)
+        self.assertEqual(self.ranked([]), [self.backend.pk, self.both.pk, self.frontend.pk])
+
+    def test_skill_changes_reload_only_that_mentor(self):
+        self.ranked([])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.frontend.profile.skills.add(self.django)
+        with mock.patch.object(self.matrix, 'rebuild', wraps=self.matrix.rebuild) as rebuild:
+            self.assertIn(self.frontend.pk, self.ranked([self.django.pk]))
+        rebuild.assert_not_called()
+
+    def test_deleted_skill_drops_out_of_every_mentor(self):
+        react_id = self.react.pk
+        self.assertTrue(self.ranked([react_id]))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.react.delete()
+        self.assertEqual(self.ranked([react_id]), [])
+
+    def test_endpoint_returns_scored_mentor_cards(self):
+        response = self.client_for(self.learner).get(
+            '/api/mentors/recommended/', {'skill_ids': f'{self.react.pk}', 'limit': 1}
+        )
+        self.assertEqual(response.status_code, 200)
+        [card] = response.data['results']
+        self.assertEqual(card['id'], self.both.pk)
+        self.assertGreater(card['score'], 0)
+
+    def test_endpoint_rejects_non_integer_ids(self):
+        response = self.client_for(self.learner).get('/api/mentors/recommended/', {'skill_ids': 'django'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('error', response.data)
@@ -0,0 +1,111 @@
+import shutil
+import tempfile
+from unittest import mock
+
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+from django.db.backends.sqlite3.base import DatabaseWrapper
+from django.test import override_settings
+from rest_framework.test import APIClient
+
+from .. import replicas
+from ..models import Skill
+from ..replicas import ReplicaPool, ReplicaRouter
+from .helpers import APITestCase
+
+
+class ReplicaPoolTests(APITestCase):
+
+    def setUp(self):
+        super().setUp()
+        aliases = ['replica_0', 'replica_1']
+        # Stand-in connections; replication_lag() is patched in every test
+        for patcher in (
+            mock.patch.object(replicas, 'replica_aliases', return_value=aliases),
+            mock.patch.object(replicas, 'connections', {alias: mock.Mock(alias=alias) for alias in aliases}),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.pool = ReplicaPool()
+
+    @override_settings(REPLICAS={'HEALTH_CHECK_INTERVAL': 0})
+    def test_round_robin_over_healthy_replicas(self):
+        with mock.patch.object(replicas, 'replication_lag', return_value=0):
+            self.assertEqual([self.pool.choose() for _ in range(4)], ['replica_0', 'replica_1'] * 2)
+
+    @override_settings(REPLICAS={'HEALTH_CHECK_INTERVAL': 0, 'MAX_LAG_SECONDS': 10})
+    def test_lagging_replicas_are_skipped(self):
+        lag = {'replica_0': 60, 'replica_1': 1}
+        with mock.patch.object(replicas, 'replication_lag', side_effect=lambda connection: lag[connection.alias]):
+            self.assertEqual([self.pool.choose() for _ in range(3)], ['replica_1'] * 3)
+
+    @override_settings(REPLICAS={'HEALTH_CHECK_INTERVAL': 0, 'RETRY_AFTER_SECONDS': 30})
+    def test_failed_replicas_are_marked_down(self):
+        with mock.patch.object(replicas, 'replication_lag', side_effect=DatabaseError):
+            self.assertIsNone(self.pool.choose())
+        replicas.connections['replica_0'].close.assert_called_once_with()
+        with mock.patch.object(replicas, 'replication_lag', return_value=0) as replication_lag:
+            self.assertIsNone(self.pool.choose())
+        replication_lag.assert_not_called()
+
+    def test_replicas_are_never_migrated_or_written(self):
+        router = ReplicaRouter()
+        self.assertIs(router.allow_migrate('replica_0', 'api'), False)
+        self.assertIsNone(router.allow_migrate(DEFAULT_DB_ALIAS, 'api'))
+        self.assertEqual(router.db_for_write(Skill), DEFAULT_DB_ALIAS)
+        # Outside a replica-reading view, reads use the primary
+        self.assertIsNone(router.db_for_read(Skill))
+
+
+# Responses expire at once, so every read reaches a database
+@override_settings(DATABASE_ROUTERS=['api.replicas.ReplicaRouter'], API_RESPONSE_CACHE_TIMEOUT=0)
+class ReplicaRoutingTests(APITestCase):
+    """A primary and a replica in two SQLite files that hold different skills"""
+
+    def setUp(self):
+        super().setUp()
+        self.create_skill('Primary')
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        settings_dict = {**connections[DEFAULT_DB_ALIAS].settings_dict, 'NAME': f'{directory}/replica.sqlite3'}
+        self.replica = DatabaseWrapper(settings_dict, alias='replica_0')
+        connections['replica_0'] = self.replica
+        self.addCleanup(delattr, connections._connections, 'replica_0')
+        self.addCleanup(self.replica.close)
+        with self.replica.schema_editor() as editor:
+            editor.create_model(Skill)
+        with self.replica.cursor() as cursor:
+            cursor.execute(
+                "INSERT INTO api_skill (name, slug, created_at) VALUES ('Replica', 'replica', '2024-01-01')"
+            )
+        for patcher in (
+            mock.patch.object(replicas, 'replica_aliases', return_value=['replica_0']),
+            mock.patch.object(replicas, 'pool', ReplicaPool()),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.user = self.create_user('learner')
+
+    def skill_names(self, client=None):
+        response = (client or APIClient()).get('/api/skills/')
+        self.assertEqual(response.status_code, 200)
+        return [row['name'] for row in response.data['results']]
+
+    def test_safe_reads_go_to_the_replica(self):
+        self.assertEqual(self.skill_names(), ['Replica'])
+        self.assertEqual(self.skill_names(self.client_for(self.user)), ['Replica'])
+
+    def test_reads_stay_on_the_primary_after_a_write(self):
+        client = self.client_for(self.user)
+        response = client.patch('/api/auth/me/', {'bio': 'Hello'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(replicas.is_pinned(self.user.pk))
+        self.assertEqual(self.skill_names(client), ['Primary'])
+        # Anonymous readers are unaffected
+        self.assertEqual(self.skill_names(), ['Replica'])
+
+    def test_failing_replica_falls_back_to_the_primary(self):
+        with self.replica.cursor() as cursor:
+            cursor.execute('DROP TABLE api_skill')
+        self.assertEqual(self.skill_names(), ['Primary'])
+        self.assertGreater(replicas.pool.down_until['replica_0'], 0)
+        self.assertEqual(self.skill_names(), ['Primary'])
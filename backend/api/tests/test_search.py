@@ -0,0 +1,68 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from ..search import FTS_TABLE, sqlite_fts_available
+from .helpers import APITestCase
+
+
+class MentorSearchTests(APITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.rust = self.create_skill('Rust')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.ada = self.create_user('ada', mentor=True)
+            self.client_for(self.ada).patch('/api/auth/me/', {
+                'first_name': 'Ada', 'last_name': 'Lovelace', 'bio': 'Analytical engines and compilers',
+                'skill_ids': [self.rust.pk],
+            }, format='json')
+            self.grace = self.create_user('grace', mentor=True)
+            self.client_for(self.grace).patch('/api/auth/me/', {
+                'first_name': 'Grace', 'last_name': 'Hopper', 'bio': 'Compilers and COBOL',
+            }, format='json')
+            # Learners are never listed, whatever they match
+            self.create_user('ada_learner')
+
+    def search(self, query):
+        response = APIClient().get('/api/mentors/', {'search': query})
+        self.assertEqual(response.status_code, 200)
+        return sorted(row['username'] for row in response.data['results'])
+
+    def test_matches_names_bio_and_skills(self):
+        self.assertEqual(self.search('lovelace'), ['ada'])
+        self.assertEqual(self.search('COMPILER'), ['ada', 'grace'])
+        self.assertEqual(self.search('rust'), ['ada'])
+        self.assertEqual(self.search('ada'), ['ada'])
+
+    def test_every_term_must_match(self):
+        self.assertEqual(self.search('compilers hopper'), ['grace'])
+        self.assertEqual(self.search('rust hopper'), [])
+
+    def test_short_terms_match_substrings(self):
+        self.assertEqual(self.search('Ho'), ['grace'])
+        self.assertEqual(self.search('ru engines'), ['ada'])
+
+    def test_documents_follow_profile_and_skill_changes(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client_for(self.grace).patch('/api/auth/me/', {'skill_ids': [self.rust.pk]}, format='json')
+        self.assertEqual(self.search('rust'), ['ada', 'grace'])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.rust.name = 'Zig'
+            self.rust.save()
+        self.assertEqual(self.search('rust'), [])
+        self.assertEqual(self.search('zig'), ['ada', 'grace'])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.rust.delete()
+        self.assertEqual(self.search('zig'), [])
+
+    def test_sqlite_uses_the_fts_index_without_joins(self):
+        if connection.vendor != 'sqlite':
+            self.skipTest('SQLite only')
+        self.assertTrue(sqlite_fts_available(connection.alias))
+        with CaptureQueriesContext(connection) as queries:
+            self.search('compilers')
+        sql = '\n'.join(query['sql'] for query in queries)
+        self.assertIn(f'{FTS_TABLE} MATCH', sql)
+        self.assertNotIn('DISTINCT', sql)
+        self.assertNotIn('api_profile_skills', sql)
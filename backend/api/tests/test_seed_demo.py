@@ -0,0 +1,34 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.db.models import Count
+
+from ..models import Message, Session
+from .helpers import APITestCase
+
+
+class SyntheticSeedTests(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        call_command(
+            'seed_demo', mentors=4, learners=20, sessions=3000, messages_per_session=2,
+            chunk_size=500, stdout=StringIO(),
+        )
+
+    def test_booked_sessions_never_overlap(self):
+        booked = Session.objects.filter(status__in=['accepted', 'completed']).order_by(
+            'mentor_id', 'scheduled_time'
+        ).values_list('mentor_id', 'scheduled_time', 'end_time')
+        self.assertTrue(booked)
+        previous = {}
+        for mentor_id, start, end in booked:
+            if mentor_id in previous:
+                self.assertGreaterEqual(start, previous[mentor_id])
+            previous[mentor_id] = end
+
+    def test_chat_version_counts_the_messages(self):
+        counts = dict(Message.objects.values_list('session').annotate(count=Count('id')))
+        self.assertTrue(counts)
+        for session_id, chat_version in Session.objects.values_list('pk', 'chat_version'):
+            self.assertEqual(chat_version, counts.get(session_id, 0))
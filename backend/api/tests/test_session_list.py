@@ -0,0 +1,72 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import Q
+from django.test.utils import CaptureQueriesContext
+
+from ..models import Session
+from .helpers import APITestCase
+
+
+class ParticipantSessionListTests(APITestCase):
+    """The UNION of per-(role, status) scans lists what the OR query would"""
+
+    def setUp(self):
+        super().setUp()
+        self.user = self.create_user('user', mentor=True)
+        statuses = ['requested', 'accepted', 'completed', 'cancelled']
+        for index in range(4):
+            other = self.create_user(f'other{index}', mentor=True)
+            for offset, status in enumerate(statuses):
+                self.create_session(self.user, other, hours=24 + index * 4 + offset, status=status)
+                self.create_session(other, self.user, hours=100 + index * 4 + offset, status=status)
+        # A session with yourself is listed once
+        self.create_session(self.user, self.user, hours=200, status='requested')
+        self.client = self.client_for(self.user)
+
+    def listed(self, query=''):
+        """Ids on every page, following the next links"""
+        ids, url = [], f'/api/sessions/{query}'
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            ids.extend(row['id'] for row in response.data['results'])
+            url = response.data['next']
+        return ids
+
+    def expected(self, **filters):
+        return list(
+            Session.objects.filter(Q(requester=self.user) | Q(mentor=self.user), **filters)
+            .order_by('-created_at', '-id').values_list('id', flat=True)
+        )
+
+    def test_matches_the_or_query(self):
+        self.assertEqual(self.listed(), self.expected())
+        self.assertEqual(self.listed('?status=accepted'), self.expected(status='accepted'))
+        self.assertEqual(self.listed('?type=past'), self.expected(status__in=['completed', 'cancelled']))
+        self.assertEqual(self.listed('?type=past&status=requested'), [])
+
+    def test_page_is_read_with_one_union_query(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get('/api/sessions/?type=upcoming')
+        unions = [query['sql'] for query in queries if 'UNION ALL' in query['sql']]
+        self.assertEqual(len(unions), 1)
+        # Two roles x two statuses
+        self.assertEqual(unions[0].count('UNION ALL'), 3)
+
+    def test_role_status_indexes_exist(self):
+        with connection.cursor() as cursor:
+            constraints = connection.introspection.get_constraints(cursor, Session._meta.db_table)
+        indexes = {tuple(spec['columns']) for spec in constraints.values() if spec['index']}
+        self.assertIn(('requester_id', 'status', 'created_at'), indexes)
+        self.assertIn(('mentor_id', 'status', 'created_at'), indexes)
+
+    def test_benchmark_command_reports_plans_and_latency(self):
+        out = StringIO()
+        call_command('bench_sessions', sessions=200, repeat=2, stdout=out)
+        output = out.getvalue()
+        self.assertIn('Plan: OR across requester/mentor', output)
+        self.assertIn('Plan: UNION ALL of index-ordered arms', output)
+        self.assertIn('keyset, page 50', output)
+        self.assertFalse(Session.objects.filter(requester__username__startswith='bench_sessions_').exists())
@@ -0,0 +1,84 @@
+from unittest import mock
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from ..models import Session
+from ..session_states import TransitionError, supports_update_returning, transition
+from .helpers import APITestCase
+
+
+class TransitionTests(APITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.learner = self.create_user('learner')
+        self.mentor = self.create_user('mentor', mentor=True)
+        self.stranger = self.create_user('stranger')
+        self.session = self.create_session(self.learner, self.mentor)
+
+    def assertTransitionError(self, code, action, user, session_id):
+        with self.assertRaises(TransitionError) as raised:
+            transition(action, user, session_id)
+        self.assertEqual(raised.exception.code, code)
+
+    def test_mentor_accepts_then_completes(self):
+        self.assertEqual(transition('accept', self.mentor, self.session.pk).status, 'accepted')
+        self.assertEqual(transition('complete', self.learner, self.session.pk).status, 'completed')
+        self.session.refresh_from_db()
+        self.assertEqual(self.session.status, 'completed')
+
+    def test_only_the_mentor_accepts(self):
+        self.assertTransitionError('forbidden', 'accept', self.learner, self.session.pk)
+
+    def test_non_participant_sees_not_found(self):
+        self.assertTransitionError('not_found', 'cancel', self.stranger, self.session.pk)
+
+    def test_complete_requires_accepted(self):
+        self.assertTransitionError('invalid', 'complete', self.mentor, self.session.pk)
+
+    def test_completed_session_cannot_be_cancelled(self):
+        Session.objects.filter(pk=self.session.pk).update(status='completed')
+        self.assertTransitionError('invalid', 'cancel', self.learner, self.session.pk)
+
+    def test_transition_endpoints_map_errors_to_status_codes(self):
+        url = f'/api/sessions/{self.session.pk}'
+        learner = self.client_for(self.learner)
+        mentor = self.client_for(self.mentor)
+        self.assertEqual(learner.post(f'{url}/accept/').status_code, 403)
+        self.assertEqual(mentor.post(f'{url}/complete/').status_code, 400)
+        self.assertEqual(self.client_for(self.stranger).post(f'{url}/cancel/').status_code, 404)
+        response = mentor.post(f'{url}/accept/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['status'], 'accepted')
+
+    def test_response_is_built_from_the_updated_row(self):
+        skill = self.create_skill('Django')
+        session = self.create_session(self.learner, self.mentor, hours=48, skill=skill)
+        client = self.client_for(self.mentor)
+        with CaptureQueriesContext(connection) as queries:
+            response = client.post(f'/api/sessions/{session.pk}/accept/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['requester']['username'], 'learner')
+        self.assertEqual(response.data['mentor']['is_mentor'], True)
+        self.assertEqual(response.data['skill'], {'id': skill.pk, 'name': 'Django', 'slug': 'django'})
+        self.assertIsNone(response.data['rating'])
+        statements = [query['sql'] for query in queries.captured_queries]
+        self.assertEqual(sum(sql.startswith('SELECT') for sql in statements), 1, statements)
+        self.assertEqual(sum(sql.startswith('UPDATE') for sql in statements), 1, statements)
+
+    def test_backends_without_update_returning_read_the_rows_back(self):
+        skill = self.create_skill('Django')
+        session = self.create_session(self.learner, self.mentor, hours=48, skill=skill)
+        with mock.patch('api.session_states.supports_update_returning', return_value=False):
+            response = self.client_for(self.mentor).post(f'/api/sessions/{session.pk}/accept/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['status'], 'accepted')
+        self.assertEqual(response.data['skill']['name'], 'Django')
+        self.assertEqual(response.data['mentor']['username'], 'mentor')
+
+    def test_update_returning_support_is_decided_per_vendor(self):
+        self.assertTrue(supports_update_returning(connection))
+        for vendor in ('mysql', 'oracle'):
+            with mock.patch.object(connection, 'vendor', vendor):
+                self.assertFalse(supports_update_returning(connection))
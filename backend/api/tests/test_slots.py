@@ -0,0 +1,100 @@
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.utils.dateparse import parse_datetime
+from rest_framework.test import APIClient
+
+from ..models import Session
+from ..slots import get_free_intervals, iter_slots, merge, subtract, unroll_weekly
+from .helpers import APITestCase
+
+# Every day, all day
+ALWAYS = [{'day': day, 'start': '00:00', 'end': '24:00'} for day in range(7)]
+
+
+class IntervalTests(APITestCase):
+
+    def test_merge_joins_overlapping_and_touching_intervals(self):
+        self.assertEqual(merge([(0, 10), (5, 20), (20, 30), (40, 50)]), [(0, 30), (40, 50)])
+
+    def test_subtract_cuts_busy_time_out_of_free_time(self):
+        free = [(0, 100), (200, 300)]
+        busy = [(10, 20), (90, 210), (250, 260), (400, 500)]
+        self.assertEqual(subtract(free, busy), [(0, 10), (20, 90), (210, 250), (260, 300)])
+
+    def test_weekly_windows_are_unrolled_onto_the_calendar(self):
+        monday = int(datetime(2024, 1, 1, tzinfo=dt_timezone.utc).timestamp())
+        week = 7 * 24 * 3600
+        intervals = unroll_weekly([(0, 540, 600), (2, 0, 1440)], monday, monday + 2 * week)
+        self.assertEqual(intervals[:2], [
+            (monday + 9 * 3600, monday + 10 * 3600),
+            (monday + 2 * 86400, monday + 3 * 86400),
+        ])
+        self.assertEqual(len(intervals), 4)
+
+    def test_slots_start_on_the_step_grid(self):
+        start = datetime(2024, 1, 1, 9, 7, tzinfo=dt_timezone.utc)
+        free = [(int(start.timestamp()), int((start + timedelta(hours=1)).timestamp()))]
+        slots = list(iter_slots(free, 30, now=start - timedelta(days=1), step_minutes=15))
+        self.assertEqual([slot.strftime('%H:%M') for slot, _ in slots], ['09:15', '09:30'])
+
+
+class MentorSlotsTests(APITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.learner = self.create_user('learner')
+        self.mentor = self.create_user('mentor', mentor=True)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client_for(self.mentor).patch('/api/auth/me/', {'availability': ALWAYS}, format='json')
+        self.url = f'/api/mentors/{self.mentor.pk}/slots/'
+
+    def book(self, start, minutes=30):
+        return Session.objects.create(
+            requester=self.learner, mentor=self.mentor, scheduled_time=start, duration_minutes=minutes
+        )
+
+    def slots(self, **params):
+        response = APIClient().get(self.url, params)
+        self.assertEqual(response.status_code, 200)
+        return [(parse_datetime(slot['start']), parse_datetime(slot['end'])) for slot in response.data['slots']]
+
+    def test_slots_skip_booked_sessions(self):
+        first_start = self.slots(limit=1)[0][0]
+        with self.captureOnCommitCallbacks(execute=True):
+            self.book(first_start, minutes=60)
+        slots = self.slots(duration=30, limit=4)
+        self.assertGreaterEqual(slots[0][0], first_start + timedelta(minutes=60))
+        self.assertEqual(slots[1][0] - slots[0][0], timedelta(minutes=15))
+
+    def test_cancelled_sessions_free_the_time_again(self):
+        first = self.slots(limit=1)
+        with self.captureOnCommitCallbacks(execute=True):
+            session = self.book(first[0][0])
+        self.assertNotEqual(self.slots(limit=1), first)
+        with self.captureOnCommitCallbacks(execute=True):
+            session.status = 'cancelled'
+            session.save()
+        self.assertEqual(self.slots(limit=1), first)
+
+    def test_free_time_is_cached_per_mentor(self):
+        availability = {self.mentor.pk: ALWAYS}
+        get_free_intervals(availability)
+        with self.assertNumQueries(0):
+            get_free_intervals(availability)
+
+    def test_invalid_duration_is_rejected(self):
+        for params in ({'duration': 20}, {'duration': 'long'}, {'limit': 0}):
+            response = APIClient().get(self.url, params)
+            self.assertEqual(response.status_code, 400, params)
+            self.assertIn('error', response.data)
+
+    def test_mentor_list_shows_the_next_slot(self):
+        response = APIClient().get('/api/mentors/')
+        [row] = response.data['results']
+        self.assertEqual(parse_datetime(row['next_slot']), self.slots(limit=1)[0][0])
+
+    def test_mentors_without_availability_have_no_slots(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            other = self.create_user('busy', mentor=True)
+        response = APIClient().get(f'/api/mentors/{other.pk}/slots/')
+        self.assertEqual(response.data['slots'], [])
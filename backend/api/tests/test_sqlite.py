@@ -0,0 +1,76 @@
+import shutil
+import sqlite3
+import tempfile
+from unittest import skipUnless
+
+from django.db import DEFAULT_DB_ALIAS, OperationalError, connections, transaction
+from django.test import override_settings
+
+from ..sqlite.base import DatabaseWrapper, write_lock
+from .helpers import APITestCase
+
+ALIAS = 'tuned_sqlite'
+
+
+@skipUnless(connections[DEFAULT_DB_ALIAS].vendor == 'sqlite', 'SQLite only')
+class TunedSQLiteTests(APITestCase):
+    """The api.sqlite engine on a database file of its own"""
+
+    def setUp(self):
+        super().setUp()
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        self.path = f'{directory}/db.sqlite3'
+        settings_dict = {**connections[DEFAULT_DB_ALIAS].settings_dict, 'ENGINE': 'api.sqlite', 'NAME': self.path}
+        self.connection = DatabaseWrapper(settings_dict, alias=ALIAS)
+        connections[ALIAS] = self.connection
+        self.addCleanup(delattr, connections._connections, ALIAS)
+        self.addCleanup(self.connection.close)
+        with self.connection.cursor() as cursor:
+            cursor.execute('CREATE TABLE counter (value INTEGER)')
+            cursor.execute('INSERT INTO counter VALUES (0)')
+
+    def pragma(self, name):
+        with self.connection.cursor() as cursor:
+            cursor.execute(f'PRAGMA {name}')
+            return cursor.fetchone()[0]
+
+    @override_settings(SQLITE={'BUSY_TIMEOUT_MS': 1234, 'CACHE_SIZE_KB': 2048})
+    def test_pragmas_are_applied_to_new_connections(self):
+        self.connection.close()
+        self.assertEqual(self.pragma('journal_mode'), 'wal')
+        self.assertEqual(self.pragma('synchronous'), 1)
+        self.assertEqual(self.pragma('busy_timeout'), 1234)
+        self.assertEqual(self.pragma('cache_size'), -2048)
+
+    def test_transactions_take_the_write_lock_up_front(self):
+        other = sqlite3.connect(self.path, timeout=0, isolation_level=None)
+        self.addCleanup(other.close)
+        with transaction.atomic(using=ALIAS):
+            # No write yet, but another writer is already locked out
+            self.assertTrue(write_lock(self.path).locked())
+            with self.assertRaises(sqlite3.OperationalError):
+                other.execute('BEGIN IMMEDIATE')
+        self.assertFalse(write_lock(self.path).locked())
+        other.execute('BEGIN IMMEDIATE')
+        other.execute('ROLLBACK')
+
+    def test_write_lock_is_released_after_a_rollback(self):
+        with self.assertRaises(OperationalError):
+            with transaction.atomic(using=ALIAS):
+                with self.connection.cursor() as cursor:
+                    cursor.execute('UPDATE counter SET value = value + 1')
+                    cursor.execute('SELECT * FROM missing_table')
+        self.assertFalse(write_lock(self.path).locked())
+        with self.connection.cursor() as cursor:
+            cursor.execute('SELECT value FROM counter')
+            self.assertEqual(cursor.fetchone()[0], 0)
+
+    @override_settings(SQLITE={'IMMEDIATE_TRANSACTIONS': False})
+    def test_deferred_transactions_can_be_configured(self):
+        other = sqlite3.connect(self.path, timeout=0, isolation_level=None)
+        self.addCleanup(other.close)
+        with transaction.atomic(using=ALIAS):
+            self.assertFalse(write_lock(self.path).locked())
+            other.execute('BEGIN IMMEDIATE')
+            other.execute('ROLLBACK')
@@ -3,7 +3,8 @@ from rest_framework.routers import DefaultRouter
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 
 from .views import (
-    register_view, current_user_view,
+    register_view, current_user_view, session_stream_view, cache_stats_view,
+    autocomplete_view,
     SkillViewSet, MentorViewSet, SessionViewSet, 
     RatingViewSet, MessageViewSet,
 )
@@ -22,6 +23,15 @@ urlpatterns = [
     path('auth/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
     path('auth/me/', current_user_view, name='current_user'),
     
+    # Skill and mentor name suggestions (in-memory prefix trie)
+    path('autocomplete/', autocomplete_view, name='autocomplete'),
+    
+    # Response cache counters (staff only)
+    path('cache/stats/', cache_stats_view, name='cache_stats'),
+    
+    # Real-time chat (Server-Sent Events, ASGI only)
+    path('sessions/<int:pk>/stream/', session_stream_view, name='session_stream'),
+    
     # Router endpoints
     path('', include(router.urls)),
 ]
@@ -1,19 +1,46 @@
-from rest_framework import viewsets, status, filters
-from rest_framework.decorators import api_view, permission_classes, action
+import asyncio
+import hashlib
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+from rest_framework import viewsets, status, filters, serializers
+from rest_framework.decorators import api_view, authentication_classes, permission_classes, action
 from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticated, AllowAny
+from rest_framework.permissions import IsAuthenticated, AllowAny, IsAdminUser
 from rest_framework_simplejwt.views import TokenObtainPairView
+from rest_framework.exceptions import AuthenticationFailed
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import JsonResponse, StreamingHttpResponse
 from django.contrib.auth.models import User
 from django_filters.rest_framework import DjangoFilterBackend
-from django.db.models import Q
+from django.db import transaction
+from django.db.models import Q, Exists, OuterRef
+from django.urls import reverse
+from django.utils.dateparse import parse_datetime
+from django.utils.http import urlencode
+from rest_framework.exceptions import ValidationError
 
-from .models import Profile, Skill, Session, Rating, Message
+from .models import Profile, Skill, Session, Rating, Message, AvailabilityWindow, MentorCard
+from .availability import parse_day, parse_time
 from .serializers import (
     UserSerializer, RegisterSerializer, ProfileSerializer,
     SkillSerializer, SessionSerializer, RatingSerializer,
-    MessageSerializer, MentorListSerializer
+    MessageSerializer, MentorCardSerializer
 )
 from .permissions import IsMentorOrReadOnly, IsSessionParticipant
+from .pagination import KeysetPagination, MessageKeysetPagination
+from .mixins import QueryPlanMixin
+from .authentication import CachedJWTAuthentication
+from .slots import get_free_intervals, iter_slots, next_slot
+from .recommendations import recommend
+from .session_states import MAX_BULK_SESSIONS, TransitionError, bulk_transition, load_related, transition
+from .search import MentorSearchFilter
+from .mentor_cards import MentorCardOrderingFilter
+from . import autocomplete
+from .caching import CachedResponseMixin, get_stats
+from .replicas import ReplicaReadMixin
+from .realtime import hub, encode_event, get_broker, issue_stream_token, read_stream_token
 
 
 @api_view(['POST'])
@@ -43,78 +70,239 @@ def current_user_view(request):
         return Response(serializer.data)
     
     elif request.method == 'PATCH':
-        # Update user fields
-        user_fields = ['first_name', 'last_name', 'email']
-        for field in user_fields:
-            if field in request.data:
-                setattr(user, field, request.data[field])
-        user.save()
+        # Diff against the stored rows, not the (possibly stale) cached principal
+        user = User.objects.select_related('profile').get(pk=user.pk)
         
-        # Update profile fields
+        # Validate the profile part before writing anything
         profile_data = {}
         profile_fields = ['bio', 'is_mentor', 'availability', 'skill_ids']
         for field in profile_fields:
             if field in request.data:
                 profile_data[field] = request.data[field]
         
+        profile_serializer = None
         if profile_data:
             profile_serializer = ProfileSerializer(
                 user.profile, 
                 data=profile_data, 
                 partial=True
             )
-            if profile_serializer.is_valid():
-                profile_serializer.save()
-            else:
+            if not profile_serializer.is_valid():
                 return Response(profile_serializer.errors, status=status.HTTP_400_BAD_REQUEST)
         
+        # Only fields whose value actually changes are written
+        user_fields = ['first_name', 'last_name', 'email']
+        changed_user_fields = []
+        for field in user_fields:
+            if field in request.data and getattr(user, field) != request.data[field]:
+                setattr(user, field, request.data[field])
+                changed_user_fields.append(field)
+        
+        with transaction.atomic():
+            if changed_user_fields:
+                user.save(update_fields=changed_user_fields)
+            if profile_serializer is not None:
+                profile_serializer.save()
+        
         # Return updated user
         serializer = UserSerializer(user)
         return Response(serializer.data)
 
 
-class SkillViewSet(viewsets.ReadOnlyModelViewSet):
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def cache_stats_view(request):
+    """Hit/miss counters for the mentor and skill response cache"""
+    return Response(get_stats())
+
+
+@api_view(['GET'])
+@authentication_classes([])
+@permission_classes([AllowAny])
+def autocomplete_view(request):
+    """Skill and mentor name suggestions for a typed prefix (?q=dja&type=skill&limit=8)"""
+    kinds = tuple(request.query_params.getlist('type')) or autocomplete.KINDS
+    try:
+        limit = min(int(request.query_params.get('limit', 8)), 50)
+    except ValueError:
+        return Response({'error': 'limit must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+    if not set(kinds) <= set(autocomplete.KINDS):
+        return Response(
+            {'error': f"type must be one of: {', '.join(autocomplete.KINDS)}"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    items = autocomplete.index.search(request.query_params.get('q', ''), limit=limit, kinds=kinds)
+    return Response({
+        'results': [{'type': kind, 'id': pk, 'label': label} for kind, pk, label in items],
+    })
+
+
+class SkillViewSet(ReplicaReadMixin, CachedResponseMixin, QueryPlanMixin, viewsets.ReadOnlyModelViewSet):
     """List and retrieve skills"""
     queryset = Skill.objects.all()
     serializer_class = SkillSerializer
     permission_classes = [AllowAny]
+    list_query_budget = 2
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
     search_fields = ['name']
     ordering_fields = ['name']
+    
+    def get_cache_scopes(self):
+        return ('skills',)
 
 
-class MentorViewSet(viewsets.ReadOnlyModelViewSet):
+class MentorViewSet(ReplicaReadMixin, CachedResponseMixin, QueryPlanMixin, viewsets.ReadOnlyModelViewSet):
     """
-    List mentors with filtering by skill, search, and availability
+    List mentors with filtering by skill, search, and availability.
+    Served from the denormalized MentorCard read model (see api.mentor_cards).
     """
-    serializer_class = MentorListSerializer
+    serializer_class = MentorCardSerializer
     permission_classes = [AllowAny]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
-    search_fields = ['username', 'first_name', 'last_name']
+    # count, cards, sessions for mentors whose slots are not cached
+    list_query_budget = 3
+    # ?search= matches names, bio and skill names through an index (see api.search)
+    filter_backends = [DjangoFilterBackend, MentorSearchFilter, MentorCardOrderingFilter]
     ordering_fields = ['profile__rating_avg', 'username']
     ordering = ['-profile__rating_avg']
     
+    def get_cache_scopes(self):
+        if self.action == 'retrieve':
+            return ('skills', f"mentor:{self.kwargs.get('pk')}")
+        return ('skills', 'mentor-list')
+    
+    def list(self, request, *args, **kwargs):
+        response = super().list(request, *args, **kwargs)
+        if response.status_code == 200:
+            data = response.data
+            self.attach_next_slots(data['results'] if isinstance(data, dict) else data)
+        return response
+    
+    def retrieve(self, request, *args, **kwargs):
+        response = super().retrieve(request, *args, **kwargs)
+        if response.status_code == 200:
+            self.attach_next_slots([response.data])
+        return response
+    
+    def attach_next_slots(self, rows):
+        """
+        Add next_slot after the response cache, which is invalidated by directory
+        changes only; slots have their own per-mentor cache.
+        """
+        free = get_free_intervals({
+            row['id']: row['profile']['availability'] for row in rows if row.get('profile')
+        })
+        field = serializers.DateTimeField()
+        for row in rows:
+            start = next_slot(free.get(row['id'], []))
+            row['next_slot'] = field.to_representation(start) if start else None
+    
+    @action(detail=False, methods=['get'])
+    def recommended(self, request):
+        """Mentors ranked for the requested skills and the learner's history (?skill_ids=1,2&limit=10)"""
+        try:
+            skill_ids = [int(value) for value in request.query_params.get('skill_ids', '').split(',') if value]
+            limit = min(int(request.query_params.get('limit', 10)), 50)
+        except ValueError:
+            return Response(
+                {'error': 'skill_ids and limit must be integers'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        ranked = recommend(request.user, skill_ids, limit=limit)
+        cards = MentorCard.objects.in_bulk([user_id for user_id, _ in ranked])
+        results = []
+        for user_id, score in ranked:
+            if user_id in cards:
+                results.append({**cards[user_id].document, 'score': score})
+        return Response({'skill_ids': skill_ids, 'results': results})
+    
+    @action(detail=True, methods=['get'])
+    def slots(self, request, pk=None):
+        """Bookable slots for this mentor (?duration=30&limit=20)"""
+        try:
+            duration = int(request.query_params.get('duration', 30))
+            limit = min(int(request.query_params.get('limit', 20)), 200)
+        except ValueError:
+            return Response(
+                {'error': 'duration and limit must be integers'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if duration not in dict(Session.DURATION_CHOICES) or limit < 1:
+            return Response(
+                {'error': 'Invalid duration or limit'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        card = self.get_object()
+        availability = card.document['profile']['availability']
+        free = get_free_intervals({card.pk: availability})[card.pk]
+        field = serializers.DateTimeField()
+        slots = [
+            {'start': field.to_representation(start), 'end': field.to_representation(end)}
+            for start, end in islice(iter_slots(free, duration), limit)
+        ]
+        return Response({
+            'mentor_id': card.pk,
+            'duration_minutes': duration,
+            'slots': slots,
+        })
+    
     def get_queryset(self):
-        queryset = User.objects.filter(profile__is_mentor=True).select_related('profile')
+        queryset = MentorCard.objects.all()
         
         # Filter by skill
         skill = self.request.query_params.get('skill', None)
         if skill:
-            queryset = queryset.filter(profile__skills__name__icontains=skill)
+            queryset = queryset.filter(skill_names__icontains=skill)
         
-        # Filter by skill ID
+        # Filter by skill ID (EXISTS, so mentors are not duplicated per skill)
         skill_id = self.request.query_params.get('skill_id', None)
         if skill_id:
-            queryset = queryset.filter(profile__skills__id=skill_id)
+            queryset = queryset.filter(Exists(
+                Profile.skills.through.objects.filter(profile_id=OuterRef('profile_id'), skill_id=skill_id)
+            ))
         
-        # Filter by availability (placeholder - would need more complex logic)
+        # Filter by availability
         available = self.request.query_params.get('available', None)
         if available:
-            queryset = queryset.exclude(profile__availability=[])
+            queryset = queryset.filter(available_days__gt=0)
+        
+        # Filter by weekly availability window (?day=2&start=14:00&end=15:00)
+        windows = self.get_availability_windows()
+        if windows is not None:
+            queryset = queryset.filter(Exists(windows.filter(profile_id=OuterRef('profile_id'))))
+        
+        return queryset
+    
+    def get_availability_windows(self):
+        """Build the AvailabilityWindow lookup for the day/start/end query params"""
+        params = self.request.query_params
+        day, start, end = params.get('day'), params.get('start'), params.get('end')
+        if not (day or start or end):
+            return None
         
-        return queryset.distinct()
+        try:
+            day = parse_day(day) if day else None
+            start = parse_time(start) if start else None
+            end = parse_time(end) if end else None
+        except ValueError as exc:
+            raise ValidationError({'availability': str(exc)})
+        if start is not None and end is not None and start >= end:
+            raise ValidationError({'availability': 'start must be before end.'})
+        
+        windows = AvailabilityWindow.objects.all()
+        if day is not None:
+            windows = windows.filter(day=day)
+        if start is not None and end is not None:
+            windows = windows.filter(start_minute__lte=start, end_minute__gte=end)
+        elif start is not None:
+            windows = windows.filter(start_minute__lte=start, end_minute__gt=start)
+        elif end is not None:
+            windows = windows.filter(start_minute__lt=end, end_minute__gte=end)
+        return windows
 
-class SessionViewSet(viewsets.ModelViewSet):
+class SessionViewSet(QueryPlanMixin, viewsets.ModelViewSet):
     """
     CRUD operations for sessions
     - List: shows user's sessions (as requester or mentor)
@@ -124,85 +312,176 @@ class SessionViewSet(viewsets.ModelViewSet):
     """
     serializer_class = SessionSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = KeysetPagination
+    select_related_fields = (
+        'requester__profile', 'mentor__profile', 'skill', 'rating__rater__profile',
+    )
+    # The UNION ALL of per-(role, status) index scans, plus the row fetch
+    list_query_budget = 2
     filter_backends = [filters.OrderingFilter]
     ordering_fields = ['created_at', 'scheduled_time', 'status']
     ordering = ['-created_at']
+    SESSION_TYPES = {
+        'upcoming': ['requested', 'accepted'],
+        'past': ['completed', 'cancelled'],
+    }
     
     def get_queryset(self):
         user = self.request.user
         queryset = Session.objects.filter(
             Q(requester=user) | Q(mentor=user)
-        ).select_related('requester', 'mentor', 'skill')
+        )
+        
+        statuses = self.get_status_filter()
+        if statuses is not None:
+            queryset = queryset.filter(status__in=statuses)
+        
+        return queryset
+    
+    def get_status_filter(self):
+        """Statuses selected by the status/type query params, or None for all"""
+        statuses = None
         
         # Filter by status
         status_param = self.request.query_params.get('status', None)
         if status_param:
-            queryset = queryset.filter(status=status_param)
+            statuses = [status_param]
         
         # Filter by type (upcoming/past)
         session_type = self.request.query_params.get('type', None)
-        if session_type == 'upcoming':
-            queryset = queryset.filter(status__in=['requested', 'accepted'])
-        elif session_type == 'past':
-            queryset = queryset.filter(status__in=['completed', 'cancelled'])
+        if session_type in self.SESSION_TYPES:
+            allowed = self.SESSION_TYPES[session_type]
+            statuses = [s for s in (statuses or allowed) if s in allowed]
         
-        return queryset
+        return statuses
+    
+    def get_keyset_arms(self):
+        """
+        One (role, status) branch per (requester|mentor, status, created_at) index
+        entry, so the paginator can UNION index-ordered scans instead of running
+        an OR across two foreign keys.
+        """
+        user = self.request.user
+        statuses = self.get_status_filter()
+        if statuses is None:
+            statuses = [value for value, _ in Session.STATUS_CHOICES]
+        arms = []
+        for status_value in statuses:
+            arms.append(Session.objects.filter(requester=user, status=status_value))
+            arms.append(Session.objects.filter(mentor=user, status=status_value).exclude(requester=user))
+        return arms
     
     def get_permissions(self):
         if self.action in ['update', 'partial_update']:
             return [IsAuthenticated(), IsMentorOrReadOnly()]
         return [IsAuthenticated()]
     
+    TRANSITION_ERROR_STATUS = {
+        'not_found': status.HTTP_404_NOT_FOUND,
+        'forbidden': status.HTTP_403_FORBIDDEN,
+        'invalid': status.HTTP_400_BAD_REQUEST,
+        'conflict': status.HTTP_409_CONFLICT,
+    }
+    
+    def transition_response(self, action_name, pk):
+        """Apply a state-machine transition (see api.session_states) and render the session"""
+        try:
+            session_id = int(pk)
+        except (TypeError, ValueError):
+            return Response({'error': 'Session not found'}, status=status.HTTP_404_NOT_FOUND)
+        try:
+            session = transition(action_name, self.request.user, session_id)
+        except TransitionError as exc:
+            return Response({'error': exc.message}, status=self.TRANSITION_ERROR_STATUS[exc.code])
+        serializer = self.get_serializer(load_related([session])[0])
+        return Response(serializer.data)
+    
     @action(detail=True, methods=['post'], permission_classes=[IsAuthenticated])
     def accept(self, request, pk=None):
-        """Mentor accepts a session request and assigns a meeting link if missing"""
-        session = self.get_object()
-        if session.mentor != request.user:
-            return Response(
-                {'error': 'Only the mentor can accept this session'},
-                status=status.HTTP_403_FORBIDDEN
-            )
-        if session.status != 'requested':
-            return Response(
-                {'error': 'Session is not in requested state'},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-        
-        session.status = 'accepted'
-        session.save()
-        serializer = self.get_serializer(session)
-        return Response(serializer.data)
+        """Mentor accepts a session request"""
+        return self.transition_response('accept', pk)
     
     @action(detail=True, methods=['post'], permission_classes=[IsAuthenticated])
     def complete(self, request, pk=None):
         """Mark session as completed"""
-        session = self.get_object()
-        if session.mentor != request.user and session.requester != request.user:
+        return self.transition_response('complete', pk)
+    
+    @action(detail=True, methods=['post'], permission_classes=[IsAuthenticated])
+    def cancel(self, request, pk=None):
+        """Either participant cancels a requested or accepted session"""
+        return self.transition_response('cancel', pk)
+    
+    def bulk_transition_response(self, action_name):
+        """Apply a transition to `ids` in one transaction and report per-ID results"""
+        ids = self.request.data.get('ids')
+        if (
+            not isinstance(ids, list) or not ids
+            or not all(isinstance(value, int) and not isinstance(value, bool) for value in ids)
+        ):
             return Response(
-                {'error': 'Only session participants can complete the session'},
-                status=status.HTTP_403_FORBIDDEN
+                {'error': 'ids must be a non-empty list of session IDs'},
+                status=status.HTTP_400_BAD_REQUEST
             )
-        if session.status != 'accepted':
+        if len(ids) > MAX_BULK_SESSIONS:
             return Response(
-                {'error': 'Session must be accepted before completion'},
+                {'error': f'At most {MAX_BULK_SESSIONS} sessions can be updated at once'},
                 status=status.HTTP_400_BAD_REQUEST
             )
-        
-        session.status = 'completed'
-        session.save()
-        serializer = self.get_serializer(session)
-        return Response(serializer.data)
+        outcomes = bulk_transition(action_name, self.request.user, ids)
+        sessions = {
+            session.pk: session
+            for session in load_related([outcome for outcome in outcomes.values() if isinstance(outcome, Session)])
+        }
+        results = []
+        for session_id, outcome in outcomes.items():
+            if isinstance(outcome, TransitionError):
+                results.append({
+                    'id': session_id,
+                    'status': self.TRANSITION_ERROR_STATUS[outcome.code],
+                    'error': outcome.message,
+                })
+            else:
+                results.append({
+                    'id': session_id,
+                    'status': status.HTTP_200_OK,
+                    'session': self.get_serializer(sessions[session_id]).data,
+                })
+        return Response({'results': results})
+    
+    @action(detail=True, methods=['post'], url_path='stream-token', permission_classes=[IsAuthenticated])
+    def stream_token(self, request, pk=None):
+        """Short-lived ticket for opening the chat stream with EventSource (?token=)"""
+        session = self.get_object()
+        token = issue_stream_token(request.user.pk, session.pk)
+        return Response({
+            'token': token,
+            'expires_in': settings.REALTIME.get('STREAM_TOKEN_SECONDS', 60),
+            'url': f"{reverse('session_stream', args=[session.pk])}?{urlencode({'token': token})}",
+        })
+    
+    @action(detail=False, methods=['post'], permission_classes=[IsAuthenticated])
+    def bulk_accept(self, request):
+        """Mentor accepts several session requests at once"""
+        return self.bulk_transition_response('accept')
+    
+    @action(detail=False, methods=['post'], permission_classes=[IsAuthenticated])
+    def bulk_cancel(self, request):
+        """Cancel several requested or accepted sessions at once"""
+        return self.bulk_transition_response('cancel')
 
 
-class RatingViewSet(viewsets.ModelViewSet):
+class RatingViewSet(QueryPlanMixin, viewsets.ModelViewSet):
     """
     Create and view ratings for completed sessions
     """
     serializer_class = RatingSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = KeysetPagination
+    select_related_fields = ('rater__profile',)
+    list_query_budget = 1
     
     def get_queryset(self):
-        queryset = Rating.objects.all().select_related('session', 'rater')
+        queryset = Rating.objects.all()
         
         # Filter by mentor (for mentor profile page)
         mentor_id = self.request.query_params.get('mentor_id', None)
@@ -212,24 +491,186 @@ class RatingViewSet(viewsets.ModelViewSet):
         return queryset
 
 
-class MessageViewSet(viewsets.ModelViewSet):
+class MessageViewSet(QueryPlanMixin, viewsets.ModelViewSet):
     """
     Mock chat messages for sessions
     """
     serializer_class = MessageSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = MessageKeysetPagination
+    select_related_fields = ('sender__profile',)
+    # Participant check plus the page (plus the anchor lookup for ?after_id=)
+    list_query_budget = 3
+    
+    def get_chat_session(self):
+        """The ?session= the user participates in, loaded once per request (or None)"""
+        if not hasattr(self, '_chat_session'):
+            self._chat_session = None
+            session_id = self.request.query_params.get('session', None)
+            if session_id and session_id.isdigit():
+                user = self.request.user
+                self._chat_session = Session.objects.filter(
+                    Q(requester=user) | Q(mentor=user), pk=session_id
+                ).only('id', 'chat_version').first()
+        return self._chat_session
     
     def get_queryset(self):
-        queryset = Message.objects.all().select_related('sender', 'session')
+        queryset = Message.objects.all()
         
         # Filter by session
         session_id = self.request.query_params.get('session', None)
         if session_id:
-            queryset = queryset.filter(session_id=session_id)
             # Ensure user is participant
-            session = Session.objects.filter(id=session_id).first()
-            if session and (session.requester == self.request.user or session.mentor == self.request.user):
-                return queryset
-            return Message.objects.none()
+            session = self.get_chat_session()
+            if session is None:
+                return Message.objects.none()
+            queryset = queryset.filter(session_id=session.id)
+            
+            # Delta sync: only messages after a known message id and/or time
+            after_id = self.request.query_params.get('after_id', None)
+            if after_id:
+                queryset = self.filter_after_message(queryset, session.id, after_id)
+            since = self.request.query_params.get('since', None)
+            if since:
+                since_time = parse_datetime(since)
+                if since_time is None:
+                    raise ValidationError({'since': 'Invalid datetime value.'})
+                queryset = queryset.filter(timestamp__gt=since_time)
         
         return queryset
+    
+    def filter_after_message(self, queryset, session_id, after_id):
+        """Seek past (timestamp, id) of `after_id` on the (session, timestamp, id) index"""
+        try:
+            after_id = int(after_id)
+        except ValueError:
+            raise ValidationError({'after_id': 'A valid integer is required.'})
+        anchor = Message.objects.filter(session_id=session_id, pk=after_id).values_list(
+            'timestamp', flat=True
+        ).first()
+        if anchor is None:
+            return queryset.filter(id__gt=after_id)
+        return queryset.filter(timestamp__gte=anchor).filter(
+            Q(timestamp__gt=anchor) | Q(id__gt=after_id)
+        )
+    
+    def get_chat_etag(self):
+        """Weak ETag from the session's chat version and the exact query string"""
+        session = self.get_chat_session()
+        if session is None:
+            return None
+        query = hashlib.md5(self.request.get_full_path().encode('utf-8')).hexdigest()[:12]
+        return f'W/"chat-{session.id}-{session.chat_version}-{query}"'
+    
+    def list(self, request, *args, **kwargs):
+        # Unchanged chats are answered from the session row alone
+        etag = self.get_chat_etag()
+        if etag and etag in request.headers.get('If-None-Match', ''):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers={'ETag': etag})
+        response = super().list(request, *args, **kwargs)
+        if etag:
+            response['ETag'] = etag
+            response['Cache-Control'] = 'private, no-cache'
+        return response
+
+
+def _stream_user(request, pk):
+    """The user opening a stream: from a ?token= ticket (EventSource) or a Bearer JWT"""
+    token = request.GET.get('token')
+    if token:
+        user_id = read_stream_token(token, pk)
+        user = User.objects.filter(pk=user_id, is_active=True).first() if user_id else None
+        if user is None:
+            raise AuthenticationFailed('Invalid or expired stream token.')
+        return user
+    auth = CachedJWTAuthentication().authenticate(request)
+    if auth is None:
+        raise AuthenticationFailed('Authentication credentials were not provided.')
+    return auth[0]
+
+
+def _authorize_stream(request, pk):
+    """Authenticate and check participation; an error response, or None when allowed"""
+    try:
+        user = _stream_user(request, pk)
+    except AuthenticationFailed as exc:
+        return JsonResponse({'error': str(exc.detail)}, status=status.HTTP_401_UNAUTHORIZED)
+    is_participant = Session.objects.filter(pk=pk).filter(
+        Q(requester=user) | Q(mentor=user)
+    ).exists()
+    if not is_participant:
+        return JsonResponse({'error': 'Session not found'}, status=status.HTTP_404_NOT_FOUND)
+    return None
+
+
+def _stream_backlog(pk, after_id):
+    """Events for the messages a resuming stream missed"""
+    if after_id is None:
+        return []
+    missed = Message.objects.filter(session_id=pk, id__gt=after_id).select_related(
+        'sender__profile'
+    ).order_by('timestamp', 'id')
+    return [encode_event(data) for data in MessageSerializer(missed, many=True).data]
+
+
+async def session_stream_view(request, pk):
+    """
+    Server-Sent Events stream of new chat messages for a session.
+    Needs the ASGI entry point (SERVER_INTERFACE=asgi in the Dockerfile and
+    render.yaml); resumes from Last-Event-ID or ?after_id= when given.
+    """
+    if not isinstance(request, ASGIRequest):
+        return JsonResponse(
+            {'error': 'Streaming is only available when served through skill_sync.asgi (SERVER_INTERFACE=asgi)'},
+            status=status.HTTP_501_NOT_IMPLEMENTED
+        )
+    
+    after_id = request.headers.get('Last-Event-ID') or request.GET.get('after_id')
+    try:
+        after_id = int(after_id) if after_id else None
+    except ValueError:
+        return JsonResponse({'error': 'Invalid after_id'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    error = await sync_to_async(_authorize_stream)(request, pk)
+    if error is not None:
+        return error
+    
+    # Make sure this worker is attached to the broker, then subscribe before
+    # reading the backlog so nothing slips in between
+    get_broker()
+    subscriber = hub.subscribe(pk)
+    try:
+        backlog = await sync_to_async(_stream_backlog)(pk, after_id)
+    except Exception:
+        hub.unsubscribe(pk, subscriber)
+        raise
+    
+    keepalive = settings.REALTIME.get('KEEPALIVE_SECONDS', 15)
+    
+    async def event_stream():
+        _, queue = subscriber
+        last_id = after_id or 0
+        try:
+            yield f"retry: {keepalive * 1000}\n\n"
+            for message_id, frame in backlog:
+                last_id = max(last_id, message_id)
+                yield frame
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=keepalive)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                if event is None:
+                    return
+                message_id, frame = event
+                if message_id > last_id:
+                    last_id = message_id
+                    yield frame
+        finally:
+            hub.unsubscribe(pk, subscriber)
+    
+    response = StreamingHttpResponse(event_stream(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -9,3 +9,8 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'skill_sync.settings')
 
 application = get_asgi_application()
+
+# Load the autocomplete index as the worker boots (see api.autocomplete)
+from api.autocomplete import index  # noqa: E402
+
+index.start()
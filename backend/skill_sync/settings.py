@@ -5,6 +5,8 @@ Django settings for skill_sync project.
 from pathlib import Path
 from datetime import timedelta
 import os
+import sys
+import tempfile
 from dotenv import load_dotenv
 import dj_database_url
 
@@ -19,6 +21,9 @@ SECRET_KEY = os.getenv('SECRET_KEY', 'django-insecure-dev-key-change-in-producti
 
 DEBUG = os.getenv('DEBUG', 'True') == 'True'
 
+# `manage.py test` (or pytest) is running
+TESTING = sys.argv[1:2] == ['test'] or 'pytest' in sys.modules
+
 ALLOWED_HOSTS = os.getenv('ALLOWED_HOSTS', 'localhost,127.0.0.1').split(',')
 
 # Application definition
@@ -42,6 +47,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'api.middleware.RequestMetricsMiddleware',  # First, so its timings cover the whole stack
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
     'corsheaders.middleware.CorsMiddleware',  # Must be before CommonMiddleware
@@ -49,6 +55,8 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'api.middleware.IdempotencyMiddleware',
+    'api.middleware.ReplicaPinMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -85,6 +93,67 @@ DATABASE_URL = os.getenv('DATABASE_URL')
 if DATABASE_URL:
     DATABASES['default'] = dj_database_url.parse(DATABASE_URL, conn_max_age=600)
 
+# Read replicas (comma-separated database URLs, e.g. Postgres standbys or, for
+# local testing, copies of the SQLite file). Safe-method requests to the
+# mentor directory and skill list read from them (see api.replicas)
+DATABASE_REPLICA_URLS = [url for url in os.getenv('DATABASE_REPLICA_URLS', '').split(',') if url]
+for index, url in enumerate(DATABASE_REPLICA_URLS):
+    DATABASES[f'replica_{index}'] = {
+        **dj_database_url.parse(url, conn_max_age=600),
+        # Tests read the test primary through every replica alias
+        'TEST': {'MIRROR': 'default'},
+    }
+if DATABASE_REPLICA_URLS:
+    DATABASE_ROUTERS = ['api.replicas.ReplicaRouter']
+REPLICAS = {
+    # Reads stay on the primary this long after a user's own write, and for
+    # cache fills of anything written this recently
+    'STICKY_SECONDS': int(os.getenv('REPLICA_STICKY_SECONDS', '5')),
+    'HEALTH_CHECK_INTERVAL': 5,
+    # A replica that failed is skipped this long
+    'RETRY_AFTER_SECONDS': 30,
+    # PostgreSQL standbys further behind than this are skipped
+    'MAX_LAG_SECONDS': int(os.getenv('REPLICA_MAX_LAG_SECONDS', '10')),
+}
+
+# Tuned SQLite mode (api.sqlite) for small deployments that serve SQLite from
+# several gthread workers; opt in with SQLITE_TUNED=True. Pragmas are applied
+# to every connection, and transactions are serialized with BEGIN IMMEDIATE
+# (plus an in-process lock) so concurrent workers wait for the write lock
+# instead of failing with "database is locked"
+SQLITE = {
+    'ENABLED': os.getenv('SQLITE_TUNED', 'False') == 'True',
+    'JOURNAL_MODE': os.getenv('SQLITE_JOURNAL_MODE', 'WAL'),
+    'SYNCHRONOUS': os.getenv('SQLITE_SYNCHRONOUS', 'NORMAL'),
+    'BUSY_TIMEOUT_MS': int(os.getenv('SQLITE_BUSY_TIMEOUT_MS', '5000')),
+    'MMAP_SIZE': int(os.getenv('SQLITE_MMAP_SIZE', str(256 * 1024 * 1024))),
+    'CACHE_SIZE_KB': int(os.getenv('SQLITE_CACHE_SIZE_KB', str(64 * 1024))),
+    'IMMEDIATE_TRANSACTIONS': os.getenv('SQLITE_IMMEDIATE_TRANSACTIONS', 'True') == 'True',
+    'SERIALIZE_WRITES': os.getenv('SQLITE_SERIALIZE_WRITES', 'True') == 'True',
+}
+if SQLITE['ENABLED']:
+    for database in DATABASES.values():
+        if database['ENGINE'] == 'django.db.backends.sqlite3':
+            database['ENGINE'] = 'api.sqlite'
+
+# Cache shared by every worker on the host (files under the temp directory).
+# Response, slot and principal invalidation and the recommendation change log
+# only reach other workers through this cache, so keep it shared: point
+# CACHE_BACKEND at django.core.cache.backends.redis.RedisCache when running on
+# several hosts, and use LocMemCache only with a single worker process.
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND', 'django.core.cache.backends.filebased.FileBasedCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', os.path.join(tempfile.gettempdir(), 'skill-sync-cache')),
+        'OPTIONS': {
+            'MAX_ENTRIES': int(os.getenv('CACHE_MAX_ENTRIES', '20000')),
+        },
+    }
+}
+
+# Seconds a cached mentor/skill directory response may be served
+API_RESPONSE_CACHE_TIMEOUT = int(os.getenv('API_RESPONSE_CACHE_TIMEOUT', '300'))
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -148,6 +217,20 @@ LOGGING = {
     },
 }
 
+# Per-request query/timing metrics (api.middleware.RequestMetricsMiddleware),
+# reported as a Server-Timing header and JSON lines on the api.requests logger
+# (DEBUG for sampled requests, WARNING for slow ones). Off under tests
+REQUEST_METRICS = {
+    'ENABLED': os.getenv('REQUEST_METRICS_ENABLED', str(not TESTING)) == 'True',
+    # Fraction of requests measured in detail
+    'SAMPLE_RATE': float(os.getenv('REQUEST_METRICS_SAMPLE_RATE', '0.01')),
+    'SERVER_TIMING': os.getenv('REQUEST_METRICS_SERVER_TIMING', 'True') == 'True',
+    # Requests slower than this are logged at WARNING, sampled or not
+    'SLOW_REQUEST_MS': int(os.getenv('REQUEST_METRICS_SLOW_REQUEST_MS', '500')),
+    # Queries slower than this are logged with their SQL
+    'SLOW_QUERY_MS': int(os.getenv('REQUEST_METRICS_SLOW_QUERY_MS', '100')),
+}
+
 # CORS settings
 CORS_ALLOWED_ORIGINS = [o for o in os.getenv(
     'CORS_ALLOWED_ORIGINS', 
@@ -161,10 +244,25 @@ CORS_ALLOW_HEADERS = list(default_headers) + [
     'x-idempotency-key',
 ]
 
+# Let the frontend read caching/idempotency response headers
+CORS_EXPOSE_HEADERS = ['etag', 'x-cache', 'idempotent-replayed', 'server-timing']
+
+# Retried POSTs with the same X-Idempotency-Key replay the stored response
+IDEMPOTENCY = {
+    'TTL_SECONDS': int(os.getenv('IDEMPOTENCY_TTL_SECONDS', str(24 * 60 * 60))),
+    # How long a request that is still running holds its key before a retry may
+    # take it over: gunicorn's 30 s worker timeout plus a margin
+    'PENDING_LEASE_SECONDS': int(os.getenv('IDEMPOTENCY_PENDING_LEASE_SECONDS', '60')),
+    # Response headers stored and replayed along with the body
+    'REPLAYED_HEADERS': ['Location', 'Content-Location', 'ETag', 'Last-Modified', 'Cache-Control', 'Vary'],
+    # Never store responses carrying credentials
+    'EXCLUDED_PATHS': ['/api/auth/token/'],
+}
+
 # REST Framework settings
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'api.authentication.CachedJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticatedOrReadOnly',
@@ -178,13 +276,56 @@ REST_FRAMEWORK = {
     ],
 }
 
+# Mentor slot search: weekly availability minus requested/accepted sessions
+SLOTS = {
+    'HORIZON_WEEKS': int(os.getenv('SLOTS_HORIZON_WEEKS', '4')),
+    'STEP_MINUTES': 15,
+    'CACHE_TIMEOUT': 24 * 60 * 60,
+}
+
+# Autocomplete trie, shared between workers through a snapshot file
+AUTOCOMPLETE = {
+    'SNAPSHOT_PATH': os.getenv('AUTOCOMPLETE_SNAPSHOT_PATH', str(BASE_DIR / 'autocomplete.json')),
+    'CHECK_INTERVAL': 1.0,
+    # Write changes to the shared log from a background thread, not the request
+    'BACKGROUND_REFRESH': True,
+    # Fold the change log into a new snapshot once it grows past this size
+    'COMPACT_BYTES': 256 * 1024,
+}
+
+# Real-time chat push (Server-Sent Events under skill_sync.asgi)
+# BROKER: 'local' delivers within one process; 'unix' fans out to every
+# worker on the host through Unix datagram sockets in SOCKET_DIR.
+REALTIME = {
+    'BROKER': os.getenv('REALTIME_BROKER', 'local'),
+    'SOCKET_DIR': os.getenv('REALTIME_SOCKET_DIR', '/tmp/skill_sync_realtime'),
+    'KEEPALIVE_SECONDS': int(os.getenv('REALTIME_KEEPALIVE_SECONDS', '15')),
+    # Lifetime of the ?token= tickets from POST /api/sessions/<id>/stream-token/
+    'STREAM_TOKEN_SECONDS': int(os.getenv('REALTIME_STREAM_TOKEN_SECONDS', '60')),
+    # Larger messages are pushed as a 'message-ref' event (ids only); the
+    # unix broker cannot send datagrams over 64 KB
+    'MAX_EVENT_BYTES': int(os.getenv('REALTIME_MAX_EVENT_BYTES', str(16 * 1024))),
+}
+
+# Authenticated users (with profile) are cached per token lifetime, and
+# last_login is written at most once per LAST_LOGIN_RESOLUTION_SECONDS
+AUTH_PRINCIPAL_CACHE = {
+    'ENABLED': os.getenv('AUTH_PRINCIPAL_CACHE', 'True') == 'True',
+    # Re-read is_active on every cache hit (one primary key lookup); only
+    # needed when users are deactivated with queryset updates
+    'RECHECK_ACTIVE': os.getenv('AUTH_PRINCIPAL_RECHECK_ACTIVE', 'False') == 'True',
+    'LAST_LOGIN_RESOLUTION_SECONDS': int(os.getenv('LAST_LOGIN_RESOLUTION_SECONDS', '300')),
+}
+
 # Simple JWT settings
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=int(os.getenv('ACCESS_TOKEN_MINUTES', '60'))),
     'REFRESH_TOKEN_LIFETIME': timedelta(days=7),
     'ROTATE_REFRESH_TOKENS': True,
     'BLACKLIST_AFTER_ROTATION': False,
-    'UPDATE_LAST_LOGIN': True,
+    # last_login is written by api.serializers.LoginSerializer instead
+    'UPDATE_LAST_LOGIN': False,
+    'TOKEN_OBTAIN_SERIALIZER': 'api.serializers.LoginSerializer',
     
     'ALGORITHM': 'HS256',
     'SIGNING_KEY': SECRET_KEY,
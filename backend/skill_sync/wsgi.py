@@ -9,3 +9,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'skill_sync.settings')
 
 application = get_wsgi_application()
+
+# Load the autocomplete index as the worker boots (see api.autocomplete)
+from api.autocomplete import index  # noqa: E402
+
+index.start()